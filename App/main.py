@@ -9,10 +9,20 @@ import traceback # Import traceback để in lỗi chi tiết
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__)))
 sys.path.insert(0, project_root)
 
+# --- Profiling (--profile hoặc CAFE_PROFILE=1), bật trước khi import phần còn lại ---
+from utils import profiler
+
+if "--profile" in sys.argv:
+    sys.argv.remove("--profile")
+    profiler.enable_profiling()
+
 # --- Imports ---
-from ui.login_dialog import LoginDialog
-from ui.main_window import MainWindow
-from utils.data_manager import migrate_menu_to_include_ids
+with profiler.span("import ui.login_dialog"):
+    from ui.login_dialog import LoginDialog
+with profiler.span("import utils"):
+    from utils.data_manager import migrate_menu_to_include_ids, migrate_menu_to_include_plu
+    from utils.app_logging import setup_logging, install_debug_toggle_signal
+    from ui.theme import apply_theme
 
 # --- Application Controller ---
 class AppController(QObject):
@@ -36,7 +46,8 @@ class AppController(QObject):
             self.main_window = None
 
         print("Debug: Tạo LoginDialog.")
-        self.login_dialog = LoginDialog()
+        with profiler.span("LoginDialog.__init__"):
+            self.login_dialog = LoginDialog()
         self.login_dialog.accepted.connect(self.start_main)
         self.login_dialog.rejected.connect(self.app.quit) # Thoát nếu cancel
         print("Debug: Hiển thị LoginDialog.")
@@ -56,7 +67,11 @@ class AppController(QObject):
 
         try:
             print("Debug: Đang khởi tạo MainWindow...")
-            self.main_window = MainWindow(current_user)
+            # Import sau khi đăng nhập để màn hình đăng nhập hiện ra ngay
+            with profiler.span("import ui.main_window"):
+                from ui.main_window import MainWindow
+            with profiler.span("MainWindow.__init__", role=current_user.get("role")):
+                self.main_window = MainWindow(current_user)
             print("Debug: Đã khởi tạo MainWindow.")
 
             self.main_window.logout_requested.connect(self.start_login)
@@ -86,7 +101,10 @@ class AppController(QObject):
 
 def main():
     """Hàm chính chạy ứng dụng."""
-    app = QApplication(sys.argv)
+    setup_logging()  # CAFE_DEBUG=1 để bật log DEBUG
+    install_debug_toggle_signal()
+    with profiler.span("QApplication.__init__"):
+        app = QApplication(sys.argv)
 
     # --- Font setup ---
     try:
@@ -97,10 +115,15 @@ def main():
     except Exception as e:
         print(f"Lỗi khi cài đặt font: {e}")
 
+    # --- Theme: một stylesheet chung cho cả ứng dụng ---
+    with profiler.span("apply_theme"):
+        apply_theme(app)
+
 
     # --- Migrate menu ---
     try:
         migrate_menu_to_include_ids()
+        migrate_menu_to_include_plu()
         print("Debug: Đã kiểm tra/migrate menu IDs.")
     except Exception as e:
         print(f"Lỗi khi migrate menu IDs: {e}")
@@ -123,4 +146,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
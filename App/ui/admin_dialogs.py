@@ -4,6 +4,7 @@ from PyQt6.QtWidgets import (
     QDateEdit
 )
 from PyQt6.QtCore import Qt, QDate
+from PyQt6.QtGui import QIntValidator
 import uuid
 
 from utils.data_manager import copy_image_to_data, hash_password # Import hash_password here
@@ -54,8 +55,6 @@ class UserDialog(QDialog):
         buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
         buttons.accepted.connect(self.accept); buttons.rejected.connect(self.reject)
 
-        self.setStyleSheet("""QLineEdit, QDateEdit, QComboBox { padding: 8px; border: 1px solid #ced4da; border-radius: 6px; background-color: #f8f9fa; } QLineEdit:focus, QDateEdit:focus, QComboBox:focus { border-color: #007bff; } QComboBox::drop-down { border: none; }""")
-
         layout.addLayout(form_layout)
         layout.addWidget(buttons)
 
@@ -63,7 +62,6 @@ class UserDialog(QDialog):
         if role == "admin":
             self.hourly_rate_input.setText("0.0")
             self.hourly_rate_input.setReadOnly(True)
-            self.hourly_rate_input.setStyleSheet("background-color: #e9ecef;")
         elif role == "staff":
             staff_hourly_rate = 7500000 / (8 * 26)
             default_rate = round(staff_hourly_rate, -2)
@@ -72,7 +70,6 @@ class UserDialog(QDialog):
             else:
                  self.hourly_rate_input.setText(str(self.user_data.get('hourly_rate', default_rate)))
             self.hourly_rate_input.setReadOnly(False)
-            self.hourly_rate_input.setStyleSheet("")
         elif role == "parttime":
             default_rate = 30000.0
             if not self.user_data or self.user_data.get('role') != 'parttime':
@@ -80,7 +77,6 @@ class UserDialog(QDialog):
             else:
                  self.hourly_rate_input.setText(str(self.user_data.get('hourly_rate', default_rate)))
             self.hourly_rate_input.setReadOnly(False)
-            self.hourly_rate_input.setStyleSheet("")
 
     def get_data(self):
         hourly_rate = 0.0
@@ -113,14 +109,15 @@ class MenuItemDialog(QDialog):
         self.name_input = QLineEdit(self.item_data['name'] if self.item_data else "")
         self.price_input = QLineEdit(str(self.item_data['price']) if self.item_data else "")
         self.category_input = QLineEdit(self.item_data['category'] if self.item_data else "")
+        self.plu_input = QLineEdit(str(self.item_data.get('plu') or "") if self.item_data else "")
+        self.plu_input.setValidator(QIntValidator(1, 9999, self)); self.plu_input.setPlaceholderText("Để trống để tự cấp mã")
         self.image_path_label = QLabel(self.item_data.get('image', 'Chưa có ảnh') if self.item_data else "Chưa có ảnh")
         select_image_button = QPushButton("Chọn ảnh..."); select_image_button.clicked.connect(self.select_image)
 
-        self.setStyleSheet("""QLineEdit { padding: 8px; border: 1px solid #ced4da; border-radius: 6px; background-color: #f8f9fa; } QLineEdit:focus { border-color: #007bff; }""")
-
         form_layout.addRow("Tên món:", self.name_input)
         form_layout.addRow("Giá (VND):", self.price_input)
         form_layout.addRow("Danh mục:", self.category_input)
+        form_layout.addRow("Mã PLU (gõ nhanh):", self.plu_input)
         form_layout.addRow("Đường dẫn ảnh:", self.image_path_label)
         form_layout.addRow(select_image_button)
         buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
@@ -139,7 +136,8 @@ class MenuItemDialog(QDialog):
 
         data = {
             "id": self.item_data.get('id') if self.item_data else str(uuid.uuid4()),
-            "name": self.name_input.text(), "price": price, "category": self.category_input.text()
+            "name": self.name_input.text(), "price": price, "category": self.category_input.text(),
+            "plu": int(self.plu_input.text()) if self.plu_input.text() else None  # None: data_manager tự cấp mã
         }
         if self.selected_image_path:
             new_image_path = copy_image_to_data(self.selected_image_path)
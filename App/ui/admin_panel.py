@@ -1,4 +1,3 @@
-import traceback
 from PyQt6.QtWidgets import (
     QWidget,
     QVBoxLayout,
@@ -13,24 +12,17 @@ from PyQt6.QtWidgets import (
     QDateEdit,
     QCalendarWidget,
     QFormLayout,
-    QScrollArea,
     QDialog,
     QDialogButtonBox,
     QComboBox,
     QSizePolicy,
+    QTableView,
 )
-from PyQt6.QtGui import QPixmap
 from PyQt6.QtCore import Qt, QDate
 import os
 import datetime
 from decimal import Decimal
 
-import matplotlib
-
-matplotlib.use("QtAgg")  # Hoặc Qt6Agg
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-
 from utils.data_manager import (
     get_users,
     add_user,
@@ -45,34 +37,14 @@ from utils.data_manager import (
     calculate_salary,
     PROJECT_ROOT,
 )
+from utils.app_logging import get_logger
 from ui.admin_dialogs import UserDialog, MenuItemDialog
+from ui.receipt_printing import print_receipt
+from ui.async_data import data_service, set_loading
+from ui.pixmap_cache import pixmap_cache
+from ui.table_models import Column, RecordTableModel, RecordSortProxyModel
 
-
-# --- Lớp vẽ biểu đồ ---
-class MplCanvas(FigureCanvas):
-    def __init__(self, parent=None, width=5, height=4, dpi=100):
-        fig = Figure(figsize=(width, height), dpi=dpi)
-        self.axes = fig.add_subplot(111)
-        super(MplCanvas, self).__init__(fig)
-        self.setParent(parent)
-
-    def update_plot(self, dates, sales):
-        self.axes.cla()  # Xóa biểu đồ cũ
-        if dates and sales:
-            self.axes.bar(dates, sales, color="#007bff")
-            self.axes.set_title("Doanh thu theo ngày")
-            self.axes.set_ylabel("Tổng doanh thu (VND)")
-            self.axes.figure.autofmt_xdate()  # Tự xoay ngày cho đẹp
-        else:
-            self.axes.text(
-                0.5,
-                0.5,
-                "Không có dữ liệu",
-                horizontalalignment="center",
-                verticalalignment="center",
-                transform=self.axes.transAxes,
-            )
-        self.draw()
+logger = get_logger("admin_panel")
 
 
 # --- Dialog chi tiết hóa đơn ---
@@ -135,17 +107,173 @@ class ReceiptDetailDialog(QDialog):
         layout.addWidget(total_label)
 
         buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Close)
+        reprint_button = buttons.addButton(
+            "🖨️ In lại hóa đơn", QDialogButtonBox.ButtonRole.ActionRole
+        )
+        reprint_button.setObjectName("reprintButton")
+        reprint_button.clicked.connect(self.reprint_receipt)
         buttons.rejected.connect(self.reject)
         layout.addWidget(buttons)
-        self.setStyleSheet(
-            """#totalReceiptLabel {font-size: 18px; font-weight: bold; color: #28a745; padding-top: 10px;} QTableWidget {border-radius: 0px;}"""
+
+    def reprint_receipt(self):
+        # Dựng lại từ hóa đơn đã lưu (receipts.json), không phụ thuộc file PDF cũ
+        parent = self.parentWidget()
+        print_receipt(
+            self.receipt_data, parent.window() if parent else None, reprint=True
         )
 
 
+# --- Hàm tính toán chạy ở luồng nền (không đụng tới widget) ---
+def _summarize_receipts(start_date, end_date):
+    """Lọc hóa đơn theo ngày, trả về (dòng bảng, hóa đơn gốc, doanh thu theo ngày, tổng)."""
+    rows = []
+    receipts = []
+    sales_by_date = {}
+    total_revenue = Decimal("0.0")
+    for receipt in get_receipts():
+        try:
+            timestamp_str = receipt.get("timestamp")
+            if not timestamp_str:
+                continue
+            receipt_total = Decimal(str(receipt.get("total", 0.0)))
+            receipt_date = datetime.datetime.fromisoformat(timestamp_str).date()
+            if start_date <= receipt_date <= end_date:
+                rows.append(
+                    (
+                        receipt.get("id", "N/A"),
+                        receipt.get("employee", "N/A"),
+                        receipt_date,
+                        receipt_total,
+                    )
+                )
+                receipts.append(receipt)
+                total_revenue += receipt_total
+                date_str = receipt_date.strftime("%Y-%m-%d")
+                sales_by_date[date_str] = (
+                    sales_by_date.get(date_str, Decimal("0.0")) + receipt_total
+                )
+        except Exception as e:
+            print(f"Lỗi xử lý hóa đơn ID {receipt.get('id','N/A')}: {e}")
+    return rows, receipts, sales_by_date, total_revenue
+
+
+def _load_attendance_rows(start_date, end_date, selected_user):
+    """Trả về (danh sách username, các dòng chấm công dạng giá trị thô)."""
+    usernames = sorted([u.get("username", "N/A") for u in get_users()])
+    all_records = get_attendance_records()
+    all_records.sort(key=lambda x: x.get("check_in_time", ""), reverse=True)
+    rows = []
+    for record in all_records:
+        try:
+            check_in_str = record.get("check_in_time")
+            check_out_str = record.get("check_out_time")
+            record_user = record.get("username", "N/A")
+
+            if not check_in_str:
+                continue
+
+            check_in_dt = datetime.datetime.fromisoformat(check_in_str)
+            record_date = check_in_dt.date()
+
+            if not (start_date <= record_date <= end_date):
+                continue
+            if selected_user != "Tất cả" and record_user != selected_user:
+                continue
+
+            check_out_time = None  # Chưa check-out
+            if check_out_str:
+                try:
+                    check_out_time = datetime.datetime.fromisoformat(check_out_str).time()
+                except ValueError:
+                    check_out_time = "Lỗi Giờ Ra"
+            rows.append((record_user, record_date, check_in_dt.time(), check_out_time))
+        except ValueError as ve:
+            print(f"Lỗi định dạng thời gian trong bản ghi {record.get('id','N/A')}: {ve}")
+        except Exception as e:
+            print(f"Lỗi xử lý bản ghi chấm công {record.get('id','N/A')}: {e}")
+    return usernames, rows
+
+
+def _build_salary_rows(start_date, end_date, selected_user):
+    """Tính lương, trả về (các dòng bảng lương, username bị lỗi không xác định)."""
+    users_to_calculate = []
+    if selected_user == "Tất cả":
+        users_to_calculate = [
+            u.get("username")
+            for u in get_users()
+            if u.get("role") != "admin" and u.get("username")
+        ]  # Lọc admin và None
+    elif selected_user:
+        users_to_calculate.append(selected_user)  # Chỉ tính nếu user được chọn
+
+    period_str = f"{start_date.strftime('%d/%m/%Y')} - {end_date.strftime('%d/%m/%Y')}"
+    rows = []
+    failed_users = []
+    for username in users_to_calculate:
+        try:
+            salary_data = calculate_salary(username, start_date, end_date)
+            rows.append(
+                (
+                    username,
+                    period_str,
+                    f"{salary_data.get('total_hours', 0.0):.2f}",
+                    f"{salary_data.get('hourly_rate', 0.0):,.0f}",
+                    f"{salary_data.get('total_salary', Decimal('0.0')):,.0f}",  # Lấy an toàn
+                )
+            )
+        except ValueError as e:
+            print(f"Lỗi khi tính lương cho {username}: {e}")  # Lỗi logic (vd: user k tồn tại)
+        except Exception as e:
+            print(f"Lỗi không xác định khi tính lương cho {username}: {e}")
+            failed_users.append(username)
+    return rows, failed_users
+
+
+def _format_time(value):
+    if value is None:
+        return "Chưa Check-out"
+    return value if isinstance(value, str) else value.strftime("%H:%M:%S")
+
+
+# Cột của bảng hóa đơn/chấm công: giá trị thô chỉ được định dạng khi hiển thị
+RECEIPT_COLUMNS = [
+    Column("ID Hóa đơn", lambda receipt_id: receipt_id[:8] + "...", str),
+    Column("Nhân viên"),
+    Column("Ngày", lambda day: day.strftime("%Y-%m-%d")),
+    Column("Tổng tiền", lambda total: f"{total:,.0f} VND", float),
+]
+ATTENDANCE_COLUMNS = [
+    Column("Nhân viên"),
+    Column("Ngày", lambda day: day.strftime("%Y-%m-%d")),
+    Column("Giờ Check-in", _format_time),
+    Column("Giờ Check-out", _format_time),
+]
+
+
+def _record_table_view(model):
+    """QTableView chỉ đọc, sắp xếp qua proxy, giữ thứ tự gốc (mới nhất trước) ban đầu."""
+    proxy = RecordSortProxyModel(model, model)
+    view = QTableView()
+    view.setModel(proxy)
+    view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+    view.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+    view.setSortingEnabled(True)
+    view.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+    view.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+    view.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+    view.setAlternatingRowColors(True)
+    return view
+
+
 # --- Bảng điều khiển Admin ---
 class AdminPanel(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
+        # Dữ liệu đọc ở nền (async_data); widget chỉ nhận kết quả qua callback
+        self.users_cache = []
+        self.menu_cache = []
+        self._load_tokens = {}
+        self._preview_path = None  # Ảnh xem trước đang chờ giải mã
         main_layout = QVBoxLayout(self)
         main_layout.setContentsMargins(15, 15, 15, 15)
         self.tabs = QTabWidget()
@@ -166,22 +294,82 @@ class AdminPanel(QWidget):
 
         main_layout.addWidget(self.tabs)
 
-        # Khởi tạo UI cho từng tab
-        self.init_users_tab()
-        self.init_menu_tab()
-        self.init_stats_tab()
-        self.init_attendance_tab()
-        self.init_salary_tab()
-
-        self.apply_stylesheet()
+        # Tab chỉ được dựng và tải dữ liệu lần đầu khi hiện ra; sau đó tải lại
+        # khi bị đánh dấu "bẩn" (mark_dirty) và đang được xem
+        self._tab_setup = {
+            self.users_tab: (self.init_users_tab, self.load_users_data),
+            self.menu_tab: (self.init_menu_tab, self.load_menu_data),
+            self.stats_tab: (self.init_stats_tab, self.load_statistics_data),
+            self.attendance_tab: (self.init_attendance_tab, self.load_attendance_data),
+            self.salary_tab: (self.init_salary_tab, self.load_salary_filters),
+        }
+        self._source_tabs = {
+            "users": (self.users_tab, self.attendance_tab, self.salary_tab),
+            "menu": (self.menu_tab,),
+            "receipts": (self.stats_tab,),
+            "attendance": (self.attendance_tab,),
+        }
+        self._initialized_tabs = set()
+        self._dirty_tabs = set(self._tab_setup)
+        self.tabs.currentChanged.connect(lambda _: self._refresh_current_tab())
 
     def refresh_data(self):
-        """Tải lại dữ liệu cho tất cả các tab."""
-        self.load_users_data()
-        self.load_menu_data()
-        self.load_statistics_data()
-        self.load_attendance_data()
-        self.update_salary_filters()  # Chỉ cần cập nhật filter lương
+        """Đánh dấu mọi tab cần tải lại; chỉ tab đang xem được tải ngay."""
+        self.mark_dirty(*self._source_tabs)
+
+    def mark_dirty(self, *sources):
+        """Báo nguồn dữ liệu ("users", "menu", "receipts", "attendance") đã thay đổi."""
+        for source in sources:
+            self._dirty_tabs.update(self._source_tabs[source])
+        if self.isVisible():
+            self._refresh_current_tab()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._refresh_current_tab()
+
+    def _refresh_current_tab(self):
+        tab = self.tabs.currentWidget()
+        if tab not in self._tab_setup:
+            return
+        init_tab, load_tab = self._tab_setup[tab]
+        if tab not in self._initialized_tabs:
+            self._initialized_tabs.add(tab)
+            init_tab()
+        if tab in self._dirty_tabs:
+            self._dirty_tabs.discard(tab)
+            load_tab()
+
+    def _load_async(self, key, widget, func, *args, on_done):
+        """Tải dữ liệu ở nền cho một bảng; kết quả của lần gọi cũ hơn bị bỏ qua."""
+        token = self._load_tokens.get(key, 0) + 1
+        self._load_tokens[key] = token
+        set_loading(widget, True)
+
+        def done(result):
+            if self._load_tokens.get(key) == token:
+                set_loading(widget, False)
+                on_done(result)
+
+        def failed(error):
+            if self._load_tokens.get(key) == token:
+                set_loading(widget, False)
+                QMessageBox.critical(self, "Lỗi", f"Không thể tải dữ liệu: {error}")
+
+        data_service().load(func, *args, on_done=done, on_error=failed, owner=self)
+
+    def _save_async(self, func, *args, on_done, error_prefix):
+        """Ghi dữ liệu ở nền; ValueError (vd. trùng username) hiện dạng cảnh báo."""
+
+        def failed(error):
+            if isinstance(error, ValueError):
+                QMessageBox.warning(self, "Lỗi", str(error))
+            else:
+                QMessageBox.critical(self, "Lỗi", f"{error_prefix}: {error}")
+
+        data_service().save(
+            func, *args, on_done=lambda _: on_done(), on_error=failed, owner=self
+        )
 
     # --- Tab Quản lý Nhân viên ---
     def init_users_tab(self):
@@ -239,10 +427,13 @@ class AdminPanel(QWidget):
         self.users_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
         self.users_table.setAlternatingRowColors(True)
         layout.addWidget(self.users_table)
-        self.load_users_data()
 
     def load_users_data(self):
-        users = get_users()
+        self._load_async("users", self.users_table, get_users, on_done=self._populate_users)
+
+    def _populate_users(self, users):
+        self.users_cache = users
+        self.update_salary_filters()
         self.users_table.setRowCount(len(users))
         for row, user in enumerate(users):
             self.users_table.setItem(
@@ -273,16 +464,12 @@ class AdminPanel(QWidget):
                         self, "Lỗi", "Khi tạo user mới, mật khẩu là bắt buộc."
                     )
                     return
-                try:
-                    add_user(data)
-                    self.load_users_data()
-                    self.update_salary_filters()  # Cập nhật filter lương
-                except ValueError as e:
-                    QMessageBox.warning(
-                        self, "Lỗi", str(e)
-                    )  # Hiển thị lỗi trùng username
-                except Exception as e:
-                    QMessageBox.critical(self, "Lỗi", f"Lỗi không xác định: {e}")
+                self._save_async(
+                    add_user,
+                    data,
+                    on_done=lambda: self.mark_dirty("users"),
+                    error_prefix="Lỗi không xác định",
+                )
 
     def edit_selected_user(self):
         selected_rows = self.users_table.selectionModel().selectedRows()
@@ -297,7 +484,7 @@ class AdminPanel(QWidget):
             return  # Should not happen, but safety check
         username = username_item.text()
         user_data = next(
-            (u for u in get_users() if u.get("username") == username), None
+            (u for u in self.users_cache if u.get("username") == username), None
         )
 
         if user_data:
@@ -308,12 +495,13 @@ class AdminPanel(QWidget):
                     # Giữ mật khẩu cũ nếu người dùng không nhập mới
                     if "password" not in new_data or not new_data["password"]:
                         new_data["password"] = user_data.get("password")  # Lấy pass cũ
-                    try:
-                        update_user(username, new_data)
-                        self.load_users_data()
-                        self.update_salary_filters()  # Cập nhật filter lương
-                    except Exception as e:
-                        QMessageBox.critical(self, "Lỗi", f"Lỗi cập nhật user: {e}")
+                    self._save_async(
+                        update_user,
+                        username,
+                        new_data,
+                        on_done=lambda: self.mark_dirty("users"),
+                        error_prefix="Lỗi cập nhật user",
+                    )
 
     def delete_selected_user(self):
         selected_rows = self.users_table.selectionModel().selectedRows()
@@ -348,12 +536,12 @@ class AdminPanel(QWidget):
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
         )
         if reply == QMessageBox.StandardButton.Yes:
-            try:
-                delete_user(username)
-                self.load_users_data()
-                self.update_salary_filters()  # Cập nhật filter lương
-            except Exception as e:
-                QMessageBox.critical(self, "Lỗi", f"Lỗi xóa user: {e}")
+            self._save_async(
+                delete_user,
+                username,
+                on_done=lambda: self.mark_dirty("users"),
+                error_prefix="Lỗi xóa user",
+            )
 
     # --- Tab Quản lý Thực đơn ---
     def init_menu_tab(self):
@@ -378,8 +566,8 @@ class AdminPanel(QWidget):
         button_layout.addStretch()
         layout.addLayout(button_layout)
         self.menu_table = QTableWidget()
-        self.menu_table.setColumnCount(4)
-        self.menu_table.setHorizontalHeaderLabels(["ID", "Tên món", "Giá (VND)", "Ảnh"])
+        self.menu_table.setColumnCount(5)
+        self.menu_table.setHorizontalHeaderLabels(["ID", "Tên món", "Giá (VND)", "Ảnh", "Mã PLU"])
         self.menu_table.horizontalHeader().setSectionResizeMode(
             QHeaderView.ResizeMode.Stretch
         )
@@ -407,11 +595,13 @@ class AdminPanel(QWidget):
         right_layout.addWidget(self.image_preview_label)
         main_tab_layout.addWidget(left_widget, 1)
         main_tab_layout.addWidget(right_widget)
-        self.load_menu_data()
         self.menu_table.itemSelectionChanged.connect(self.display_menu_image)
 
     def load_menu_data(self):
-        menu = get_menu()
+        self._load_async("menu", self.menu_table, get_menu, on_done=self._populate_menu)
+
+    def _populate_menu(self, menu):
+        self.menu_cache = menu
         self.menu_table.setRowCount(len(menu))
         for row, item in enumerate(menu):
             self.menu_table.setItem(row, 0, QTableWidgetItem(item.get("id", "N/A")))
@@ -420,14 +610,19 @@ class AdminPanel(QWidget):
                 row, 2, QTableWidgetItem(f"{item.get('price', 0):,.0f}")
             )
             self.menu_table.setItem(row, 3, QTableWidgetItem(item.get("image", "")))
+            self.menu_table.setItem(row, 4, QTableWidgetItem(str(item.get("plu") or "")))
 
     def add_new_menu_item(self):
         dialog = MenuItemDialog(parent=self)
         if dialog.exec():
             data = dialog.get_data()
             if data:
-                add_menu_item(data)
-                self.load_menu_data()
+                self._save_async(
+                    add_menu_item,
+                    data,
+                    on_done=lambda: self.mark_dirty("menu"),
+                    error_prefix="Lỗi thêm món",
+                )
 
     def edit_selected_menu_item(self):
         selected_rows = self.menu_table.selectionModel().selectedRows()
@@ -439,14 +634,19 @@ class AdminPanel(QWidget):
         if not item_id_item:
             return
         item_id = item_id_item.text()
-        item_data = next((i for i in get_menu() if i.get("id") == item_id), None)
+        item_data = next((i for i in self.menu_cache if i.get("id") == item_id), None)
         if item_data:
             dialog = MenuItemDialog(item_data, parent=self)
             if dialog.exec():
                 data = dialog.get_data()
                 if data:
-                    update_menu_item(item_id, data)
-                    self.load_menu_data()
+                    self._save_async(
+                        update_menu_item,
+                        item_id,
+                        data,
+                        on_done=lambda: self.mark_dirty("menu"),
+                        error_prefix="Lỗi cập nhật món",
+                    )
 
     def delete_selected_menu_item(self):
         selected_rows = self.menu_table.selectionModel().selectedRows()
@@ -467,12 +667,17 @@ class AdminPanel(QWidget):
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
         )
         if reply == QMessageBox.StandardButton.Yes:
-            delete_menu_item(item_id)
-            self.load_menu_data()
+            self._save_async(
+                delete_menu_item,
+                item_id,
+                on_done=lambda: self.mark_dirty("menu"),
+                error_prefix="Lỗi xóa món",
+            )
             self.image_preview_label.clear()
             self.image_preview_label.setText("Chọn một món để xem ảnh")
 
     def display_menu_image(self):
+        self._preview_path = None
         selected_rows = self.menu_table.selectionModel().selectedRows()
         if not selected_rows:
             self.image_preview_label.setText("Chọn một món để xem ảnh")
@@ -491,41 +696,29 @@ class AdminPanel(QWidget):
         # PROJECT_ROOT trỏ vào thư mục App
         full_image_path = os.path.join(PROJECT_ROOT, image_path) if image_path else ""
 
-        # --- THÊM DEBUG ---
-        print(f"Debug AdminPreview: Trying path: '{full_image_path}'")
-        image_exists = False
-        if full_image_path:
-            image_exists = os.path.exists(full_image_path)
-        print(f"Debug AdminPreview: Path exists? {image_exists}")
-        # --- HẾT DEBUG ---
-
-        if full_image_path and image_exists:  # Dùng biến đã kiểm tra
-            try:  # Thêm try-except
-                pixmap = QPixmap(full_image_path)
-                if pixmap.isNull():
-                    print(
-                        f"LỖI AdminPreview: QPixmap bị null cho file: {full_image_path}"
-                    )
-                    self.image_preview_label.setText(f"Ảnh bị lỗi:\n{image_path}")
+        if full_image_path and os.path.exists(full_image_path):
+            self.image_preview_label.setText("Đang tải ảnh...")
+
+            def show_preview(pixmap):
+                if self._preview_path != full_image_path:
+                    return  # Người dùng đã chọn món khác trong lúc chờ
+                if pixmap is None:
                     self.image_preview_label.clear()
+                    self.image_preview_label.setText(f"Ảnh bị lỗi:\n{image_path}")
                 else:
-                    print(f"Debug AdminPreview: Tải ảnh thành công.")
-                    self.image_preview_label.setPixmap(
-                        pixmap.scaled(
-                            self.image_preview_label.size(),
-                            Qt.AspectRatioMode.KeepAspectRatio,
-                            Qt.TransformationMode.SmoothTransformation,
-                        )
-                    )
-            except Exception as e:
-                print(f"LỖI AdminPreview: Exception khi tải QPixmap: {e}")
-                traceback.print_exc()
-                self.image_preview_label.setText(f"Ảnh bị lỗi:\n{image_path}")
-                self.image_preview_label.clear()
+                    self.image_preview_label.setPixmap(pixmap)
+
+            self._preview_path = full_image_path
+            pixmap_cache().load(
+                full_image_path,
+                self.image_preview_label.size(),
+                show_preview,
+                owner=self,
+            )
         else:
             if full_image_path:
-                print(
-                    f"CẢNH BÁO AdminPreview: File ảnh không tồn tại: {full_image_path}"
+                logger.warning(
+                    "AdminPreview: File ảnh không tồn tại: %s", full_image_path
                 )
             self.image_preview_label.setText(f"Không tìm thấy ảnh:\n{image_path}")
             self.image_preview_label.clear()
@@ -562,101 +755,57 @@ class AdminPanel(QWidget):
         layout.addLayout(summary_layout)
         # Content (Chart + Table)
         content_layout = QHBoxLayout()
-        self.stats_canvas = MplCanvas(self, width=5, height=4, dpi=100)
-        content_layout.addWidget(self.stats_canvas, 2)
-        receipt_scroll = QScrollArea()
-        receipt_scroll.setWidgetResizable(True)
-        self.receipts_table = QTableWidget()
-        self.receipts_table.setColumnCount(4)
-        self.receipts_table.setHorizontalHeaderLabels(
-            ["ID Hóa đơn", "Nhân viên", "Ngày", "Tổng tiền"]
-        )
-        self.receipts_table.horizontalHeader().setSectionResizeMode(
-            QHeaderView.ResizeMode.Stretch
-        )
+        try:
+            # matplotlib chỉ được import khi tab thống kê mở lần đầu (khởi động nhanh hơn)
+            from ui.revenue_chart import MplCanvas
+
+            self.stats_canvas = MplCanvas(self, width=5, height=4, dpi=100)
+            content_layout.addWidget(self.stats_canvas, 2)
+        except ImportError:
+            logger.warning("Thư viện 'matplotlib' chưa được cài. Không vẽ được biểu đồ.")
+            self.stats_canvas = None
+            chart_placeholder = QLabel(
+                "Chưa cài 'matplotlib' nên không vẽ được biểu đồ.\nCài đặt: pip install matplotlib"
+            )
+            chart_placeholder.setAlignment(Qt.AlignmentFlag.AlignCenter)
+            content_layout.addWidget(chart_placeholder, 2)
+        self.receipts_model = RecordTableModel(RECEIPT_COLUMNS, self)
+        self.receipts_table = _record_table_view(self.receipts_model)
         self.receipts_table.horizontalHeader().setSectionResizeMode(
             0, QHeaderView.ResizeMode.ResizeToContents
         )
-        self.receipts_table.verticalHeader().setSectionResizeMode(
-            QHeaderView.ResizeMode.Stretch
-        )
-        self.receipts_table.setSizePolicy(
-            QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding
-        )
-        self.receipts_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        self.receipts_table.setSelectionBehavior(
-            QTableWidget.SelectionBehavior.SelectRows
-        )
-        self.receipts_table.itemDoubleClicked.connect(self.show_receipt_detail)
-        receipt_scroll.setWidget(self.receipts_table)
-        content_layout.addWidget(receipt_scroll, 1)
+        self.receipts_table.doubleClicked.connect(self.show_receipt_detail)
+        content_layout.addWidget(self.receipts_table, 1)
         layout.addLayout(content_layout, 1)
-        self.load_statistics_data()
 
     def load_statistics_data(self):
         start_date = self.start_date_input.date().toPyDate()
         end_date = self.end_date_input.date().toPyDate()
-        all_receipts = get_receipts()
-
-        self.filtered_receipts_cache = []
-        sales_by_date = {}
-        total_revenue = Decimal("0.0")
-
-        self.receipts_table.setRowCount(0)
-
-        for receipt in all_receipts:
-            # TRY phải thẳng hàng với FOR
-            try:
-                # Code bên trong TRY thụt vào 1 mức
-                timestamp_str = receipt.get("timestamp")
-                receipt_total = Decimal(str(receipt.get("total", 0.0)))
-                receipt_employee = receipt.get("employee", "N/A")
-                receipt_id_short = receipt.get("id", "N/A")[:8] + "..."
-
-                if not timestamp_str:
-                    continue
-
-                receipt_dt = datetime.datetime.fromisoformat(timestamp_str)
-                receipt_date = receipt_dt.date()
-
-                if start_date <= receipt_date <= end_date:
-                    self.filtered_receipts_cache.append(receipt)
-                    total_revenue += receipt_total
-
-                    row = self.receipts_table.rowCount()
-                    self.receipts_table.insertRow(row)
-                    self.receipts_table.setItem(
-                        row, 0, QTableWidgetItem(receipt_id_short)
-                    )
-                    self.receipts_table.setItem(
-                        row, 1, QTableWidgetItem(receipt_employee)
-                    )
-                    self.receipts_table.setItem(
-                        row, 2, QTableWidgetItem(receipt_date.strftime("%Y-%m-%d"))
-                    )
-                    self.receipts_table.setItem(
-                        row, 3, QTableWidgetItem(f"{receipt_total:,.0f} VND")
-                    )
-
-                    date_str = receipt_date.strftime("%Y-%m-%d")
-                    sales_by_date[date_str] = (
-                        sales_by_date.get(date_str, Decimal("0.0")) + receipt_total
-                    )
+        self._load_async(
+            "statistics",
+            self.receipts_table,
+            _summarize_receipts,
+            start_date,
+            end_date,
+            on_done=self._populate_statistics,
+        )
 
-            # EXCEPT phải thẳng hàng với TRY
-            except Exception as e:
-                print(f"Lỗi xử lý hóa đơn ID {receipt.get('id','N/A')}: {e}")
+    def _populate_statistics(self, summary):
+        rows, receipts, sales_by_date, total_revenue = summary
+        self.receipts_model.set_rows(rows, receipts)
 
         self.total_revenue_label.setText(f"Tổng doanh thu: {total_revenue:,.0f} VND")
         sorted_dates = sorted(sales_by_date.keys())
         sorted_sales = [float(sales_by_date[date]) for date in sorted_dates]
-        self.stats_canvas.update_plot(sorted_dates, sorted_sales)
+        if self.stats_canvas is not None:
+            self.stats_canvas.update_plot(sorted_dates, sorted_sales)
 
-    def show_receipt_detail(self, item):
-        selected_row = item.row()
+    def show_receipt_detail(self, index):
         try:
-            if 0 <= selected_row < len(self.filtered_receipts_cache):
-                receipt_data = self.filtered_receipts_cache[selected_row]
+            receipt_data = self.receipts_model.payload(
+                self.receipts_table.model().mapToSource(index).row()
+            )
+            if receipt_data is not None:
                 dialog = ReceiptDetailDialog(receipt_data, self)
                 dialog.exec()
             else:
@@ -693,105 +842,40 @@ class AdminPanel(QWidget):
         filter_layout.addStretch()
         layout.addLayout(filter_layout)
         # Table
-        self.attendance_table = QTableWidget()
-        self.attendance_table.setColumnCount(4)
-        self.attendance_table.setHorizontalHeaderLabels(
-            ["Nhân viên", "Ngày", "Giờ Check-in", "Giờ Check-out"]
-        )
-        self.attendance_table.horizontalHeader().setSectionResizeMode(
-            QHeaderView.ResizeMode.Stretch
-        )
-        self.attendance_table.verticalHeader().setSectionResizeMode(
-            QHeaderView.ResizeMode.Stretch
-        )
-        self.attendance_table.setSizePolicy(
-            QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding
-        )
-        self.attendance_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        self.attendance_table.setSelectionBehavior(
-            QTableWidget.SelectionBehavior.SelectRows
-        )
-        self.attendance_table.setAlternatingRowColors(True)
+        self.attendance_model = RecordTableModel(ATTENDANCE_COLUMNS, self)
+        self.attendance_table = _record_table_view(self.attendance_model)
         layout.addWidget(self.attendance_table)
-        self.load_attendance_data()
 
     def load_attendance_data(self):
-        # Cập nhật filter user
-        if hasattr(self, "att_user_filter"):
-            current_selection = self.att_user_filter.currentText()
-            self.att_user_filter.blockSignals(
-                True
-            )  # Tạm khóa signal để tránh trigger lại load_attendance_data
-            self.att_user_filter.clear()
-            self.att_user_filter.addItem("Tất cả")
-            users = get_users()
-            usernames = sorted(
-                [u.get("username", "N/A") for u in users]
-            )  # Lấy username an toàn
-            self.att_user_filter.addItems(usernames)
-            index = self.att_user_filter.findText(current_selection)
-            if index != -1:
-                self.att_user_filter.setCurrentIndex(index)
-            self.att_user_filter.blockSignals(False)  # Mở lại signal
-
-        # Lấy giá trị filter
         start_date = self.att_start_date_input.date().toPyDate()
         end_date = self.att_end_date_input.date().toPyDate()
         selected_user = self.att_user_filter.currentText()
+        self._load_async(
+            "attendance",
+            self.attendance_table,
+            _load_attendance_rows,
+            start_date,
+            end_date,
+            selected_user,
+            on_done=self._populate_attendance,
+        )
 
-        all_records = get_attendance_records()
-        self.attendance_table.setRowCount(0)
-        all_records.sort(key=lambda x: x.get("check_in_time", ""), reverse=True)
-
-        for record in all_records:
-            # TRY phải thẳng hàng với FOR
-            try:
-                # Code bên trong TRY thụt vào 1 mức
-                check_in_str = record.get("check_in_time")
-                check_out_str = record.get("check_out_time")
-                record_user = record.get("username", "N/A")
-
-                if not check_in_str:
-                    continue
-
-                check_in_dt = datetime.datetime.fromisoformat(check_in_str)
-                record_date = check_in_dt.date()
-
-                if not (start_date <= record_date <= end_date):
-                    continue
-                if selected_user != "Tất cả" and record_user != selected_user:
-                    continue
-
-                row = self.attendance_table.rowCount()
-                self.attendance_table.insertRow(row)
-
-                check_in_time_str = check_in_dt.strftime("%H:%M:%S")
-                check_out_time_str = "Chưa Check-out"
-                if check_out_str:
-                    try:
-                        check_out_dt = datetime.datetime.fromisoformat(check_out_str)
-                        check_out_time_str = check_out_dt.strftime("%H:%M:%S")
-                    except ValueError:
-                        check_out_time_str = "Lỗi Giờ Ra"
-
-                self.attendance_table.setItem(row, 0, QTableWidgetItem(record_user))
-                self.attendance_table.setItem(
-                    row, 1, QTableWidgetItem(record_date.strftime("%Y-%m-%d"))
-                )
-                self.attendance_table.setItem(
-                    row, 2, QTableWidgetItem(check_in_time_str)
-                )
-                self.attendance_table.setItem(
-                    row, 3, QTableWidgetItem(check_out_time_str)
-                )
+    def _populate_attendance(self, result):
+        usernames, rows = result
+        # Cập nhật filter user
+        current_selection = self.att_user_filter.currentText()
+        self.att_user_filter.blockSignals(
+            True
+        )  # Tạm khóa signal để tránh trigger lại load_attendance_data
+        self.att_user_filter.clear()
+        self.att_user_filter.addItem("Tất cả")
+        self.att_user_filter.addItems(usernames)
+        index = self.att_user_filter.findText(current_selection)
+        if index != -1:
+            self.att_user_filter.setCurrentIndex(index)
+        self.att_user_filter.blockSignals(False)  # Mở lại signal
 
-            # EXCEPT phải thẳng hàng với TRY
-            except ValueError as ve:
-                print(
-                    f"Lỗi định dạng thời gian trong bản ghi {record.get('id','N/A')}: {ve}"
-                )
-            except Exception as e:
-                print(f"Lỗi xử lý bản ghi chấm công {record.get('id','N/A')}: {e}")
+        self.attendance_model.set_rows(rows)
 
     # --- Tab Báo cáo Lương ---
     def init_salary_tab(self):
@@ -841,50 +925,46 @@ class AdminPanel(QWidget):
         )
         self.salary_table.setAlternatingRowColors(True)
         layout.addWidget(self.salary_table)
+
+    def load_salary_filters(self):
+        """Tải danh sách nhân viên cho filter lương (chưa tính lương cho tới khi bấm nút)."""
+        self._load_async(
+            "salary_users",
+            self.salary_user_filter,
+            get_users,
+            on_done=self._on_salary_users_loaded,
+        )
+
+    def _on_salary_users_loaded(self, users):
+        self.users_cache = users
         self.update_salary_filters()
 
     def load_salary_report(self):
         start_date = self.salary_start_date_input.date().toPyDate()
         end_date = self.salary_end_date_input.date().toPyDate()
         selected_user = self.salary_user_filter.currentText()
-        self.salary_table.setRowCount(0)
-        users_to_calculate = []
-        if selected_user == "Tất cả":
-            users_to_calculate = [
-                u.get("username")
-                for u in get_users()
-                if u.get("role") != "admin" and u.get("username")
-            ]  # Lọc admin và None
-        elif selected_user:
-            users_to_calculate.append(selected_user)  # Chỉ tính nếu user được chọn
-
-        for username in users_to_calculate:
-            try:
-                salary_data = calculate_salary(username, start_date, end_date)
-                row = self.salary_table.rowCount()
-                self.salary_table.insertRow(row)
-                period_str = f"{start_date.strftime('%d/%m/%Y')} - {end_date.strftime('%d/%m/%Y')}"
-                total_hours_str = f"{salary_data.get('total_hours', 0.0):.2f}"
-                hourly_rate_str = f"{salary_data.get('hourly_rate', 0.0):,.0f}"
-                total_salary_str = f"{salary_data.get('total_salary', Decimal('0.0')):,.0f}"  # Lấy an toàn
-
-                self.salary_table.setItem(row, 0, QTableWidgetItem(username))
-                self.salary_table.setItem(row, 1, QTableWidgetItem(period_str))
-                self.salary_table.setItem(row, 2, QTableWidgetItem(total_hours_str))
-                self.salary_table.setItem(row, 3, QTableWidgetItem(hourly_rate_str))
-                self.salary_table.setItem(row, 4, QTableWidgetItem(total_salary_str))
-
-            except ValueError as e:
-                print(
-                    f"Lỗi khi tính lương cho {username}: {e}"
-                )  # Lỗi logic (vd: user k tồn tại)
-            except Exception as e:
-                print(f"Lỗi không xác định khi tính lương cho {username}: {e}")
-                QMessageBox.warning(
-                    self,
-                    "Lỗi",
-                    f"Gặp lỗi khi tính lương cho {username}. Chi tiết xem ở console.",
-                )
+        self._load_async(
+            "salary",
+            self.salary_table,
+            _build_salary_rows,
+            start_date,
+            end_date,
+            selected_user,
+            on_done=self._populate_salary,
+        )
+
+    def _populate_salary(self, result):
+        rows, failed_users = result
+        self.salary_table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for col, value in enumerate(values):
+                self.salary_table.setItem(row, col, QTableWidgetItem(value))
+        for username in failed_users:
+            QMessageBox.warning(
+                self,
+                "Lỗi",
+                f"Gặp lỗi khi tính lương cho {username}. Chi tiết xem ở console.",
+            )
 
     def update_salary_filters(self):
         if hasattr(self, "salary_user_filter"):
@@ -893,7 +973,9 @@ class AdminPanel(QWidget):
             self.salary_user_filter.clear()
             self.salary_user_filter.addItem("Tất cả")
             users = [
-                u for u in get_users() if u.get("role") != "admin" and u.get("username")
+                u
+                for u in self.users_cache
+                if u.get("role") != "admin" and u.get("username")
             ]
             usernames = sorted([u["username"] for u in users])
             self.salary_user_filter.addItems(usernames)
@@ -901,24 +983,3 @@ class AdminPanel(QWidget):
             if index != -1:
                 self.salary_user_filter.setCurrentIndex(index)
             self.salary_user_filter.blockSignals(False)
-
-    def apply_stylesheet(self):
-        self.setStyleSheet(
-            """
-            AdminPanel { background-color: #ffffff; } QTabWidget::pane { border: 1px solid #e0e0e0; border-top: none; }
-            QTabBar::tab { padding: 12px 25px; background-color: #f8f9fa; border: 1px solid #e0e0e0; border-bottom: none; border-top-left-radius: 8px; border-top-right-radius: 8px; font-size: 14px; font-weight: bold; color: #495057; }
-            QTabBar::tab:selected { background-color: #ffffff; color: #007bff; border-bottom: 1px solid #ffffff; } QTabBar::tab:!selected:hover { background-color: #e9ecef; }
-            QTableWidget { border: 1px solid #e9ecef; gridline-color: #f1f3f5; font-size: 14px; border-radius: 8px; } QTableWidget::item { padding: 12px; border-bottom: 1px solid #f1f3f5; }
-            QTableWidget::item:selected { background-color: #e7f3ff; color: #0056b3; } QTableWidget::alternate-background { background-color: #f8f9fa; }
-            QHeaderView::section { background-color: #f1f3f5; padding: 12px; border: none; border-bottom: 2px solid #e0e0e0; font-size: 14px; font-weight: bold; }
-            QPushButton { padding: 10px 15px; border-radius: 6px; font-size: 14px; font-weight: bold; border: none; margin-bottom: 10px; } QPushButton:hover { opacity: 0.9; }
-            QPushButton#addUserButton, QPushButton#addButton { background-color: #28a745; color: white; } QPushButton#addUserButton:hover, QPushButton#addButton:hover { background-color: #218838; }
-            QPushButton#editUserButton, QPushButton#editButton { background-color: #007bff; color: white; } QPushButton#editUserButton:hover, QPushButton#editButton:hover { background-color: #0056b3; }
-            QPushButton#deleteUserButton, QPushButton#deleteButton { background-color: #dc3545; color: white; } QPushButton#deleteUserButton:hover, QPushButton#deleteButton:hover { background-color: #c82333; }
-            #previewTitle { font-size: 16px; font-weight: bold; color: #343a40; padding-bottom: 10px; border-bottom: 1px solid #e9ecef; }
-            #imagePreview { background-color: #f8f9fa; border: 1px dashed #ced4da; border-radius: 8px; color: #6c757d; qproperty-alignment: 'AlignCenter'; qproperty-wordWrap: true; margin-top: 10px; }
-            QDateEdit, QComboBox { padding: 8px; border: 1px solid #ced4da; border-radius: 6px; } QPushButton#loadStatsButton, QPushButton#loadAttendanceButton, QPushButton#calculateSalaryButton { background-color: #007bff; color: white; margin-bottom: 0; }
-            QPushButton#loadStatsButton:hover, QPushButton#loadAttendanceButton:hover, QPushButton#calculateSalaryButton:hover { background-color: #0056b3; } #totalRevenueLabel { font-size: 20px; font-weight: bold; color: #28a745; padding: 10px; background-color: #f8f9fa; border-radius: 8px; }
-            QScrollArea { border: 1px solid #e9ecef; border-radius: 8px; }
-        """
-        )
@@ -0,0 +1,105 @@
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, Qt, pyqtSignal
+from PyQt6.QtWidgets import QApplication
+from PyQt6 import sip
+
+from utils.app_logging import get_logger
+from utils import profiler
+
+logger = get_logger("async_data")
+
+
+class _DataTask(QRunnable):
+    """Chạy một hàm data_manager trên luồng của QThreadPool."""
+
+    def __init__(self, service, func, args, kwargs, on_done, on_error, owner):
+        super().__init__()
+        self.service = service
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.on_done = on_done
+        self.on_error = on_error
+        self.owner = owner
+
+    def run(self):
+        try:
+            with profiler.span(f"data: {getattr(self.func, '__name__', self.func)}"):
+                result = self.func(*self.args, **self.kwargs)
+        except Exception as e:
+            logger.exception("Lỗi khi chạy %s ở nền", getattr(self.func, "__name__", self.func))
+            self.service._delivered.emit(self.on_error, self.owner, e)
+        else:
+            self.service._delivered.emit(self.on_done, self.owner, result)
+        finally:
+            self.service._finished.emit()
+
+
+class AsyncDataService(QObject):
+    """Lớp truy cập dữ liệu không chặn luồng UI.
+
+    load() chạy hàm đọc trên pool nhiều luồng; save() chạy hàm ghi trên pool
+    một luồng nên các lần ghi giữ đúng thứ tự gọi. Callback luôn được gọi trên
+    luồng UI (qua signal), và bị bỏ qua nếu widget `owner` đã bị xóa.
+    """
+
+    _delivered = pyqtSignal(object, object, object)  # callback, owner, kết quả
+    _finished = pyqtSignal()
+    busy_changed = pyqtSignal(bool)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.read_pool = QThreadPool(self)
+        self.read_pool.setMaxThreadCount(2)
+        self.write_pool = QThreadPool(self)
+        self.write_pool.setMaxThreadCount(1)
+        self.pending = 0
+        self._delivered.connect(self._deliver, Qt.ConnectionType.QueuedConnection)
+        self._finished.connect(self._task_finished, Qt.ConnectionType.QueuedConnection)
+
+    def load(self, func, *args, on_done=None, on_error=None, owner=None, **kwargs):
+        """Đọc dữ liệu ở nền: on_done(kết quả) hoặc on_error(exception) trên luồng UI."""
+        self._start(self.read_pool, func, args, kwargs, on_done, on_error, owner)
+
+    def save(self, func, *args, on_done=None, on_error=None, owner=None, **kwargs):
+        """Ghi dữ liệu ở nền, tuần tự theo thứ tự gọi."""
+        self._start(self.write_pool, func, args, kwargs, on_done, on_error, owner)
+
+    def wait_for_writes(self, msecs=5000):
+        """Chờ các lần ghi còn dở (gọi khi thoát ứng dụng)."""
+        return self.write_pool.waitForDone(msecs)
+
+    def _start(self, pool, func, args, kwargs, on_done, on_error, owner):
+        self.pending += 1
+        if self.pending == 1:
+            self.busy_changed.emit(True)
+        pool.start(_DataTask(self, func, args, kwargs, on_done, on_error, owner))
+
+    def _deliver(self, callback, owner, result):
+        if callback is None:
+            return
+        if owner is not None and sip.isdeleted(owner):
+            return  # Widget đã đóng trước khi dữ liệu về
+        callback(result)
+
+    def _task_finished(self):
+        self.pending -= 1
+        if self.pending == 0:
+            self.busy_changed.emit(False)
+
+
+_service = None
+
+
+def data_service():
+    """AsyncDataService dùng chung của ứng dụng (tạo lần đầu khi gọi)."""
+    global _service
+    if _service is None:
+        _service = AsyncDataService(QApplication.instance())
+        QApplication.instance().aboutToQuit.connect(_service.wait_for_writes)
+    return _service
+
+
+def set_loading(widget, loading, text="Đang tải..."):
+    """Trạng thái đang tải nhẹ: khóa widget và hiện tooltip, không chặn luồng UI."""
+    widget.setEnabled(not loading)
+    widget.setToolTip(text if loading else "")
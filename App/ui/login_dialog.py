@@ -70,8 +70,7 @@ class LoginDialog(QDialog):
 
         main_layout.addWidget(left_frame, 1) # 1/3 of the width
         main_layout.addWidget(right_frame, 2) # 2/3 of the width
-        
-        self.apply_stylesheet()
+
 
     def handle_login(self):
         users = get_users()
@@ -86,70 +85,3 @@ class LoginDialog(QDialog):
                 return
         
         QMessageBox.warning(self, "Đăng nhập thất bại", "Tên đăng nhập hoặc mật khẩu không đúng.")
-
-    def apply_stylesheet(self):
-        self.setStyleSheet("""
-            QDialog {
-                font-family: Inter;
-            }
-            /* --- Left Side --- */
-            #leftFrame {
-                background-color: #007bff;
-            }
-            #logoLabel {
-                font-size: 80px;
-                color: white;
-                text-align: center;
-                margin-bottom: 10px;
-            }
-            #brandTitle, #brandSubtitle {
-                color: white;
-                text-align: center;
-            }
-            #brandTitle {
-                font-size: 24px;
-                font-weight: bold;
-            }
-            #brandSubtitle {
-                font-size: 14px;
-                color: #e0e0e0;
-            }
-
-            /* --- Right Side --- */
-            #rightFrame {
-                background-color: #ffffff;
-            }
-            #loginTitle {
-                font-size: 28px;
-                font-weight: bold;
-                color: #333;
-                text-align: center;
-            }
-            QLabel {
-                font-size: 14px;
-                color: #555;
-            }
-            QLineEdit {
-                padding: 12px;
-                font-size: 15px;
-                border: 1px solid #ced4da;
-                border-radius: 8px;
-                background-color: #f8f9fa;
-            }
-            QLineEdit:focus {
-                border-color: #007bff;
-            }
-            QPushButton {
-                background-color: #007bff;
-                color: white;
-                font-size: 16px;
-                font-weight: bold;
-                padding: 12px;
-                border-radius: 8px;
-                border: none;
-            }
-            QPushButton:hover {
-                background-color: #0056b3;
-            }
-        """)
-
@@ -19,36 +19,31 @@ from PyQt6.QtWidgets import (
     QSizePolicy,
 )
 from PyQt6.QtCore import Qt, pyqtSignal, QDate, QTimer
-from PyQt6.QtGui import QFont, QIcon
+from PyQt6.QtGui import QFont, QIcon, QShortcut, QKeySequence
 import datetime
 import traceback
 import copy  # Import copy for deepcopy
 
-# --- Cấu hình Matplotlib backend ---
-import matplotlib
-
-try:
-    matplotlib.use("QtAgg")  # Tự động chọn Qt5/Qt6
-    print("Debug: Đã cấu hình Matplotlib backend thành công.")
-except ImportError:
-    print("LỖI: Không thể cấu hình Matplotlib backend. Biểu đồ có thể không hoạt động.")
-# ------------------------------------
-
 from utils.data_manager import (
     get_tables,
-    save_tables,
+    save_tables_merged,
     update_user,
     hash_password,
-    record_check_in,
-    record_check_out,
+    record_check_in_or_out,
     get_last_attendance,
 )
+from utils.app_logging import get_logger, toggle_debug
+from utils import profiler
+from ui.async_data import data_service
+from ui.theme import set_style_property
+from ui.pixmap_cache import prewarm_menu_images
 from ui.order_dialog import OrderDialog
-
-# Import AdminPanel SAU KHI cấu hình matplotlib
-from ui.admin_panel import AdminPanel
+from ui.receipt_printing import start_print_spool
+from ui.admin_panel import AdminPanel  # matplotlib chỉ được import khi mở tab thống kê
 from ui.login_dialog import LoginDialog
 
+logger = get_logger("main_window")
+
 
 # --- Dialog đổi mật khẩu ---
 class ChangePasswordDialog(QDialog):
@@ -64,13 +59,6 @@ class ChangePasswordDialog(QDialog):
         self.confirm_pass_input = QLineEdit()
         self.confirm_pass_input.setEchoMode(QLineEdit.EchoMode.Password)
 
-        self.setStyleSheet(
-            """
-            QLineEdit {padding: 8px; border: 1px solid #ced4da; border-radius: 6px; background-color: #f8f9fa;}
-            QLineEdit:focus {border-color: #007bff;}
-        """
-        )
-
         form.addRow("Mật khẩu mới:", self.new_pass_input)
         form.addRow("Xác nhận mật khẩu mới:", self.confirm_pass_input)
 
@@ -108,36 +96,30 @@ class MainWindow(QMainWindow):
         )
         self.setGeometry(100, 100, 1300, 750)
 
-        try:
-            # tables_data chỉ dùng để khởi tạo create_tables_widget lần đầu
-            # update_tables_display sẽ tải lại dữ liệu thật
-            self.tables_data = get_tables()
-            print("Debug: Tải dữ liệu bàn ban đầu thành công.")
-        except Exception as e:
-            print(f"LỖI nghiêm trọng khi tải dữ liệu bàn ban đầu: {e}")
-            QMessageBox.critical(
-                self,
-                "Lỗi Dữ liệu",
-                f"Không thể tải dữ liệu bàn: {e}. Vui lòng kiểm tra file tables.json.",
-            )
-            self.tables_data = []  # Khởi tạo rỗng
+        # Dữ liệu bàn được update_tables_display tải ở nền, không đọc file trên luồng UI
+        self.tables_data = []
+        self._tables_loading = False
+        self._tables_saving = 0
+        self._tables_write_seq = 0  # Tăng mỗi lần ghi; kết quả tải cũ hơn bị bỏ qua
 
         # --- Setup UI ---
         role = self.user_data.get("role")
         print(f"Debug: Role người dùng: {role}")
         if role == "admin":
             print("Debug: Gọi setup_admin_ui()...")
-            self.setup_admin_ui()
+            with profiler.span("setup_admin_ui"):
+                self.setup_admin_ui()
             print("Debug: setup_admin_ui() hoàn thành.")
         else:
             print("Debug: Gọi setup_staff_ui()...")
-            self.setup_staff_ui()
+            with profiler.span("setup_staff_ui"):
+                self.setup_staff_ui()
             print("Debug: setup_staff_ui() hoàn thành.")
 
-        print("Debug: Áp dụng stylesheet...")
-        self.apply_stylesheet()
         print("Debug: Cập nhật hiển thị bàn (lần đầu)...")
         self.update_tables_display()  # Cập nhật và tạo nút lần đầu
+        prewarm_menu_images()  # Giải mã sẵn ảnh món ở nền để mở OrderDialog không bị giật
+        start_print_spool(self)  # In nốt hóa đơn còn trong spool từ lần chạy trước
 
         # --- Timer cho đồng hồ chấm công ---
         self.clock_timer = QTimer(self)
@@ -151,6 +133,10 @@ class MainWindow(QMainWindow):
         print("Debug: Đã khởi động timer 5s để refresh bàn.")
 
         self.update_timekeeping_status()  # Cập nhật trạng thái chấm công
+
+        # Ctrl+Shift+D: bật/tắt log DEBUG lúc đang chạy
+        self.debug_shortcut = QShortcut(QKeySequence("Ctrl+Shift+D"), self)
+        self.debug_shortcut.activated.connect(toggle_debug)
         print("Debug: Kết thúc MainWindow.__init__")
 
     # --- Setup UI chung cho Sidebar và StackedWidget ---
@@ -341,9 +327,10 @@ class MainWindow(QMainWindow):
 
     def switch_to_admin(self):
         if hasattr(self, "admin_panel"):
-            self._switch_page(1, "admin_nav_button")
             if self.admin_panel and isinstance(self.admin_panel, AdminPanel):
-                self.admin_panel.refresh_data()
+                # Hóa đơn/chấm công có thể đổi từ phía nhân viên; chỉ tab đang xem tải lại khi hiện
+                self.admin_panel.mark_dirty("receipts", "attendance")
+            self._switch_page(1, "admin_nav_button")
 
     def switch_to_timekeeping(self):
         index = 2 if self.user_data.get("role") == "admin" else 1
@@ -388,37 +375,34 @@ class MainWindow(QMainWindow):
         if not username:
             QMessageBox.critical(self, "Lỗi", "Không thể xác định người dùng.")
             return
-        try:
-            last_record = get_last_attendance(username)
-            today_str = datetime.date.today().strftime("%Y-%m-%d")
-            is_checked_in_today = last_record and last_record.get(
-                "check_in_time", ""
-            ).startswith(today_str)
-            is_checked_out = is_checked_in_today and last_record.get("check_out_time")
-
-            if is_checked_in_today and not is_checked_out:
-                record_check_out(username)
-                QMessageBox.information(
-                    self,
-                    "Thành công",
-                    f"Check-out thành công lúc {datetime.datetime.now().strftime('%H:%M:%S')}",
-                )
-            else:
-                record_check_in(username)
-                QMessageBox.information(
-                    self,
-                    "Thành công",
-                    f"Check-in thành công lúc {datetime.datetime.now().strftime('%H:%M:%S')}",
-                )
+        self.check_in_out_button.setEnabled(False)
+        data_service().save(
+            record_check_in_or_out,
+            username,
+            on_done=self._on_check_in_out_done,
+            on_error=self._on_check_in_out_failed,
+            owner=self,
+        )
 
-        except ValueError as e:
-            QMessageBox.warning(self, "Lỗi Chấm công", str(e))
-        except Exception as e:
+    def _on_check_in_out_done(self, result):
+        action, _record = result
+        label = "Check-out" if action == "check_out" else "Check-in"
+        QMessageBox.information(
+            self,
+            "Thành công",
+            f"{label} thành công lúc {datetime.datetime.now().strftime('%H:%M:%S')}",
+        )
+        self.update_timekeeping_status()
+        if hasattr(self, "admin_panel") and isinstance(self.admin_panel, AdminPanel):
+            self.admin_panel.mark_dirty("attendance")
+
+    def _on_check_in_out_failed(self, error):
+        if isinstance(error, ValueError):
+            QMessageBox.warning(self, "Lỗi Chấm công", str(error))
+        else:
             QMessageBox.critical(
-                self, "Lỗi Hệ thống", f"Lỗi không xác định khi chấm công: {e}"
+                self, "Lỗi Hệ thống", f"Lỗi không xác định khi chấm công: {error}"
             )
-            traceback.print_exc()
-
         self.update_timekeeping_status()
 
     def update_timekeeping_status(self):
@@ -427,12 +411,22 @@ class MainWindow(QMainWindow):
         username = self.user_data.get("username")
         if not username:
             return
+        data_service().load(
+            get_last_attendance,
+            username,
+            on_done=self._apply_timekeeping_status,
+            on_error=lambda e: self._apply_timekeeping_status(None, load_error=e),
+            owner=self,
+        )
 
+    def _apply_timekeeping_status(self, last_record, load_error=None):
+        username = self.user_data.get("username")
         status_text = "Chưa check-in hôm nay"
         button_text = "Bắt đầu Check In"
         button_role = "checkin"
         try:
-            last_record = get_last_attendance(username)
+            if load_error is not None:
+                raise load_error
             today_str = datetime.date.today().strftime("%Y-%m-%d")
             if last_record and last_record.get("check_in_time", "").startswith(
                 today_str
@@ -454,18 +448,18 @@ class MainWindow(QMainWindow):
         except (ValueError, TypeError):
             status_text = "Lỗi dữ liệu chấm công"
             button_role = "disabled"
-            print(f"Lỗi: Không thể phân tích thời gian từ bản ghi cuối của {username}")
+            logger.warning(
+                "Không thể phân tích thời gian từ bản ghi cuối của %s", username
+            )
         except Exception as e:
-            print(f"Lỗi khi lấy trạng thái chấm công: {e}")
+            logger.exception("Lỗi khi lấy trạng thái chấm công")
             status_text = "Lỗi khi tải trạng thái"
             button_role = "disabled"
 
         self.status_label.setText(f"Trạng thái: {status_text}")
         self.check_in_out_button.setText(button_text)
-        self.check_in_out_button.setProperty("role", button_role)
+        set_style_property(self.check_in_out_button, "role", button_role)
         self.check_in_out_button.setEnabled(button_role != "disabled")
-        self.check_in_out_button.style().unpolish(self.check_in_out_button)
-        self.check_in_out_button.style().polish(self.check_in_out_button)
 
     def update_timekeeping_clock(self):
         if hasattr(self, "clock_label"):
@@ -569,14 +563,30 @@ class MainWindow(QMainWindow):
             new_data["gmail"] = self.acc_gmail_input.text()
             new_data["address"] = self.acc_address_input.text()
             new_data["dob"] = self.acc_dob_input.date().toString("yyyy-MM-dd")
-            update_user(username, new_data)
-            self.user_data = new_data
-            QMessageBox.information(
-                self, "Thành công", "Cập nhật thông tin cá nhân thành công."
-            )
         except Exception as e:
             QMessageBox.critical(self, "Lỗi", f"Không thể cập nhật thông tin: {e}")
             traceback.print_exc()
+            return
+        self.save_info_button.setEnabled(False)
+        data_service().save(
+            update_user,
+            username,
+            new_data,
+            on_done=lambda _: self._on_save_info_done(new_data),
+            on_error=self._on_save_info_failed,
+            owner=self,
+        )
+
+    def _on_save_info_done(self, new_data):
+        self.user_data = new_data
+        self.save_info_button.setEnabled(True)
+        QMessageBox.information(
+            self, "Thành công", "Cập nhật thông tin cá nhân thành công."
+        )
+
+    def _on_save_info_failed(self, error):
+        self.save_info_button.setEnabled(True)
+        QMessageBox.critical(self, "Lỗi", f"Không thể cập nhật thông tin: {error}")
 
     def handle_change_password(self):
         dialog = ChangePasswordDialog(self)
@@ -589,16 +599,26 @@ class MainWindow(QMainWindow):
                         raise ValueError("Không thể xác định username để đổi mật khẩu.")
                     new_data = self.user_data.copy()
                     new_data["password"] = hash_password(new_password)
-                    update_user(username, new_data)
-                    self.user_data["password"] = new_data["password"]
-                    QMessageBox.information(
-                        self, "Thành công", "Đổi mật khẩu thành công."
-                    )
                 except Exception as e:
                     QMessageBox.critical(
                         self, "Lỗi", f"Không thể cập nhật mật khẩu: {e}"
                     )
                     traceback.print_exc()
+                    return
+                data_service().save(
+                    update_user,
+                    username,
+                    new_data,
+                    on_done=lambda _: self._on_password_saved(new_data["password"]),
+                    on_error=lambda e: QMessageBox.critical(
+                        self, "Lỗi", f"Không thể cập nhật mật khẩu: {e}"
+                    ),
+                    owner=self,
+                )
+
+    def _on_password_saved(self, password_hash):
+        self.user_data["password"] = password_hash
+        QMessageBox.information(self, "Thành công", "Đổi mật khẩu thành công.")
 
     # --- CẬP NHẬT: Trang Sơ đồ bàn ---
     def create_tables_widget(self):
@@ -614,6 +634,10 @@ class MainWindow(QMainWindow):
         title_label.setObjectName("viewTitle")
         main_layout.addWidget(title_label)
 
+        self.tables_loading_label = QLabel("Đang tải sơ đồ bàn...")
+        self.tables_loading_label.setObjectName("loadingLabel")
+        main_layout.addWidget(self.tables_loading_label)
+
         # Lưới bàn
         self.tables_grid = QGridLayout()
         self.tables_grid.setSpacing(20)
@@ -621,45 +645,54 @@ class MainWindow(QMainWindow):
 
         # Khởi tạo dict trống, nó sẽ được điền trong update_tables_display
         self.table_buttons = {}
+        self.table_button_states = {}  # id -> trạng thái đã vẽ lần trước
+        self.table_grid_order = []  # Thứ tự ID đang đặt trên lưới
 
         print("Debug:   Kết thúc create_tables_widget (chỉ tạo khung)")
         return widget
 
     def update_tables_display(self):
-        """Đọc file JSON, xóa và TẠO LẠI TOÀN BỘ nút bấm."""
-        print("Debug: Bắt đầu update_tables_display (LÀM MỚI TOÀN BỘ)...")
-        try:
-            self.tables_data = get_tables()  # Lấy dữ liệu mới nhất
-        except Exception as e:
-            print(f"Lỗi nghiêm trọng khi tải lại dữ liệu bàn: {e}")
-            QMessageBox.critical(
-                self, "Lỗi Dữ Liệu", f"Không thể tải lại dữ liệu bàn: {e}."
-            )
-            return
-
-        if not hasattr(self, "tables_grid"):
-            print("Lỗi: tables_grid chưa được tạo.")
-            return
-
-        # --- XÓA SẠCH NÚT CŨ ---
-        # 1. Xóa khỏi dict và deleteLater
-        for button in self.table_buttons.values():
-            button.deleteLater()
-        self.table_buttons.clear()
+        """Tải tables.json ở nền, khi có kết quả thì vẽ lại bằng render_tables()."""
+        if self._tables_loading:
+            return  # Lần tải trước chưa xong (đĩa chậm): bỏ qua nhịp timer này
+        self._tables_loading = True
+        write_seq = self._tables_write_seq
+        span = profiler.begin("update_tables_display")
+        data_service().load(
+            get_tables,
+            on_done=lambda data: self._on_tables_loaded(data, write_seq, span),
+            on_error=lambda error: self._on_tables_load_failed(error, span),
+            owner=self,
+        )
 
-        # 2. Xóa widget khỏi layout
-        while self.tables_grid.count():
-            item = self.tables_grid.takeAt(0)
-            if item:
-                widget = item.widget()
-                if widget:
-                    widget.deleteLater()
-        # ------------------------
+    def _on_tables_loaded(self, tables_data, write_seq, span=None):
+        self._tables_loading = False
+        if self._tables_saving or write_seq != self._tables_write_seq:
+            profiler.end(span, skipped=True)
+            return  # Có lần ghi mới hơn dữ liệu vừa đọc: chờ nhịp sau
+        self.tables_data = tables_data
+        with profiler.span("render_tables"):
+            self.render_tables()
+        profiler.end(span)
+
+    def _on_tables_load_failed(self, error, span=None):
+        self._tables_loading = False
+        profiler.end(span, error=str(error))
+        QMessageBox.critical(
+            self, "Lỗi Dữ Liệu", f"Không thể tải lại dữ liệu bàn: {error}."
+        )
 
-        print("Debug: Đã xóa nút cũ. Bắt đầu tạo nút mới...")
+    def render_tables(self):
+        """Vẽ self.tables_data lên lưới.
 
-        row, col = 0, 0
-        MAX_COLS = 5
+        Mỗi bàn giữ một nút cố định theo ID; nút chỉ được đặt lại chữ/style khi
+        (trạng thái, nhân viên, số món) khác lần vẽ trước, và chỉ thêm/xóa
+        widget khi bàn xuất hiện hoặc biến mất.
+        """
+        logger.debug("Bắt đầu render_tables...")
+        if not hasattr(self, "tables_grid"):
+            logger.error("tables_grid chưa được tạo.")
+            return
 
         # Sắp xếp lại: Bàn 1-12 trước, sau đó mới đến các mục 'takeaway'
         table_items = sorted(
@@ -673,15 +706,13 @@ class MainWindow(QMainWindow):
 
         all_items_to_display = table_items + takeaway_items
 
+        displayed_ids = []
+        changed_count = 0
         for table_item_data in all_items_to_display:
             item_id = table_item_data.get("id")
             if item_id is None:
                 continue
 
-            button_text = ""
-            object_name = ""
-            minimum_size = (130, 130)
-
             status = table_item_data.get("status", "Lỗi")
             employee = table_item_data.get("employee", None)
             order = table_item_data.get("order", {})
@@ -689,62 +720,85 @@ class MainWindow(QMainWindow):
 
             if str(item_id).startswith("takeaway"):
                 object_name = "takeawayButtonGrid"
-                button_text = f"🥡 {table_item_data.get('name', 'Mang về')} ({item_id})"
-                if order_count > 0:
-                    button_text += f"\n{status}: {order_count} món\nNV: {employee if employee else 'Trống'}"
-                else:
-                    # Nếu không có đơn, reset về Sẵn sàng
-                    button_text += f"\nSẵn sàng\nNV: Trống"
+                if order_count == 0:
                     table_item_data["status"] = "Sẵn sàng"  # Tự sửa lỗi status
-
             elif isinstance(item_id, int):
                 object_name = "tableButton"
-                button_text = (
-                    f"Bàn {item_id}\n{status}\nNV: {employee if employee else 'Trống'}"
-                )
             else:
                 continue  # Bỏ qua ID lạ
 
-            button = QPushButton(button_text)
-            button.setObjectName(object_name)
-            button.setMinimumSize(minimum_size[0], minimum_size[1])
-            button.setSizePolicy(
-                QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding
-            )
-            # Dùng lambda với t_id=item_id để cố định giá trị
-            button.clicked.connect(
-                lambda ch, t_id=item_id: self.open_order_dialog(t_id)
-            )
+            displayed_ids.append(item_id)
+            state = (status, employee, order_count, table_item_data.get("name"))
+            button = self.table_buttons.get(item_id)
+            if button is None:
+                button = self._create_table_button(item_id, object_name)
+                self.table_buttons[item_id] = button
+            elif self.table_button_states.get(item_id) == state:
+                continue  # Không đổi gì: không đụng tới nút
+
+            self._render_table_button(button, item_id, object_name, state)
+            self.table_button_states[item_id] = state
+            changed_count += 1
+
+        # Bàn không còn trong dữ liệu: gỡ nút
+        displayed_set = set(displayed_ids)
+        for item_id in [i for i in self.table_buttons if i not in displayed_set]:
+            button = self.table_buttons.pop(item_id)
+            self.table_button_states.pop(item_id, None)
+            self.tables_grid.removeWidget(button)
+            button.deleteLater()
 
-            # Set style properties
-            if object_name == "takeawayButtonGrid":
-                if status == "Sẵn sàng" or order_count == 0:
-                    button.setProperty("hasOrder", False)
-                else:  # "Chờ xử lý"
-                    button.setProperty("hasOrder", True)
-            elif object_name == "tableButton":
-                if status == "Trống":
-                    button.setProperty("status", "empty")
-                else:
-                    button.setProperty("status", "occupied")
+        # Chỉ xếp lại lưới khi danh sách/thứ tự bàn đổi
+        if displayed_ids != self.table_grid_order:
+            self._layout_table_buttons(displayed_ids)
+        self.tables_loading_label.hide()
 
-            button.style().unpolish(button)
-            button.style().polish(button)
+        logger.debug(
+            "Kết thúc render_tables. %d/%d nút được cập nhật.",
+            changed_count,
+            len(self.table_buttons),
+        )
 
-            self.table_buttons[item_id] = button  # Thêm nút mới vào dict
-            self.tables_grid.addWidget(button, row, col)
+    def _create_table_button(self, item_id, object_name):
+        button = QPushButton()
+        button.setObjectName(object_name)
+        button.setMinimumSize(130, 130)
+        button.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        # Dùng lambda với t_id=item_id để cố định giá trị
+        button.clicked.connect(lambda ch, t_id=item_id: self.open_order_dialog(t_id))
+        return button
+
+    def _render_table_button(self, button, item_id, object_name, state):
+        """Đặt chữ và thuộc tính style cho nút; chỉ polish lại khi thuộc tính style đổi."""
+        status, employee, order_count, name = state
+        if object_name == "takeawayButtonGrid":
+            button_text = f"🥡 {name or 'Mang về'} ({item_id})"
+            if order_count > 0:
+                button_text += f"\n{status}: {order_count} món\nNV: {employee if employee else 'Trống'}"
+            else:
+                button_text += f"\nSẵn sàng\nNV: Trống"
+            style_property = ("hasOrder", not (status == "Sẵn sàng" or order_count == 0))
+        else:
+            button_text = (
+                f"Bàn {item_id}\n{status}\nNV: {employee if employee else 'Trống'}"
+            )
+            style_property = ("status", "empty" if status == "Trống" else "occupied")
 
-            col += 1
-            if col >= MAX_COLS:
-                col = 0
-                row += 1
+        button.setText(button_text)
+        set_style_property(button, *style_property)  # Chỉ polish lại khi thuộc tính đổi
 
-        print(
-            f"Debug: Kết thúc update_tables_display. Đã tạo {len(self.table_buttons)} nút."
-        )
+    def _layout_table_buttons(self, ordered_ids):
+        MAX_COLS = 5
+        for item_id in ordered_ids:
+            self.tables_grid.removeWidget(self.table_buttons[item_id])
+        for index, item_id in enumerate(ordered_ids):
+            self.tables_grid.addWidget(
+                self.table_buttons[item_id], index // MAX_COLS, index % MAX_COLS
+            )
+        self.table_grid_order = list(ordered_ids)
 
     def open_order_dialog(self, table_id):
-        print(f"Debug: Mở OrderDialog cho ID: {table_id}")
+        logger.debug("Mở OrderDialog cho ID: %s", table_id)
         table_data_ref = next(
             (t for t in self.tables_data if t.get("id") == table_id), None
         )
@@ -756,11 +810,14 @@ class MainWindow(QMainWindow):
 
         table_data_copy = copy.deepcopy(table_data_ref)
         dialog = OrderDialog(
-            table_data_copy, self.user_data.get("username", "N/A"), self
+            table_data_copy,
+            self.user_data.get("username", "N/A"),
+            self,
+            open_span=profiler.begin("OrderDialog open-to-visible", table=table_id),
         )
 
         if dialog.exec():  # Chỉ cập nhật nếu bấm OK/Thanh toán
-            print(f"Debug: OrderDialog cho {table_id} đã đóng với Accepted.")
+            logger.debug("OrderDialog cho %s đã đóng với Accepted.", table_id)
             updated = False
             for i, t in enumerate(self.tables_data):
                 if t.get("id") == table_id:
@@ -768,85 +825,44 @@ class MainWindow(QMainWindow):
                     updated = True
                     break
             if updated:
-                try:
-                    save_tables(self.tables_data)  # Lưu lại toàn bộ list
-                    print("Debug: Đã lưu tables.json.")
-                    self.update_tables_display()  # Cập nhật lại UI ngay
-                    if hasattr(self, "admin_panel") and isinstance(
-                        self.admin_panel, AdminPanel
-                    ):
-                        self.admin_panel.refresh_data()
-                        print("Debug: Đã refresh AdminPanel.")
-                except Exception as e:
-                    QMessageBox.critical(
-                        self, "Lỗi Lưu", f"Không thể lưu trạng thái bàn: {e}"
-                    )
+                self.render_tables()  # Cập nhật UI ngay từ dữ liệu trong bộ nhớ
+                self.save_tables_async()
             else:
-                print(
-                    f"Cảnh báo: Không tìm thấy item ID {table_id} để cập nhật sau dialog."
+                logger.warning(
+                    "Không tìm thấy item ID %s để cập nhật sau dialog.", table_id
                 )
         else:
-            print(f"Debug: OrderDialog cho {table_id} đã bị hủy (Rejected).")
-
-    # --- Stylesheet ---
-    def apply_stylesheet(self):
-        self.setStyleSheet(
-            """
-            QMainWindow, QWidget { background-color: #ffffff; font-family: Inter; }
-            #viewTitle { font-size: 24px; font-weight: bold; color: #343a40; padding-bottom: 10px; }
-            
-            QPushButton#tableButton, QPushButton#takeawayButtonGrid {
-                font-size: 15px; font-weight: bold; border-radius: 12px;
-                padding: 10px; line-height: 1.5; min-height: 130px;
-                white-space: pre-wrap; /* Đảm bảo xuống dòng */
-            }
-            QPushButton#tableButton:hover, QPushButton#takeawayButtonGrid:hover {
-                border: 3px solid rgba(0, 0, 0, 0.2);
-            }
-            QPushButton#tableButton[status="empty"] {
-                background-color: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #34d399, stop:1 #10b981);
-                color: white; border: 1px solid #059669;
-            }
-            QPushButton#tableButton[status="empty"]:hover { background-color: #10b981; }
-            QPushButton#tableButton[status="occupied"] {
-                background-color: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #fb923c, stop:1 #f97316);
-                color: white; border: 1px solid #ea580c;
-            }
-            QPushButton#tableButton[status="occupied"]:hover { background-color: #f97316; }
-            
-            QPushButton#takeawayButtonGrid {
-                background-color: #0d6efd; color: white; border: 1px solid #0a58ca;
-            }
-            QPushButton#takeawayButtonGrid[hasOrder="true"] {
-                background-color: #ffc107; color: #333; border: 1px solid #e0a800;
-            }
-            QPushButton#takeawayButtonGrid:hover { background-color: #0b5ed7; }
-            QPushButton#takeawayButtonGrid[hasOrder="true"]:hover { background-color: #e0a800; }
-
-            #navPanel { background-color: #f8f9fa; border-right: 1px solid #dee2e6; }
-            #navTitle { font-size: 22px; font-weight: bold; color: #343a40; padding-bottom: 20px; }
-            QPushButton#navButton { background: transparent; border: none; padding: 15px 20px; font-size: 15px; font-weight: bold; color: #495057; text-align: left; border-radius: 8px; }
-            QPushButton#navButton:hover { background: #f1f3f5; }
-            QPushButton#navButton:checked { background: #e9ecef; color: #007bff; }
-            QPushButton#navButton[role="logout"] { color: #dc3545; }
-            QPushButton#navButton[role="logout"]:hover { background: #f8d7da; }
-            
-            #accountFormWrapper { border: 1px solid #e0e0e0; border-radius: 8px; padding: 20px; }
-            QFormLayout QLineEdit, QFormLayout QDateEdit { background-color: #ffffff; border: 1px solid #ced4da; padding: 8px; border-radius: 6px; }
-            QFormLayout QLineEdit:focus, QFormLayout QDateEdit:focus { border-color: #007bff; }
-            QFormLayout QLineEdit[role="readonly"] { background-color: #f8f9fa; }
-            #saveInfoButton { background-color: #28a745; color: white; border: none; padding: 10px; margin-top: 15px; border-radius: 6px; font-weight: bold; width: 150px; }
-            #saveInfoButton:hover { background-color: #218838; }
-            #changePasswordButton { background-color: #007bff; color: white; border: none; padding: 10px; margin-top: 15px; border-radius: 6px; font-weight: bold; width: 150px; }
-            #changePasswordButton:hover { background-color: #0056b3; }
-            
-            #clockLabel { font-size: 48px; font-weight: bold; color: #343a40; margin: 20px 0; }
-            #statusLabel { font-size: 18px; color: #6c757d; margin-bottom: 30px; }
-            #checkInOutButton { font-size: 18px; font-weight: bold; color: white; border: none; border-radius: 10px; padding: 15px 40px; }
-            #checkInOutButton[role="checkin"] { background-color: #28a745; }
-            #checkInOutButton[role="checkin"]:hover { background-color: #218838; }
-            #checkInOutButton[role="checkout"] { background-color: #dc3545; }
-            #checkInOutButton[role="checkout"]:hover { background-color: #c82333; }
-            #checkInOutButton[role="disabled"] { background-color: #6c757d; color: #e0e0e0; }
-        """
+            logger.debug("OrderDialog cho %s đã bị hủy (Rejected).", table_id)
+
+    def save_tables_async(self):
+        """Ghi self.tables_data ở nền (bản sao, để UI sửa tiếp không ảnh hưởng)."""
+        self._tables_write_seq += 1
+        self._tables_saving += 1
+        write_seq = self._tables_write_seq
+        data_service().save(
+            save_tables_merged,
+            copy.deepcopy(self.tables_data),
+            on_done=lambda merged: self._on_tables_saved(merged, write_seq),
+            on_error=self._on_tables_save_failed,
+            owner=self,
         )
+
+    def _on_tables_saved(self, merged, write_seq):
+        self._tables_saving -= 1
+        logger.debug("Đã lưu tables.json.")
+        if (
+            not self._tables_saving
+            and write_seq == self._tables_write_seq
+            and merged != self.tables_data
+        ):
+            # Khi ghi đã gộp thêm đơn online mới: hiện ngay thay vì chờ lần tải sau
+            self.tables_data = merged
+            self.render_tables()
+        if hasattr(self, "admin_panel") and isinstance(self.admin_panel, AdminPanel):
+            # Đóng/thanh toán đơn chỉ đổi hóa đơn; các tab khác không cần tính lại
+            self.admin_panel.mark_dirty("receipts")
+            logger.debug("Đã đánh dấu AdminPanel cần tải lại hóa đơn.")
+
+    def _on_tables_save_failed(self, error):
+        self._tables_saving -= 1
+        QMessageBox.critical(self, "Lỗi Lưu", f"Không thể lưu trạng thái bàn: {error}")
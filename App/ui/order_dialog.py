@@ -12,28 +12,35 @@ from PyQt6.QtWidgets import (
     QWidget,
     QGridLayout,
     QScrollArea,
+    QLineEdit,
 )
-from PyQt6.QtCore import Qt, QSize
-from PyQt6.QtGui import QPixmap, QIcon
+from PyQt6.QtCore import Qt, QSize, QTimer
+from PyQt6.QtGui import QKeySequence, QShortcut
+from collections import deque
 import os
+import re
 import datetime
 import uuid
-import platform
-import subprocess
 
-from utils.data_manager import get_menu, PROJECT_ROOT, save_receipt, RECEIPTS_PRINT_DIR
+from utils.data_manager import get_menu, save_receipt, MAX_ITEM_QUANTITY
+from utils.app_logging import get_logger
+from utils.menu_search import MenuSearchIndex
+from utils import profiler
+from ui.async_data import data_service
+from ui.pixmap_cache import pixmap_cache, menu_image_path, MENU_THUMB_SIZE
+from ui.theme import set_style_property
+from ui.receipt_printing import print_receipt
 
-try:
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.pagesizes import mm
-    from reportlab.pdfbase import pdfmetrics
-    from reportlab.pdfbase.ttfonts import TTFont
+logger = get_logger("order_dialog")
 
-    REPORTLAB_INSTALLED = True
-except ImportError:
-    REPORTLAB_INSTALLED = False
-    print("CẢNH BÁO: Thư viện 'reportlab' chưa được cài. In PDF sẽ không hoạt động.")
+# Chỉ mục tìm món dùng chung giữa các lần mở OrderDialog, cập nhật dần theo menu
+MENU_SEARCH_INDEX = MenuSearchIndex()
 
+# Gõ nhanh theo mã PLU: "12" thêm 1 món mã 12, "12*3" (hoặc 12x3) thêm 3 món
+QUICK_ENTRY_RE = re.compile(r"^\s*(\d+)\s*(?:[*xX]\s*(\d+))?\s*$")
+# Các món vừa gọi gần nhất (id món), dùng chung cho mọi OrderDialog trong phiên làm việc
+RECENT_ITEMS_LIMIT = int(os.environ.get("CAFE_RECENT_ITEMS", "8"))
+RECENT_ITEM_IDS = deque(maxlen=RECENT_ITEMS_LIMIT)
 
 # --- Widget hiển thị món ăn ---
 class GridMenuItemWidget(QPushButton):
@@ -47,57 +54,27 @@ class GridMenuItemWidget(QPushButton):
         layout.setContentsMargins(10, 10, 10, 10)
         layout.setSpacing(5)
 
-        image_label = QLabel()
-        image_label.setFixedSize(80, 80)
-        image_label.setObjectName("gridItemImage")
-        image_path = item_data.get("image", "")
-        # PROJECT_ROOT trỏ vào thư mục App
-        full_image_path = os.path.join(PROJECT_ROOT, image_path) if image_path else ""
+        self.image_label = QLabel()
+        self.image_label.setFixedSize(MENU_THUMB_SIZE)
+        self.image_label.setObjectName("gridItemImage")
+        full_image_path = menu_image_path(item_data)
 
-        # --- THÊM DEBUG ---
-        print(
-            f"Debug GridItem ({item_data.get('name', '?')}): Trying path: '{full_image_path}'"
-        )
-        image_exists = False
-        if full_image_path:  # Chỉ kiểm tra nếu đường dẫn không rỗng
-            image_exists = os.path.exists(full_image_path)
-        print(
-            f"Debug GridItem ({item_data.get('name', '?')}): Path exists? {image_exists}"
-        )
-        # --- HẾT DEBUG ---
-
-        if full_image_path and image_exists:  # Dùng biến đã kiểm tra
-            try:  # Thêm try-except để bắt lỗi tải ảnh
-                pixmap = QPixmap(full_image_path)
-                if pixmap.isNull():  # Kiểm tra xem ảnh có tải được không
-                    print(
-                        f"LỖI GridItem ({item_data.get('name', '?')}): QPixmap bị null cho file: {full_image_path}"
-                    )
-                    image_label.setText("Ảnh lỗi")
-                else:
-                    print(
-                        f"Debug GridItem ({item_data.get('name', '?')}): Tải ảnh thành công."
-                    )
-                    image_label.setPixmap(
-                        pixmap.scaled(
-                            80,
-                            80,
-                            Qt.AspectRatioMode.KeepAspectRatio,
-                            Qt.TransformationMode.SmoothTransformation,
-                        )
-                    )
-            except Exception as e:
-                print(
-                    f"LỖI GridItem ({item_data.get('name', '?')}): Exception khi tải QPixmap: {e}"
-                )
-                image_label.setText("Ảnh lỗi")
+        item_name = item_data.get("name", "?")
+        if full_image_path and os.path.exists(full_image_path):
+            # Ảnh lấy từ cache dùng chung; lần đầu giải mã ở nền rồi mới hiện
+            self.image_label.setText("…")
+            pixmap_cache().load(
+                full_image_path, MENU_THUMB_SIZE, self._set_image, owner=self
+            )
         else:
-            # Chỉ in nếu đường dẫn không rỗng nhưng file không tồn tại
+            # Chỉ báo nếu đường dẫn không rỗng nhưng file không tồn tại
             if full_image_path:
-                print(
-                    f"CẢNH BÁO GridItem ({item_data.get('name', '?')}): File ảnh không tồn tại: {full_image_path}"
+                logger.warning(
+                    "GridItem (%s): File ảnh không tồn tại: %s",
+                    item_name,
+                    full_image_path,
                 )
-            image_label.setText("🍽️")  # Placeholder
+            self.image_label.setText("🍽️")  # Placeholder
 
         name_label = QLabel(item_data.get("name", "N/A"))
         name_label.setObjectName("gridItemName")
@@ -105,19 +82,40 @@ class GridMenuItemWidget(QPushButton):
         price_label = QLabel(f"{item_data.get('price', 0):,.0f} VND")
         price_label.setObjectName("gridItemPrice")
 
-        layout.addWidget(image_label, 0, Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(self.image_label, 0, Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(name_label, 1, Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(price_label, 0, Qt.AlignmentFlag.AlignCenter)
 
+    def _set_image(self, pixmap):
+        if pixmap is None:
+            logger.warning(
+                "GridItem (%s): Không tải được ảnh.", self.item_data.get("name", "?")
+            )
+            self.image_label.setText("Ảnh lỗi")
+        else:
+            self.image_label.setPixmap(pixmap)
+
 
 # --- Dialog gọi món ---
 class OrderDialog(QDialog):
     # ... (Các hàm __init__, init_ui, filter_menu_by_category, etc. giữ nguyên như phiên bản cuối) ...
-    def __init__(self, table_data, current_user, parent=None):
+    def __init__(self, table_data, current_user, parent=None, open_span=None):
         super().__init__(parent)
+        self._open_span = open_span  # profiler: từ lúc mở tới lần vẽ đầu tiên
+        self._checkout_span = None
         self.table_data = table_data
         self.current_user = current_user
-        self.menu = get_menu()
+        self.menu = []  # Tải ở nền, xem _on_menu_loaded
+        self.menu_by_category = {}
+        self.menu_by_plu = {}  # mã PLU -> món, tra O(1) khi gõ nhanh
+        self.menu_by_id = {}
+        self.search_results = []
+        # Mỗi món chỉ tạo widget một lần; đổi danh mục chỉ ẩn/hiện lại từ pool này
+        self.menu_item_widgets = {}
+        self.visible_menu_widgets = []
+        self.order_rows = {}  # tên món -> (QListWidgetItem, widget của dòng)
+        self.order_total = 0
+        self._saving = False
         table_id = self.table_data.get("id")
         if table_id == "takeaway":
             self.setWindowTitle("Hóa đơn Mang về / Đặt Online")
@@ -129,7 +127,12 @@ class OrderDialog(QDialog):
         self.main_layout.setContentsMargins(10, 10, 10, 10)
         self.init_ui()
         self.update_order_summary()  # Tải order cũ (nếu có)
-        self.apply_stylesheet()
+        data_service().load(
+            get_menu,
+            on_done=self._on_menu_loaded,
+            on_error=self._on_menu_load_failed,
+            owner=self,
+        )
 
     def init_ui(self):
         category_panel = QFrame()
@@ -140,10 +143,6 @@ class OrderDialog(QDialog):
         category_title.setObjectName("panelTitle")
         self.category_list = QListWidget()
         self.category_list.setObjectName("categoryList")
-        categories = sorted(
-            list(set(item.get("category", "Khác") for item in self.menu))
-        )
-        self.category_list.addItems(categories)
         self.category_list.itemClicked.connect(self.filter_menu_by_category)
         category_layout.addWidget(category_title)
         category_layout.addWidget(self.category_list)
@@ -151,15 +150,60 @@ class OrderDialog(QDialog):
         menu_layout = QVBoxLayout(menu_panel)
         menu_title = QLabel("Chọn món")
         menu_title.setObjectName("panelTitle")
+        self.quick_entry_input = QLineEdit()
+        self.quick_entry_input.setObjectName("quickEntryInput")
+        self.quick_entry_input.setPlaceholderText("⌨️ Mã món: 12 hoặc 12*3 (F2)")
+        self.quick_entry_input.setFixedWidth(260)
+        self.quick_entry_input.returnPressed.connect(self.handle_quick_entry)
+        self.quick_entry_input.textChanged.connect(lambda _: self._set_quick_entry_status(""))
+        QShortcut(QKeySequence("F2"), self, activated=self._focus_quick_entry)
+        self.search_input = QLineEdit()
+        self.search_input.setObjectName("menuSearchInput")
+        self.search_input.setPlaceholderText("🔍 Tìm món (không cần dấu), Enter để thêm món đầu tiên")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.textChanged.connect(self.search_menu)
+        self.search_input.returnPressed.connect(self.add_first_search_result)
         self.menu_items_grid_widget = QWidget()
         self.menu_items_grid = QGridLayout(self.menu_items_grid_widget)
         self.menu_items_grid.setAlignment(Qt.AlignmentFlag.AlignTop)
         self.menu_items_grid.setSpacing(15)
+        self.menu_loading_label = QLabel("Đang tải thực đơn...")
+        self.menu_loading_label.setObjectName("loadingLabel")
+        self.menu_items_grid.addWidget(self.menu_loading_label, 0, 0)
         scroll_area = QScrollArea()
         scroll_area.setWidgetResizable(True)
         scroll_area.setWidget(self.menu_items_grid_widget)
         scroll_area.setObjectName("menuScrollArea")
+        self.quick_entry_status = QLabel("")
+        self.quick_entry_status.setObjectName("quickEntryStatus")
+        input_layout = QHBoxLayout()
+        input_layout.addWidget(self.quick_entry_input)
+        input_layout.addWidget(self.search_input, 1)
+        # Thanh món gọi gần đây: nút tạo sẵn, chỉ đổi chữ/ẩn hiện; Alt+1..Alt+N để thêm
+        recent_layout = QHBoxLayout()
+        recent_label = QLabel("Gần đây:")
+        recent_label.setObjectName("recentItemsLabel")
+        recent_layout.addWidget(recent_label)
+        self.recent_buttons = []
+        for index in range(RECENT_ITEMS_LIMIT):
+            button = QPushButton()
+            button.setObjectName("recentItemButton")
+            button.setAutoDefault(False)
+            button.clicked.connect(lambda ch, i=index: self.add_recent_item(i))
+            if index < 9:
+                QShortcut(
+                    QKeySequence(f"Alt+{index + 1}"),
+                    self,
+                    activated=lambda i=index: self.add_recent_item(i),
+                )
+            button.hide()
+            recent_layout.addWidget(button)
+            self.recent_buttons.append(button)
+        recent_layout.addStretch()
         menu_layout.addWidget(menu_title)
+        menu_layout.addLayout(input_layout)
+        menu_layout.addWidget(self.quick_entry_status)
+        menu_layout.addLayout(recent_layout)
         menu_layout.addWidget(scroll_area)
         order_panel = QFrame()
         order_panel.setObjectName("orderPanel")
@@ -191,66 +235,221 @@ class OrderDialog(QDialog):
         self.main_layout.addWidget(category_panel)
         self.main_layout.addWidget(menu_panel, 1)
         self.main_layout.addWidget(order_panel)
+        self.quick_entry_input.setFocus()
+
+    def _on_menu_loaded(self, menu):
+        self.menu = [item for item in menu if isinstance(item, dict)]
+        MENU_SEARCH_INDEX.update(self.menu)  # Chỉ tách từ lại cho món mới/đổi tên
+        for item in self.menu:
+            self.menu_by_category.setdefault(item.get("category", "Khác"), []).append(item)
+            if isinstance(item.get("plu"), int):
+                self.menu_by_plu[item["plu"]] = item
+            if item.get("id"):
+                self.menu_by_id[item["id"]] = item
+        self.update_recent_bar()
+        categories = sorted(self.menu_by_category)
+        self.category_list.addItems(categories)
         if self.category_list.count() > 0:
+            self.menu_items_grid.removeWidget(self.menu_loading_label)
+            self.menu_loading_label.hide()
             self.category_list.setCurrentRow(0)
             self.filter_menu_by_category(self.category_list.item(0))
+        else:
+            self.menu_loading_label.setText("Thực đơn đang trống.")
+
+    def _on_menu_load_failed(self, error):
+        self.menu_loading_label.setText(f"Không thể tải thực đơn: {error}")
 
     def filter_menu_by_category(self, category_item):
-        item = self.menu_items_grid.takeAt(0)
-        while item is not None:
-            widget = item.widget()
-            if widget is not None:
-                widget.deleteLater()
-            item = self.menu_items_grid.takeAt(0)
-        selected_category = category_item.text()
-        filtered_menu = [
-            item
-            for item in self.menu
-            if item.get("category", "Khác") == selected_category
-        ]
-        row, col = 0, 0
-        for item in filtered_menu:
-            if isinstance(item, dict):
-                item_widget = GridMenuItemWidget(item)
-                item_widget.clicked.connect(
-                    lambda ch, d=item: self.add_item_to_order(d)
-                )
-                self.menu_items_grid.addWidget(item_widget, row, col)
-                col += 1
-            if col >= 3:
-                col = 0
-                row += 1
+        if self.search_input.text():
+            # Chọn danh mục thì bỏ tìm kiếm (không để search_menu vẽ lưới thêm lần nữa)
+            self.search_input.blockSignals(True)
+            self.search_input.clear()
+            self.search_input.blockSignals(False)
+            self.search_results = []
+        self.show_menu_items(self.menu_by_category.get(category_item.text(), []))
+
+    def search_menu(self, text):
+        if text.strip():
+            self.search_results = MENU_SEARCH_INDEX.search(text)
+            self.show_menu_items(self.search_results)
+        else:
+            self.search_results = []
+            current_item = self.category_list.currentItem()
+            if current_item is not None:
+                self.show_menu_items(self.menu_by_category.get(current_item.text(), []))
+
+    def add_first_search_result(self):
+        if self.search_results:
+            self.add_item_to_order(self.search_results[0])
+            self.search_input.selectAll()  # Gõ tiếp là tìm món mới
+
+    def handle_quick_entry(self):
+        text = self.quick_entry_input.text()
+        if not text.strip():
+            return
+        match = QUICK_ENTRY_RE.match(text)
+        if not match:
+            self._set_quick_entry_status("Cú pháp: mã món hoặc mã*số lượng, ví dụ 12*3", error=True)
+            self.quick_entry_input.selectAll()
+            return
+        code = int(match.group(1))
+        quantity = int(match.group(2) or 1)
+        item = self.menu_by_plu.get(code)
+        if item is None:
+            self._set_quick_entry_status(f"Không có món mã {code}", error=True)
+            self.quick_entry_input.selectAll()
+            return
+        if not 1 <= quantity <= MAX_ITEM_QUANTITY:
+            self._set_quick_entry_status(
+                f"Số lượng phải từ 1 đến {MAX_ITEM_QUANTITY}", error=True
+            )
+            self.quick_entry_input.selectAll()
+            return
+        added = self.add_item_to_order(item, quantity)
+        self.quick_entry_input.clear()  # Sẵn sàng cho mã tiếp theo
+        if added < quantity:
+            self._set_quick_entry_status(
+                f"Đã thêm {added} × {item.get('name')} (tối đa {MAX_ITEM_QUANTITY} mỗi món)",
+                error=True,
+            )
+        else:
+            self._set_quick_entry_status(f"Đã thêm {added} × {item.get('name')}")
+
+    def _set_quick_entry_status(self, text, error=False):
+        self.quick_entry_status.setText(text)
+        set_style_property(self.quick_entry_status, "error", error)
+
+    def _focus_quick_entry(self):
+        self.quick_entry_input.setFocus()
+        self.quick_entry_input.selectAll()
+
+    def keyPressEvent(self, event):
+        # QLineEdit để Enter lan lên dialog sau khi phát returnPressed; chặn ở đây
+        # để Enter trong ô gõ nhanh/ô tìm không bấm nhầm nút mặc định của dialog
+        if event.key() in (Qt.Key.Key_Return, Qt.Key.Key_Enter) and self.focusWidget() in (
+            self.quick_entry_input,
+            self.search_input,
+        ):
+            event.accept()
+            return
+        super().keyPressEvent(event)
+
+    def add_recent_item(self, index):
+        item_ids = [i for i in RECENT_ITEM_IDS if i in self.menu_by_id]
+        if index < len(item_ids):
+            self.add_item_to_order(self.menu_by_id[item_ids[index]])
 
-    def add_item_to_order(self, item_data):
+    def update_recent_bar(self):
+        item_ids = [i for i in RECENT_ITEM_IDS if i in self.menu_by_id]  # Bỏ món đã bị xóa khỏi menu
+        for index, button in enumerate(self.recent_buttons):
+            if index < len(item_ids):
+                item = self.menu_by_id[item_ids[index]]
+                code = item.get("plu")
+                button.setText(f"{code} · {item.get('name')}" if code else item.get("name"))
+                button.setToolTip(f"Alt+{index + 1}" if index < 9 else "")
+                button.show()
+            else:
+                button.hide()
+
+    def _remember_recent(self, item_id):
+        if RECENT_ITEM_IDS and RECENT_ITEM_IDS[0] == item_id:
+            return
+        if item_id in RECENT_ITEM_IDS:
+            RECENT_ITEM_IDS.remove(item_id)
+        RECENT_ITEM_IDS.appendleft(item_id)
+        self.update_recent_bar()
+
+    def _menu_item_widget(self, item):
+        """Lấy widget của món từ pool, tạo ở lần hiển thị đầu tiên."""
+        key = item.get("id") or item.get("name")
+        item_widget = self.menu_item_widgets.get(key)
+        if item_widget is None:
+            item_widget = GridMenuItemWidget(item, self.menu_items_grid_widget)
+            item_widget.clicked.connect(lambda ch, d=item: self.add_item_to_order(d))
+            self.menu_item_widgets[key] = item_widget
+        return item_widget
+
+    def show_menu_items(self, items):
+        """Xếp lại lưới món: chỉ gỡ/ẩn widget đang hiện và đặt widget từ pool vào."""
+        self.menu_items_grid_widget.setUpdatesEnabled(False)
+        for item_widget in self.visible_menu_widgets:
+            self.menu_items_grid.removeWidget(item_widget)
+            item_widget.hide()
+        self.visible_menu_widgets = []
+        for index, item in enumerate(items):
+            item_widget = self._menu_item_widget(item)
+            self.menu_items_grid.addWidget(item_widget, index // 3, index % 3)
+            item_widget.show()
+            self.visible_menu_widgets.append(item_widget)
+        self.menu_items_grid_widget.setUpdatesEnabled(True)
+
+    def add_item_to_order(self, item_data, quantity=1):
+        """Thêm quantity phần của món vào đơn; trả về số phần thực sự thêm được."""
         item_name = item_data.get("name")
         item_id = item_data.get("id")
         price = item_data.get("price", 0)
         if not item_name or not item_id:
-            return
+            return 0
         if not isinstance(self.table_data.get("order"), dict):
             self.table_data["order"] = {}
         order = self.table_data["order"]
         if item_name in order:
-            order[item_name]["quantity"] += 1
+            quantity = min(quantity, MAX_ITEM_QUANTITY - order[item_name]["quantity"])
+            if quantity <= 0:
+                return 0
+            order[item_name]["quantity"] += quantity
+            price = order[item_name].get("price", 0)  # Giữ giá đã ghi trong đơn
+            self._update_order_row(item_name)
         else:
-            order[item_name] = {"id": item_id, "price": price, "quantity": 1}
-        self.update_order_summary()
+            quantity = min(quantity, MAX_ITEM_QUANTITY)
+            order[item_name] = {"id": item_id, "price": price, "quantity": quantity}
+            self._add_order_row(item_name, order[item_name])
+        self._set_order_total(self.order_total + price * quantity)
+        self._remember_recent(item_id)
+        return quantity
 
     def update_order_summary(self):
+        """Dựng lại toàn bộ danh sách món (chỉ dùng khi mở dialog)."""
         self.order_list.clear()
+        self.order_rows = {}
         total_price = 0
         current_order = self.table_data.get("order", {})
         if not isinstance(current_order, dict):
             current_order = {}
         for item_name, details in current_order.items():
-            item_widget = self.create_order_item_widget(item_name, details)
-            list_item = QListWidgetItem(self.order_list)
-            list_item.setSizeHint(item_widget.sizeHint())
-            self.order_list.addItem(list_item)
-            self.order_list.setItemWidget(list_item, item_widget)
+            self._add_order_row(item_name, details)
             total_price += details.get("price", 0) * details.get("quantity", 0)
+        self._set_order_total(total_price)
+
+    # Mỗi dòng món có một widget riêng (self.order_rows, khóa theo tên món như
+    # trong order); thêm/sửa/xóa chỉ đụng tới đúng dòng đó và cộng dồn tổng tiền
+    def _add_order_row(self, name, details):
+        item_widget = self.create_order_item_widget(name, details)
+        list_item = QListWidgetItem(self.order_list)
+        list_item.setSizeHint(item_widget.sizeHint())
+        self.order_list.addItem(list_item)
+        self.order_list.setItemWidget(list_item, item_widget)
+        self.order_rows[name] = (list_item, item_widget)
+
+    def _update_order_row(self, name):
+        details = self.table_data["order"][name]
+        _, item_widget = self.order_rows[name]
+        item_widget.quantity_spinbox.blockSignals(True)
+        item_widget.quantity_spinbox.setValue(details.get("quantity", 0))
+        item_widget.quantity_spinbox.blockSignals(False)
+        item_widget.price_label.setText(
+            f"{details.get('price', 0) * details.get('quantity', 0):,.0f}"
+        )
+
+    def _remove_order_row(self, name):
+        list_item, _ = self.order_rows.pop(name)
+        self.order_list.takeItem(self.order_list.row(list_item))
+
+    def _set_order_total(self, total_price):
+        self.order_total = total_price
         self.total_label.setText(f"Tổng cộng: {total_price:,.0f} VND")
-        self.checkout_button.setEnabled(bool(current_order))
+        self.checkout_button.setEnabled(bool(self.table_data.get("order")))
 
     def create_order_item_widget(self, name, details):
         widget = QWidget()
@@ -272,7 +471,7 @@ class OrderDialog(QDialog):
         controls_layout.setAlignment(Qt.AlignmentFlag.AlignRight)
         quantity_spinbox = QSpinBox()
         quantity_spinbox.setObjectName("quantitySpinBox")
-        quantity_spinbox.setRange(0, 99)
+        quantity_spinbox.setRange(0, MAX_ITEM_QUANTITY)
         quantity_spinbox.setValue(details.get("quantity", 1))
         quantity_spinbox.setFixedWidth(50)
         quantity_spinbox.valueChanged.connect(
@@ -295,22 +494,31 @@ class OrderDialog(QDialog):
         controls_layout.addWidget(remove_button)
         layout.addWidget(info_widget, 1)
         layout.addWidget(controls_widget)
+        widget.quantity_spinbox = quantity_spinbox
+        widget.price_label = price_label
         return widget
 
     def change_item_quantity(self, item_name, quantity):
         order = self.table_data.get("order", {})
         if item_name in order:
+            details = order[item_name]
+            delta = (quantity - details.get("quantity", 0)) * details.get("price", 0)
             if quantity > 0:
-                order[item_name]["quantity"] = quantity
+                details["quantity"] = quantity
+                self._update_order_row(item_name)
             else:
                 del order[item_name]  # Xóa nếu số lượng là 0
-            self.update_order_summary()
+                self._remove_order_row(item_name)
+            self._set_order_total(self.order_total + delta)
 
     def remove_item_from_order(self, item_name):
         order = self.table_data.get("order", {})
         if item_name in order:
-            del order[item_name]
-            self.update_order_summary()
+            details = order.pop(item_name)
+            self._remove_order_row(item_name)
+            self._set_order_total(
+                self.order_total - details.get("price", 0) * details.get("quantity", 0)
+            )
 
     def handle_confirm(self):
         current_order = self.table_data.get("order", {})
@@ -338,150 +546,58 @@ class OrderDialog(QDialog):
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
         )
         if reply == QMessageBox.StandardButton.Yes:
-            try:
-                receipt = {
-                    "id": str(uuid.uuid4()),
-                    "table_id": self.table_data.get("id", "N/A"),
-                    "employee": self.current_user,
-                    "timestamp": datetime.datetime.now().isoformat(),
-                    "items": current_order.copy(),
-                    "total": total_price,
-                }
-                save_receipt(receipt)
-                self.print_receipt_pdf(receipt)
-            except Exception as e:
-                print(f"Lỗi khi lưu/in hóa đơn: {e}")
-                QMessageBox.critical(self, "Lỗi", f"Không thể lưu hoặc in hóa đơn: {e}")
-                return
-            self.table_data["order"] = {}
-            self.table_data["employee"] = None
-            if self.table_data.get("id") != "takeaway":
-                self.table_data["status"] = "Trống"
-            QMessageBox.information(
-                self,
-                "Thành công",
-                f"Đã thanh toán thành công.\nHóa đơn PDF đã được tạo.",
-            )
-            self.accept()
-
-    def print_receipt_pdf(self, receipt_data):
-        if not REPORTLAB_INSTALLED:
-            QMessageBox.critical(
-                self,
-                "Lỗi",
-                "Thư viện 'reportlab' chưa được cài đặt.\nKhông thể in PDF. Vui lòng cài đặt: pip install reportlab",
+            receipt = {
+                "id": str(uuid.uuid4()),
+                "table_id": self.table_data.get("id", "N/A"),
+                "employee": self.current_user,
+                "timestamp": datetime.datetime.now().isoformat(),
+                "items": current_order.copy(),
+                "total": total_price,
+            }
+            # Khóa nút trong lúc ghi hóa đơn ở nền để không thanh toán hai lần
+            self._set_buttons_enabled(False)
+            self.checkout_button.setText("Đang lưu...")
+            self._checkout_span = profiler.begin(
+                "checkout-to-PDF", items=len(receipt["items"])
             )
-            return
-        font_name = "VNF_Arial"
-        font_path = os.path.join(PROJECT_ROOT, "fonts", "Arial.ttf")
-        try:
-            pdfmetrics.registerFont(TTFont(font_name, font_path))
-        except Exception as e:
-            print(f"Lỗi đăng ký font: {e}")
-            print(
-                f"HƯỚNG DẪN: Đảm bảo file 'Arial.ttf' có trong thư mục '{os.path.join(PROJECT_ROOT, 'fonts')}'"
-            )
-            QMessageBox.warning(
-                self,
-                "Lỗi Font",
-                "Không tìm thấy file font 'Arial.ttf' trong thư mục 'fonts'.\nFile PDF sẽ dùng font mặc định và có thể lỗi tiếng Việt.",
-            )
-            font_name = "Helvetica"
-        now_dt = datetime.datetime.now()  # Lấy giờ hiện tại để dùng nếu timestamp lỗi
-        try:
-            now = datetime.datetime.fromisoformat(receipt_data["timestamp"])
-        except (ValueError, TypeError):
-            now = now_dt  # Dùng giờ hiện tại nếu lỗi
-        filename = (
-            f"HD_{now.strftime('%Y%m%d_%H%M%S')}_{receipt_data.get('id','N-A')[:4]}.pdf"
-        )
-        filepath = os.path.join(RECEIPTS_PRINT_DIR, filename)
-        receipt_width = 80 * mm
-        receipt_height = 200 * mm
-        c = canvas.Canvas(filepath, pagesize=(receipt_width, receipt_height))
-        y = receipt_height - (10 * mm)
-        margin_left = 7 * mm
-        margin_right = receipt_width - margin_left
-        line_height_normal = 5 * mm
-        line_height_small = 4 * mm
-        c.setFont(font_name, 14)
-        c.drawCentredString(receipt_width / 2, y, "TÊN QUÁN CAFE")
-        y -= line_height_normal * 1.5
-        c.setFont(font_name, 9)
-        c.drawCentredString(receipt_width / 2, y, "Địa chỉ quán của bạn...")
-        y -= line_height_normal
-        c.drawCentredString(receipt_width / 2, y, "============================")
-        y -= line_height_normal
-        c.setFont(font_name, 10)
-        table_id = receipt_data.get("table_id")
-        table_id_display = f"Bàn {table_id}" if isinstance(table_id, int) else "Mang về"
-        c.drawCentredString(receipt_width / 2, y, f"HOÁ ĐƠN ({table_id_display})")
-        y -= line_height_normal
-        c.setFont(font_name, 9)
-        c.drawString(margin_left, y, f"Mã HĐ: {receipt_data.get('id','N/A')[:8]}...")
-        y -= line_height_small
-        c.drawString(margin_left, y, f"Ngày: {now.strftime('%Y-%m-%d %H:%M:%S')}")
-        y -= line_height_small
-        c.drawString(margin_left, y, f"Thu ngân: {receipt_data.get('employee','N/A')}")
-        y -= line_height_normal
-        c.drawCentredString(
-            receipt_width / 2, y, "--------------------------------------------------"
-        )
-        y -= line_height_normal
-        c.setFont(font_name, 9)
-        c.drawString(margin_left, y, "Tên món")
-        c.drawRightString(margin_right, y, "Th.Tiền")
-        c.drawRightString(margin_right - (15 * mm), y, "Đ.Giá")
-        c.drawRightString(margin_right - (30 * mm), y, "SL")
-        y -= line_height_small
-        items = receipt_data.get("items", {})
-        for item_name, details in items.items():
-            y -= line_height_normal
-            qty = details.get("quantity", 0)
-            price = details.get("price", 0)
-            subtotal = qty * price
-            name = (
-                (str(item_name)[:12] + "..")
-                if len(str(item_name)) > 14
-                else str(item_name)
-            )
-            c.setFont(font_name, 9)
-            c.drawString(margin_left, y, name)
-            c.drawRightString(margin_right, y, f"{subtotal:,.0f}")
-            c.drawRightString(margin_right - (15 * mm), y, f"{price:,.0f}")
-            c.drawRightString(margin_right - (30 * mm), y, str(qty))
-        y -= line_height_normal
-        c.drawCentredString(
-            receipt_width / 2, y, "--------------------------------------------------"
-        )
-        y -= line_height_normal
-        c.setFont(font_name, 12)
-        c.drawRightString(
-            margin_right, y, f"TỔNG CỘNG: {receipt_data.get('total', 0):,.0f} VND"
-        )
-        y -= line_height_normal * 2
-        c.setFont(font_name, 10)
-        c.drawCentredString(receipt_width / 2, y, "Cảm ơn quý khách!")
-        y -= line_height_small
-        c.drawCentredString(receipt_width / 2, y, "Hẹn gặp lại!")
-        c.showPage()
-        c.save()
-        try:
-            if platform.system() == "Windows":
-                os.startfile(filepath)
-            elif platform.system() == "Darwin":
-                subprocess.run(["open", filepath])
-            else:
-                subprocess.run(["xdg-open", filepath])
-        except Exception as e:
-            print(f"Không thể mở file PDF: {e}")
-            QMessageBox.warning(
-                self,
-                "Lỗi in",
-                f"Không thể tự động mở file PDF.\nFile đã được lưu tại: {filepath}",
+            data_service().save(
+                save_receipt,
+                receipt,
+                on_done=lambda _: self._on_receipt_saved(receipt),
+                on_error=self._on_receipt_save_failed,
+                owner=self,
             )
 
-    def apply_stylesheet(self):
-        self.setStyleSheet(
-            """QDialog { background-color: #f0f2f5; font-family: Inter; } QFrame#categoryPanel, QFrame#orderPanel { background-color: #ffffff; border-radius: 8px; } #panelTitle { font-size: 18px; font-weight: bold; padding: 10px; color: #343a40; border-bottom: 1px solid #e9ecef; } QListWidget, #menuScrollArea { border: none; } #categoryList::item { padding: 12px 15px; border-bottom: 1px solid #f0f2f5; font-size: 15px;} #categoryList::item:selected { background-color: #e7f3ff; color: #007bff; font-weight: bold; border-left: 3px solid #007bff; } QPushButton#gridMenuItem { background-color: #ffffff; border: 1px solid #dee2e6; border-radius: 8px; text-align: center; } QPushButton#gridMenuItem:hover { background-color: #f8f9fa; } #gridItemImage { background-color: #f8f9fa; border-radius: 8px; font-size: 40px; color: #adb5bd; qproperty-alignment: 'AlignCenter'; } #gridItemName { font-size: 14px; font-weight: bold; color: #212529; } #gridItemPrice { font-size: 13px; color: #495057; } #orderList::item { border-bottom: 1px solid #f0f2f5; } #orderItemName { font-size: 15px; font-weight: 500; color: #212529; } #orderItemUnitPrice { font-size: 12px; color: #6c757d; } #orderItemPriceTotal { font-size: 14px; color: #212529; font-weight: 500; } #totalLabel { font-size: 20px; font-weight: bold; color: #28a745; padding: 10px; } #removeButton { background-color: transparent; border: none; font-size: 16px; } QSpinBox#quantitySpinBox { border: 1px solid #ced4da; border-radius: 4px; padding: 10px; margin-left: -5px; } QPushButton { padding: 10px 15px; border-radius: 5px; font-weight: bold; border: 1px solid #ced4da; } QPushButton#confirmButton { background-color: #007bff; color: white; border: none; } QPushButton#checkoutButton { background-color: #28a745; color: white; border: none; } QPushButton#cancelButton { background-color: #6c757d; color: white; border: none; } QPushButton:hover { background-color: #e9ecef; } QPushButton#confirmButton:hover { background-color: #0056b3; } QPushButton#checkoutButton:hover { background-color: #218838; } QPushButton#cancelButton:hover { background-color: #5a6268; } """
-        )
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self._open_span is not None:
+            # singleShot(0): kết thúc span sau khi lần vẽ đầu tiên đã được xử lý
+            span, self._open_span = self._open_span, None
+            QTimer.singleShot(0, lambda: profiler.end(span))
+
+    def _set_buttons_enabled(self, enabled):
+        self._saving = not enabled
+        for button in (self.confirm_button, self.checkout_button, self.cancel_button):
+            button.setEnabled(enabled)
+
+    def reject(self):
+        if self._saving:
+            return  # Đang ghi hóa đơn: không cho đóng dialog giữa chừng
+        super().reject()
+
+    def _on_receipt_save_failed(self, error):
+        profiler.end(self._checkout_span, error=str(error))
+        self._set_buttons_enabled(True)
+        self.checkout_button.setText("Thanh toán")
+        QMessageBox.critical(self, "Lỗi", f"Không thể lưu hoặc in hóa đơn: {error}")
+
+    def _on_receipt_saved(self, receipt):
+        # Hóa đơn đã lưu: trả bàn và đóng dialog ngay, PDF được dựng ở nền
+        # và báo kết quả trên thanh trạng thái của cửa sổ chính
+        print_receipt(receipt, self.parent(), self._checkout_span)
+        self._checkout_span = None
+        self.table_data["order"] = {}
+        self.table_data["employee"] = None
+        if self.table_data.get("id") != "takeaway":
+            self.table_data["status"] = "Trống"
+        self.accept()
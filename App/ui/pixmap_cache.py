@@ -0,0 +1,186 @@
+import os
+from collections import OrderedDict
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QSize, Qt, pyqtSignal
+from PyQt6.QtGui import QImageReader, QPixmap
+from PyQt6.QtWidgets import QApplication
+from PyQt6 import sip
+
+from utils.data_manager import get_menu, PROJECT_ROOT
+from utils.app_logging import get_logger
+from ui.async_data import data_service
+
+logger = get_logger("pixmap_cache")
+
+# Kích thước ảnh món trong lưới gọi món (GridMenuItemWidget)
+MENU_THUMB_SIZE = QSize(80, 80)
+# Giới hạn bộ nhớ cho ảnh đã giải mã, cấu hình qua CAFE_PIXMAP_CACHE_MB
+PIXMAP_CACHE_MAX_BYTES = int(os.environ.get("CAFE_PIXMAP_CACHE_MB", "32")) * 1024 * 1024
+
+_PREWARM_PRIORITY = -1  # Nạp sẵn nhường chỗ cho ảnh đang cần hiển thị
+
+
+def _decode_scaled(path, size):
+    """Giải mã ảnh thẳng ở kích thước đích (chạy ở luồng nền, trả QImage hoặc None)."""
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    source_size = reader.size()
+    if source_size.isValid():
+        target = source_size.scaled(size, Qt.AspectRatioMode.KeepAspectRatio)
+        if target.width() < source_size.width():
+            reader.setScaledSize(target)  # JPEG giải mã ở độ phân giải thấp, không cần scale lại
+    image = reader.read()
+    if image.isNull():
+        logger.warning("Không đọc được ảnh %s: %s", path, reader.errorString())
+        return None
+    if image.width() > size.width() or image.height() > size.height():
+        # Định dạng không hỗ trợ setScaledSize: thu nhỏ một lần ở đây
+        image = image.scaled(
+            size,
+            Qt.AspectRatioMode.KeepAspectRatio,
+            Qt.TransformationMode.SmoothTransformation,
+        )
+    return image
+
+
+class _DecodeTask(QRunnable):
+    def __init__(self, cache, key, path, size):
+        super().__init__()
+        self.cache = cache
+        self.key = key
+        self.path = path
+        self.size = size
+
+    def run(self):
+        try:
+            image = _decode_scaled(self.path, self.size)
+        except Exception:
+            logger.exception("Lỗi khi giải mã ảnh %s", self.path)
+            image = None
+        self.cache._decoded.emit(self.key, image)
+
+
+class PixmapCache(QObject):
+    """Cache ảnh thu nhỏ dùng chung toàn ứng dụng, giới hạn theo dung lượng (LRU).
+
+    Khóa gồm (đường dẫn, mtime, kích thước đích) nên thay ảnh là tự nạp lại.
+    Ảnh được giải mã ở luồng nền (QImage), chuyển thành QPixmap trên luồng UI.
+    """
+
+    _decoded = pyqtSignal(object, object)  # khóa, QImage hoặc None
+
+    def __init__(self, max_bytes=PIXMAP_CACHE_MAX_BYTES, parent=None):
+        super().__init__(parent)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # khóa -> QPixmap, cũ nhất ở đầu
+        self._total_bytes = 0
+        self._waiters = {}  # khóa -> [(callback, owner)] đang chờ giải mã
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(2)
+        self._decoded.connect(self._on_decoded, Qt.ConnectionType.QueuedConnection)
+
+    @staticmethod
+    def _key(path, size):
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        return (os.path.abspath(path), mtime, size.width(), size.height())
+
+    def load(self, path, size, callback, owner=None):
+        """Gọi callback(QPixmap hoặc None) với ảnh ở kích thước size.
+
+        Có trong cache thì gọi ngay và trả True; chưa có thì giải mã ở nền và gọi
+        sau trên luồng UI (bỏ qua nếu widget `owner` đã bị xóa).
+        """
+        key = self._key(path, size)
+        if key is None:
+            callback(None)
+            return True
+        pixmap = self._entries.get(key)
+        if pixmap is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            callback(pixmap)
+            return True
+        self.misses += 1
+        self._request(key, path, size, 0).append((callback, owner))
+        return False
+
+    def prewarm(self, paths, size):
+        """Nạp sẵn ảnh ở nền với độ ưu tiên thấp."""
+        for path in paths:
+            key = self._key(path, size)
+            if key is not None and key not in self._entries:
+                self._request(key, path, size, _PREWARM_PRIORITY)
+
+    def _request(self, key, path, size, priority):
+        waiters = self._waiters.get(key)
+        if waiters is None:
+            waiters = self._waiters[key] = []
+            self.pool.start(_DecodeTask(self, key, path, QSize(size)), priority)
+        return waiters
+
+    def _on_decoded(self, key, image):
+        pixmap = None
+        if image is not None:
+            pixmap = QPixmap.fromImage(image)
+            self._store(key, pixmap)
+        for callback, owner in self._waiters.pop(key, []):
+            if owner is not None and sip.isdeleted(owner):
+                continue  # Widget đã đóng trước khi ảnh giải mã xong
+            callback(pixmap)
+
+    def _store(self, key, pixmap):
+        size = pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._total_bytes -= old.width() * old.height() * max(old.depth(), 8) // 8
+        self._entries[key] = pixmap
+        self._total_bytes += size
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._total_bytes -= evicted.width() * evicted.height() * max(evicted.depth(), 8) // 8
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+_cache = None
+
+
+def pixmap_cache():
+    """PixmapCache dùng chung của ứng dụng (tạo lần đầu khi gọi)."""
+    global _cache
+    if _cache is None:
+        _cache = PixmapCache(parent=QApplication.instance())
+    return _cache
+
+
+def menu_image_path(item_data):
+    """Đường dẫn tuyệt đối tới ảnh của món, hoặc "" nếu món không có ảnh."""
+    image_path = item_data.get("image", "")
+    # PROJECT_ROOT trỏ vào thư mục App
+    return os.path.join(PROJECT_ROOT, image_path) if image_path else ""
+
+
+def prewarm_menu_images():
+    """Đọc menu ở nền rồi nạp sẵn ảnh món cho lưới gọi món (gọi sau khi đăng nhập)."""
+
+    def on_menu(menu):
+        paths = [menu_image_path(item) for item in menu if isinstance(item, dict)]
+        pixmap_cache().prewarm([p for p in paths if p], MENU_THUMB_SIZE)
+
+    data_service().load(
+        get_menu,
+        on_done=on_menu,
+        on_error=lambda e: logger.warning("Không nạp sẵn được ảnh menu: %s", e),
+    )
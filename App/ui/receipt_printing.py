@@ -0,0 +1,144 @@
+import os
+
+from PyQt6.QtCore import QObject, Qt, pyqtSignal
+from PyQt6.QtWidgets import QApplication, QMessageBox
+from PyQt6 import sip
+
+from utils.app_logging import get_logger
+from utils.receipt_pdf import render_receipt_pdf, open_receipt_file
+from utils.escpos import RECEIPT_PRINTER, print_receipt_escpos
+from utils.print_spool import PrintSpool
+from utils import profiler
+
+logger = get_logger("receipt_printing")
+
+STATUS_MESSAGE_MS = 8000
+_font_warning_shown = False  # Chỉ báo thiếu font một lần mỗi phiên
+
+
+def _render_and_open(receipt):
+    """Chạy trên luồng in: in ra máy in nhiệt nếu đã cấu hình, không thì dựng PDF rồi mở.
+
+    Trả về (nơi đã in, cảnh báo font, lỗi mở file PDF).
+    """
+    if RECEIPT_PRINTER:
+        with profiler.span("print_receipt_escpos", items=len(receipt.get("items", {}))):
+            print_receipt_escpos(receipt)
+        return RECEIPT_PRINTER, None, None
+    with profiler.span("render_receipt_pdf", items=len(receipt.get("items", {}))):
+        filepath, font_warning = render_receipt_pdf(receipt)
+    try:
+        open_receipt_file(filepath)
+        open_error = None
+    except Exception as e:
+        logger.warning("Không thể mở file PDF %s: %s", filepath, e)
+        open_error = str(e)
+    return filepath, font_warning, open_error
+
+
+class ReceiptPrinter(QObject):
+    """Cầu nối giữa spool in (luồng nền) và giao diện: báo kết quả trên thanh trạng thái."""
+
+    _event = pyqtSignal(str, object, object)  # sự kiện, lệnh in, dữ liệu
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.window = None  # Cửa sổ nhận thông báo mặc định (MainWindow)
+        self._jobs = {}  # job_id -> (cửa sổ, span checkout-to-print)
+        self._event.connect(self._on_event, Qt.ConnectionType.QueuedConnection)
+        self.spool = PrintSpool(_render_and_open, listener=self._event.emit)
+
+    def print_receipt(self, receipt, window=None, checkout_span=None, reprint=False):
+        code = receipt.get("id", "N/A")[:8]
+        try:
+            job_id = self.spool.submit(receipt, reprint=reprint)
+        except OSError as e:
+            logger.exception("Không ghi được lệnh in vào spool")
+            profiler.end(checkout_span, error=str(e))
+            self._notify(window, f"In hóa đơn {code} thất bại")
+            QMessageBox.critical(
+                window,
+                "Lỗi",
+                f"Hóa đơn {code} đã được lưu nhưng không thể đưa vào hàng đợi in: {e}",
+            )
+            return
+        self._jobs[job_id] = (window, checkout_span)
+        self._notify(window, f"Đang in hóa đơn {code}...")
+
+    def _notify(self, window, text):
+        window = window or self.window
+        if window is not None and not sip.isdeleted(window) and hasattr(window, "statusBar"):
+            window.statusBar().showMessage(text, STATUS_MESSAGE_MS)
+        else:
+            logger.info(text)
+
+    def _on_event(self, event, job, payload):
+        global _font_warning_shown
+        code = job["receipt"].get("id", "N/A")[:8]
+        if event == "spool_error":
+            window, _ = self._jobs.get(job["job_id"], (None, None))
+            self._notify(window, f"Lỗi ghi thư mục spool in: {payload}")
+            QMessageBox.warning(
+                window or self.window,
+                "Lỗi spool in",
+                f"Không ghi được trạng thái lệnh in hóa đơn {code} vào spool: {payload}\n"
+                "Việc in vẫn tiếp tục, nhưng lệnh có thể bị in lại khi khởi động lại.",
+            )
+            return
+        if event == "retry":
+            error, delay = payload
+            window, _ = self._jobs.get(job["job_id"], (None, None))
+            self._notify(window, f"In hóa đơn {code} lỗi ({error}), thử lại sau {delay:.0f}s...")
+            return
+        window, checkout_span = self._jobs.pop(job["job_id"], (None, None))
+        window = window or self.window
+        if window is not None and sip.isdeleted(window):
+            window = None
+        if event == "failed":
+            profiler.end(checkout_span, error=str(payload))
+            self._notify(window, f"In hóa đơn {code} thất bại")
+            QMessageBox.critical(
+                window,
+                "Lỗi",
+                f"Hóa đơn {code} đã được lưu nhưng không thể in sau {job['attempts']} lần thử: {payload}\n"
+                "Có thể in lại từ Chi tiết hóa đơn trong trang quản lý.",
+            )
+            return
+        destination, font_warning, open_error = payload
+        profiler.end(checkout_span)
+        shown = destination if RECEIPT_PRINTER else os.path.basename(destination)
+        self._notify(window, f"Đã in hóa đơn {code}: {shown}")
+        if font_warning and not _font_warning_shown:
+            _font_warning_shown = True
+            QMessageBox.warning(window, "Lỗi Font", font_warning)
+        if open_error:
+            QMessageBox.warning(
+                window,
+                "Lỗi in",
+                f"Không thể tự động mở file PDF.\nFile đã được lưu tại: {destination}",
+            )
+
+
+_printer = None
+
+
+def receipt_printer():
+    """ReceiptPrinter dùng chung của ứng dụng (tạo và khởi động spool lần đầu khi gọi)."""
+    global _printer
+    if _printer is None:
+        _printer = ReceiptPrinter(QApplication.instance())
+        _printer.spool.start()
+    return _printer
+
+
+def start_print_spool(window):
+    """Khởi động spool (in nốt lệnh còn dở từ lần chạy trước) và báo kết quả lên window."""
+    receipt_printer().window = window
+
+
+def print_receipt(receipt, window=None, checkout_span=None, reprint=False):
+    """Đưa hóa đơn vào spool in; tiến trình và kết quả hiện trên thanh trạng thái của window.
+
+    Hàm trả về ngay, nên dialog thanh toán có thể đóng trước khi in xong.
+    """
+    receipt_printer().print_receipt(receipt, window, checkout_span, reprint)
@@ -0,0 +1,142 @@
+import datetime
+
+import matplotlib
+
+matplotlib.use("QtAgg")  # Tự động chọn Qt5/Qt6
+from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+import matplotlib.dates as mdates
+
+
+# --- Lớp vẽ biểu đồ ---
+CHART_MAX_POINTS = 62  # Khung nhìn dài hơn thì gộp theo tuần, rồi theo tháng
+CHART_TITLES = {
+    "day": "Doanh thu theo ngày",
+    "week": "Doanh thu theo tuần",
+    "month": "Doanh thu theo tháng",
+}
+
+
+def _bucket_sales(days, sales, granularity):
+    """Cộng doanh thu theo ngày thành từng tuần (bắt đầu thứ Hai) hoặc từng tháng.
+
+    Nhóm đầu tiên đặt ở ngày đầu có dữ liệu thay vì thứ Hai/ngày 1 trước đó,
+    để điểm luôn nằm trong khung nhìn toàn bộ.
+    """
+    if granularity == "day" or not days:
+        return days, sales
+    first_day = min(days)
+    buckets = {}
+    for day, amount in zip(days, sales):
+        if granularity == "week":
+            key = day - datetime.timedelta(days=day.weekday())
+        else:
+            key = day.replace(day=1)
+        key = max(key, first_day)
+        buckets[key] = buckets.get(key, 0.0) + amount
+    keys = sorted(buckets)
+    return keys, [buckets[key] for key in keys]
+
+
+class MplCanvas(FigureCanvas):
+    """Biểu đồ doanh thu dùng lại một đường (Line2D), chỉ cập nhật dữ liệu.
+
+    Dữ liệu được gộp sẵn theo ngày/tuần/tháng một lần mỗi lần tải; cuộn chuột để
+    phóng to/thu nhỏ (chọn mức gộp theo độ dài khung nhìn), nhấp đúp để xem lại
+    toàn bộ. Khi khung trục không đổi chỉ vẽ lại đường bằng blit.
+    """
+
+    def __init__(self, parent=None, width=5, height=4, dpi=100):
+        fig = Figure(figsize=(width, height), dpi=dpi)
+        self.axes = fig.add_subplot(111)
+        super(MplCanvas, self).__init__(fig)
+        self.setParent(parent)
+        self.axes.set_ylabel("Tổng doanh thu (VND)")
+        locator = mdates.AutoDateLocator()
+        self.axes.xaxis.set_major_locator(locator)
+        self.axes.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+        # animated=True: đường không nằm trong nền đã lưu, để blit vẽ đè được
+        (self.line,) = self.axes.plot(
+            [], [], marker="o", markersize=4, color="#007bff", animated=True
+        )
+        self.empty_text = self.axes.text(
+            0.5,
+            0.5,
+            "Không có dữ liệu",
+            horizontalalignment="center",
+            verticalalignment="center",
+            transform=self.axes.transAxes,
+            visible=False,
+        )
+        self._series = {}  # mức gộp -> (x dạng số ngày của matplotlib, doanh thu)
+        self._full_range = None
+        self._view = None  # (xmin, xmax, ymax, mức gộp) đang hiển thị
+        self._background = None
+        self.mpl_connect("draw_event", self._on_draw)
+        self.mpl_connect("scroll_event", self._on_scroll)
+        self.mpl_connect("button_press_event", self._on_press)
+
+    def update_plot(self, dates, sales):
+        days = [datetime.date.fromisoformat(date) for date in dates]
+        self._series = {}
+        for granularity in CHART_TITLES:
+            keys, values = _bucket_sales(days, sales, granularity)
+            self._series[granularity] = (list(mdates.date2num(keys)), values)
+        if not days:
+            self._full_range = None
+            self._view = None
+            self.line.set_data([], [])
+            self.axes.set_title("")
+            self.empty_text.set_visible(True)
+            self.draw_idle()
+            return
+        self.empty_text.set_visible(False)
+        first, last = self._series["day"][0][0], self._series["day"][0][-1]
+        self._full_range = (first - 0.5, last + 0.5)
+        self._show_range(*self._full_range)
+
+    def _show_range(self, xmin, xmax):
+        span_days = xmax - xmin
+        if span_days <= CHART_MAX_POINTS:
+            granularity = "day"
+        elif span_days / 7 <= CHART_MAX_POINTS:
+            granularity = "week"
+        else:
+            granularity = "month"
+        x, y = self._series[granularity]
+        self.line.set_data(x, y)
+        visible = [value for xv, value in zip(x, y) if xmin <= xv <= xmax]
+        ymax = max(visible, default=0) * 1.1 or 1
+        view = (xmin, xmax, ymax, granularity)
+        if view == self._view and self._background is not None:
+            # Khung trục như cũ: khôi phục nền đã lưu và chỉ vẽ lại đường
+            self.restore_region(self._background)
+            self.axes.draw_artist(self.line)
+            self.blit(self.axes.bbox)
+            return
+        self._view = view
+        self.axes.set_xlim(xmin, xmax)
+        self.axes.set_ylim(0, ymax)
+        self.axes.set_title(CHART_TITLES[granularity])
+        self.draw_idle()
+
+    def _on_draw(self, _event):
+        # Sau mỗi lần vẽ đầy đủ: lưu nền (không có đường) rồi vẽ đường lên trên
+        self._background = self.copy_from_bbox(self.axes.bbox)
+        self.axes.draw_artist(self.line)
+
+    def _on_scroll(self, event):
+        if event.inaxes is not self.axes or self._full_range is None:
+            return
+        xmin, xmax = self.axes.get_xlim()
+        factor = 0.8 if event.button == "up" else 1.25
+        full_min, full_max = self._full_range
+        new_min = event.xdata - (event.xdata - xmin) * factor
+        new_max = event.xdata + (xmax - event.xdata) * factor
+        new_min, new_max = max(new_min, full_min), min(new_max, full_max)
+        if new_max - new_min >= 1:  # Không phóng nhỏ hơn một ngày
+            self._show_range(new_min, new_max)
+
+    def _on_press(self, event):
+        if event.dblclick and event.inaxes is self.axes and self._full_range:
+            self._show_range(*self._full_range)
@@ -0,0 +1,114 @@
+from PyQt6.QtCore import (
+    QAbstractTableModel,
+    QModelIndex,
+    QSortFilterProxyModel,
+    Qt,
+)
+
+# Số dòng đưa cho view mỗi lần fetchMore; phần còn lại chỉ nằm trong mảng dữ liệu
+FETCH_BATCH_SIZE = 200
+
+
+class Column:
+    """Mô tả một cột: tiêu đề, cách hiển thị và khóa sắp xếp từ giá trị thô."""
+
+    def __init__(self, title, display=str, sort_key=None):
+        self.title = title
+        self.display = display
+        self.sort_key = sort_key
+
+
+class RecordTableModel(QAbstractTableModel):
+    """Model chỉ đọc trên mảng tuple gọn; chữ hiển thị chỉ được định dạng khi view cần.
+
+    Dòng được đưa cho view dần theo từng lô (canFetchMore/fetchMore) khi cuộn
+    xuống, nên bảng có hàng chục nghìn bản ghi vẫn hiện ngay.
+    """
+
+    def __init__(self, columns, parent=None):
+        super().__init__(parent)
+        self.columns = columns
+        self._rows = []
+        self._payloads = []
+        self._loaded = 0
+
+    def set_rows(self, rows, payloads=None):
+        """Thay toàn bộ dữ liệu; payloads (tùy chọn) là dữ liệu gốc song song với rows."""
+        self.beginResetModel()
+        self._rows = rows
+        self._payloads = payloads if payloads is not None else []
+        self._loaded = min(len(rows), FETCH_BATCH_SIZE)
+        self.endResetModel()
+
+    def payload(self, row):
+        return self._payloads[row] if 0 <= row < len(self._payloads) else None
+
+    def total_rows(self):
+        return len(self._rows)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._loaded < len(self._rows)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(FETCH_BATCH_SIZE, len(self._rows) - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def fetch_all(self):
+        """Đưa hết dòng còn lại cho view (cần trước khi sắp xếp toàn bảng)."""
+        if self._loaded < len(self._rows):
+            self.beginInsertRows(QModelIndex(), self._loaded, len(self._rows) - 1)
+            self._loaded = len(self._rows)
+            self.endInsertRows()
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        column = self.columns[index.column()]
+        value = self._rows[index.row()][index.column()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return column.display(value)
+        if role == Qt.ItemDataRole.UserRole:
+            return column.sort_key(value) if column.sort_key else column.display(value)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.columns[section].title
+        return section + 1
+
+
+class RecordSortProxyModel(QSortFilterProxyModel):
+    """Sắp xếp theo khóa thô (UserRole) thay vì theo chữ đã định dạng."""
+
+    def __init__(self, source, parent=None):
+        super().__init__(parent)
+        self.setSourceModel(source)
+        self.setSortRole(Qt.ItemDataRole.UserRole)
+        source.modelReset.connect(self._on_source_reset)
+
+    def _on_source_reset(self):
+        if self.sortColumn() >= 0:
+            self.sourceModel().fetch_all()  # Đang sắp theo một cột: giữ thứ tự đúng trên toàn bộ dữ liệu
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        source = self.sourceModel()
+        if column >= 0 and source is not None:
+            source.fetch_all()  # Sắp xếp một phần dữ liệu sẽ cho kết quả sai
+        super().sort(column, order)
+
+    def source_row(self, proxy_row):
+        return self.mapToSource(self.index(proxy_row, 0)).row()
@@ -0,0 +1,277 @@
+import re
+
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import QApplication
+from PyQt6 import sip
+
+# Toàn bộ giao diện dùng một stylesheet cấp QApplication, đặt một lần lúc khởi động.
+# Luật của từng màn hình được gắn tiền tố tên lớp (vd. "OrderDialog QPushButton"),
+# "&" là chính lớp đó. Thứ tự khối: lớp ngoài trước, lớp con (dialog mở từ đó) sau,
+# để luật cùng độ ưu tiên của lớp con được áp dụng sau cùng như khi còn setStyleSheet riêng.
+
+_MAIN_WINDOW_CSS = """
+&, QWidget { background-color: #ffffff; font-family: Inter; }
+#viewTitle { font-size: 24px; font-weight: bold; color: #343a40; padding-bottom: 10px; }
+#loadingLabel { font-size: 14px; color: #6c757d; }
+
+QPushButton#tableButton, QPushButton#takeawayButtonGrid {
+    font-size: 15px; font-weight: bold; border-radius: 12px;
+    padding: 10px; line-height: 1.5; min-height: 130px;
+    white-space: pre-wrap; /* Đảm bảo xuống dòng */
+}
+QPushButton#tableButton:hover, QPushButton#takeawayButtonGrid:hover {
+    border: 3px solid rgba(0, 0, 0, 0.2);
+}
+QPushButton#tableButton[status="empty"] {
+    background-color: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #34d399, stop:1 #10b981);
+    color: white; border: 1px solid #059669;
+}
+QPushButton#tableButton[status="empty"]:hover { background-color: #10b981; }
+QPushButton#tableButton[status="occupied"] {
+    background-color: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #fb923c, stop:1 #f97316);
+    color: white; border: 1px solid #ea580c;
+}
+QPushButton#tableButton[status="occupied"]:hover { background-color: #f97316; }
+
+QPushButton#takeawayButtonGrid {
+    background-color: #0d6efd; color: white; border: 1px solid #0a58ca;
+}
+QPushButton#takeawayButtonGrid[hasOrder="true"] {
+    background-color: #ffc107; color: #333; border: 1px solid #e0a800;
+}
+QPushButton#takeawayButtonGrid:hover { background-color: #0b5ed7; }
+QPushButton#takeawayButtonGrid[hasOrder="true"]:hover { background-color: #e0a800; }
+
+#navPanel { background-color: #f8f9fa; border-right: 1px solid #dee2e6; }
+#navTitle { font-size: 22px; font-weight: bold; color: #343a40; padding-bottom: 20px; }
+QPushButton#navButton { background: transparent; border: none; padding: 15px 20px; font-size: 15px; font-weight: bold; color: #495057; text-align: left; border-radius: 8px; }
+QPushButton#navButton:hover { background: #f1f3f5; }
+QPushButton#navButton:checked { background: #e9ecef; color: #007bff; }
+QPushButton#navButton[role="logout"] { color: #dc3545; }
+QPushButton#navButton[role="logout"]:hover { background: #f8d7da; }
+
+#accountFormWrapper { border: 1px solid #e0e0e0; border-radius: 8px; padding: 20px; }
+QFormLayout QLineEdit, QFormLayout QDateEdit { background-color: #ffffff; border: 1px solid #ced4da; padding: 8px; border-radius: 6px; }
+QFormLayout QLineEdit:focus, QFormLayout QDateEdit:focus { border-color: #007bff; }
+QFormLayout QLineEdit[role="readonly"] { background-color: #f8f9fa; }
+#saveInfoButton { background-color: #28a745; color: white; border: none; padding: 10px; margin-top: 15px; border-radius: 6px; font-weight: bold; width: 150px; }
+#saveInfoButton:hover { background-color: #218838; }
+#changePasswordButton { background-color: #007bff; color: white; border: none; padding: 10px; margin-top: 15px; border-radius: 6px; font-weight: bold; width: 150px; }
+#changePasswordButton:hover { background-color: #0056b3; }
+
+#clockLabel { font-size: 48px; font-weight: bold; color: #343a40; margin: 20px 0; }
+#statusLabel { font-size: 18px; color: #6c757d; margin-bottom: 30px; }
+#checkInOutButton { font-size: 18px; font-weight: bold; color: white; border: none; border-radius: 10px; padding: 15px 40px; }
+#checkInOutButton[role="checkin"] { background-color: #28a745; }
+#checkInOutButton[role="checkin"]:hover { background-color: #218838; }
+#checkInOutButton[role="checkout"] { background-color: #dc3545; }
+#checkInOutButton[role="checkout"]:hover { background-color: #c82333; }
+#checkInOutButton[role="disabled"] { background-color: #6c757d; color: #e0e0e0; }
+"""
+
+_CHANGE_PASSWORD_CSS = """
+QLineEdit {padding: 8px; border: 1px solid #ced4da; border-radius: 6px; background-color: #f8f9fa;}
+QLineEdit:focus {border-color: #007bff;}
+"""
+
+_ADMIN_PANEL_CSS = """
+& { background-color: #ffffff; } QTabWidget::pane { border: 1px solid #e0e0e0; border-top: none; }
+QTabBar::tab { padding: 12px 25px; background-color: #f8f9fa; border: 1px solid #e0e0e0; border-bottom: none; border-top-left-radius: 8px; border-top-right-radius: 8px; font-size: 14px; font-weight: bold; color: #495057; }
+QTabBar::tab:selected { background-color: #ffffff; color: #007bff; border-bottom: 1px solid #ffffff; } QTabBar::tab:!selected:hover { background-color: #e9ecef; }
+QTableView { border: 1px solid #e9ecef; gridline-color: #f1f3f5; font-size: 14px; border-radius: 8px; } QTableView::item { padding: 12px; border-bottom: 1px solid #f1f3f5; }
+QTableView::item:selected { background-color: #e7f3ff; color: #0056b3; } QTableView::alternate-background { background-color: #f8f9fa; }
+QHeaderView::section { background-color: #f1f3f5; padding: 12px; border: none; border-bottom: 2px solid #e0e0e0; font-size: 14px; font-weight: bold; }
+QPushButton { padding: 10px 15px; border-radius: 6px; font-size: 14px; font-weight: bold; border: none; margin-bottom: 10px; } QPushButton:hover { opacity: 0.9; }
+QPushButton#addUserButton, QPushButton#addButton { background-color: #28a745; color: white; } QPushButton#addUserButton:hover, QPushButton#addButton:hover { background-color: #218838; }
+QPushButton#editUserButton, QPushButton#editButton { background-color: #007bff; color: white; } QPushButton#editUserButton:hover, QPushButton#editButton:hover { background-color: #0056b3; }
+QPushButton#deleteUserButton, QPushButton#deleteButton { background-color: #dc3545; color: white; } QPushButton#deleteUserButton:hover, QPushButton#deleteButton:hover { background-color: #c82333; }
+#previewTitle { font-size: 16px; font-weight: bold; color: #343a40; padding-bottom: 10px; border-bottom: 1px solid #e9ecef; }
+#imagePreview { background-color: #f8f9fa; border: 1px dashed #ced4da; border-radius: 8px; color: #6c757d; qproperty-alignment: 'AlignCenter'; qproperty-wordWrap: true; margin-top: 10px; }
+QDateEdit, QComboBox { padding: 8px; border: 1px solid #ced4da; border-radius: 6px; } QPushButton#loadStatsButton, QPushButton#loadAttendanceButton, QPushButton#calculateSalaryButton { background-color: #007bff; color: white; margin-bottom: 0; }
+QPushButton#loadStatsButton:hover, QPushButton#loadAttendanceButton:hover, QPushButton#calculateSalaryButton:hover { background-color: #0056b3; } #totalRevenueLabel { font-size: 20px; font-weight: bold; color: #28a745; padding: 10px; background-color: #f8f9fa; border-radius: 8px; }
+QScrollArea { border: 1px solid #e9ecef; border-radius: 8px; }
+"""
+
+_RECEIPT_DETAIL_CSS = """
+#totalReceiptLabel {font-size: 18px; font-weight: bold; color: #28a745; padding-top: 10px;}
+QTableWidget {border-radius: 0px;}
+"""
+
+_USER_DIALOG_CSS = """
+QLineEdit, QDateEdit, QComboBox { padding: 8px; border: 1px solid #ced4da; border-radius: 6px; background-color: #f8f9fa; }
+QLineEdit:focus, QDateEdit:focus, QComboBox:focus { border-color: #007bff; }
+QComboBox::drop-down { border: none; }
+QLineEdit:read-only { background-color: #e9ecef; }
+"""
+
+_MENU_ITEM_DIALOG_CSS = """
+QLineEdit { padding: 8px; border: 1px solid #ced4da; border-radius: 6px; background-color: #f8f9fa; }
+QLineEdit:focus { border-color: #007bff; }
+"""
+
+_ORDER_DIALOG_CSS = """
+&, MainWindow & { background-color: #f0f2f5; font-family: Inter; }
+QFrame#categoryPanel, QFrame#orderPanel { background-color: #ffffff; border-radius: 8px; }
+#panelTitle { font-size: 18px; font-weight: bold; padding: 10px; color: #343a40; border-bottom: 1px solid #e9ecef; }
+QListWidget, #menuScrollArea { border: none; }
+#categoryList::item { padding: 12px 15px; border-bottom: 1px solid #f0f2f5; font-size: 15px;}
+#categoryList::item:selected { background-color: #e7f3ff; color: #007bff; font-weight: bold; border-left: 3px solid #007bff; }
+QPushButton#gridMenuItem { background-color: #ffffff; border: 1px solid #dee2e6; border-radius: 8px; text-align: center; }
+QPushButton#gridMenuItem:hover { background-color: #f8f9fa; }
+#gridItemImage { background-color: #f8f9fa; border-radius: 8px; font-size: 40px; color: #adb5bd; qproperty-alignment: 'AlignCenter'; }
+#gridItemName { font-size: 14px; font-weight: bold; color: #212529; }
+#gridItemPrice { font-size: 13px; color: #495057; }
+#loadingLabel { font-size: 14px; color: #6c757d; padding: 20px; }
+#orderList::item { border-bottom: 1px solid #f0f2f5; }
+#orderItemName { font-size: 15px; font-weight: 500; color: #212529; }
+#orderItemUnitPrice { font-size: 12px; color: #6c757d; }
+#orderItemPriceTotal { font-size: 14px; color: #212529; font-weight: 500; }
+#menuSearchInput { padding: 10px; font-size: 15px; border: 1px solid #ced4da; border-radius: 8px; background-color: #ffffff; margin: 5px 0; }
+#menuSearchInput:focus { border-color: #007bff; }
+#quickEntryInput { padding: 10px; font-size: 15px; font-weight: bold; border: 1px solid #ced4da; border-radius: 8px; background-color: #fffbe6; margin: 5px 0; }
+#quickEntryInput:focus { border-color: #fd7e14; }
+#quickEntryStatus { color: #6c757d; font-size: 12px; }
+#quickEntryStatus[error="true"] { color: #dc3545; }
+#recentItemsLabel { color: #6c757d; font-weight: bold; }
+QPushButton#recentItemButton { padding: 4px 10px; font-weight: normal; background-color: #fff3cd; border: 1px solid #ffe08a; }
+#totalLabel { font-size: 20px; font-weight: bold; color: #28a745; padding: 10px; }
+#removeButton { background-color: transparent; border: none; font-size: 16px; }
+QSpinBox#quantitySpinBox { border: 1px solid #ced4da; border-radius: 4px; padding: 10px; margin-left: -5px; }
+QPushButton { padding: 10px 15px; border-radius: 5px; font-weight: bold; border: 1px solid #ced4da; }
+QPushButton#confirmButton { background-color: #007bff; color: white; border: none; }
+QPushButton#checkoutButton { background-color: #28a745; color: white; border: none; }
+QPushButton#cancelButton { background-color: #6c757d; color: white; border: none; }
+QPushButton:hover { background-color: #e9ecef; }
+QPushButton#confirmButton:hover { background-color: #0056b3; }
+QPushButton#checkoutButton:hover { background-color: #218838; }
+QPushButton#cancelButton:hover { background-color: #5a6268; }
+"""
+
+_LOGIN_DIALOG_CSS = """
+& {
+    font-family: Inter;
+}
+/* --- Left Side --- */
+#leftFrame {
+    background-color: #007bff;
+}
+#logoLabel {
+    font-size: 80px;
+    color: white;
+    text-align: center;
+    margin-bottom: 10px;
+}
+#brandTitle, #brandSubtitle {
+    color: white;
+    text-align: center;
+}
+#brandTitle {
+    font-size: 24px;
+    font-weight: bold;
+}
+#brandSubtitle {
+    font-size: 14px;
+    color: #e0e0e0;
+}
+
+/* --- Right Side --- */
+#rightFrame {
+    background-color: #ffffff;
+}
+#loginTitle {
+    font-size: 28px;
+    font-weight: bold;
+    color: #333;
+    text-align: center;
+}
+QLabel {
+    font-size: 14px;
+    color: #555;
+}
+QLineEdit {
+    padding: 12px;
+    font-size: 15px;
+    border: 1px solid #ced4da;
+    border-radius: 8px;
+    background-color: #f8f9fa;
+}
+QLineEdit:focus {
+    border-color: #007bff;
+}
+QPushButton {
+    background-color: #007bff;
+    color: white;
+    font-size: 16px;
+    font-weight: bold;
+    padding: 12px;
+    border-radius: 8px;
+    border: none;
+}
+QPushButton:hover {
+    background-color: #0056b3;
+}
+"""
+
+
+def _scoped(scope, css):
+    """Gắn tiền tố lớp cho mọi selector trong css."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    rules = []
+    for selectors, body in re.findall(r"([^{}]+)\{([^{}]*)\}", css):
+        scoped = [
+            selector.replace("&", scope) if "&" in selector else f"{scope} {selector}"
+            for selector in (s.strip() for s in selectors.split(","))
+            if selector
+        ]
+        rules.append(f"{', '.join(scoped)} {{{' '.join(body.split())}}}")
+    return "\n".join(rules)
+
+
+APP_STYLESHEET = "\n".join(
+    _scoped(scope, css)
+    for scope, css in (
+        ("MainWindow", _MAIN_WINDOW_CSS),
+        ("ChangePasswordDialog", _CHANGE_PASSWORD_CSS),
+        ("AdminPanel", _ADMIN_PANEL_CSS),
+        ("ReceiptDetailDialog", _RECEIPT_DETAIL_CSS),
+        ("UserDialog", _USER_DIALOG_CSS),
+        ("MenuItemDialog", _MENU_ITEM_DIALOG_CSS),
+        ("OrderDialog", _ORDER_DIALOG_CSS),
+        ("LoginDialog", _LOGIN_DIALOG_CSS),
+    )
+)
+
+
+def apply_theme(app):
+    """Đặt stylesheet chung cho cả ứng dụng (gọi một lần sau khi tạo QApplication)."""
+    app.setStyleSheet(APP_STYLESHEET)
+
+
+_pending_polish = []
+
+
+def set_style_property(widget, name, value):
+    """Đổi thuộc tính động dùng trong stylesheet; chỉ polish lại khi giá trị thật sự đổi.
+
+    Các widget đổi trong cùng một lượt xử lý sự kiện được polish lại một lần,
+    gom vào cuối lượt đó.
+    """
+    if widget.property(name) == value:
+        return
+    widget.setProperty(name, value)
+    if not _pending_polish:
+        QTimer.singleShot(0, _flush_polish)
+    if widget not in _pending_polish:
+        _pending_polish.append(widget)
+
+
+def _flush_polish():
+    widgets = list(_pending_polish)
+    _pending_polish.clear()
+    style = QApplication.style()
+    for widget in widgets:
+        if sip.isdeleted(widget):
+            continue
+        style.unpolish(widget)
+        style.polish(widget)
+        widget.update()
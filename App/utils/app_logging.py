@@ -0,0 +1,124 @@
+import atexit
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import signal
+import sys
+
+ROOT_LOGGER_NAME = "cafe"
+
+_listener = None
+
+
+class JsonLineFormatter(logging.Formatter):
+    """Mỗi bản ghi log là một dòng JSON."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler không format trên luồng gọi log.
+
+    QueueHandler mặc định gọi getMessage() ngay khi log; ở đây chỉ đẩy
+    record vào hàng đợi, việc format và ghi ra stream do luồng listener làm.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def setup_logging(level=None, stream=None):
+    """Cấu hình logger 'cafe': ghi JSON lines qua QueueHandler/QueueListener.
+
+    Mặc định mức INFO; đặt biến môi trường CAFE_DEBUG=1 để bật DEBUG.
+    Gọi nhiều lần cũng chỉ cấu hình một lần.
+    """
+    global _listener
+    root = logging.getLogger(ROOT_LOGGER_NAME)
+    if _listener is not None:
+        return root
+
+    if level is None:
+        level = logging.DEBUG if os.environ.get("CAFE_DEBUG") == "1" else logging.INFO
+    root.setLevel(level)
+    root.propagate = False
+
+    output_handler = logging.StreamHandler(stream or sys.stderr)
+    output_handler.setFormatter(JsonLineFormatter())
+    _start_listener(root, output_handler)
+    atexit.register(shutdown_logging)
+    if hasattr(os, "register_at_fork"):
+        # Luồng listener không tồn tại trong tiến trình con sau fork()
+        os.register_at_fork(
+            after_in_child=lambda: _start_listener(root, output_handler)
+        )
+    return root
+
+
+def _start_listener(root, output_handler):
+    """Gắn hàng đợi mới vào logger 'cafe' và chạy luồng listener ghi log."""
+    global _listener
+    for handler in list(root.handlers):
+        if isinstance(handler, _DeferredQueueHandler):
+            root.removeHandler(handler)
+    log_queue = queue.SimpleQueue()
+    root.addHandler(_DeferredQueueHandler(log_queue))
+    _listener = logging.handlers.QueueListener(
+        log_queue, output_handler, respect_handler_level=False
+    )
+    _listener.start()
+
+
+def shutdown_logging():
+    """Dừng listener, ghi hết log còn trong hàng đợi."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_logger(name):
+    """Lấy logger con của 'cafe', ví dụ get_logger('web_api')."""
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}")
+
+
+def set_debug(enabled):
+    """Bật/tắt log DEBUG lúc đang chạy."""
+    logging.getLogger(ROOT_LOGGER_NAME).setLevel(
+        logging.DEBUG if enabled else logging.INFO
+    )
+
+
+def is_debug():
+    return logging.getLogger(ROOT_LOGGER_NAME).isEnabledFor(logging.DEBUG)
+
+
+def toggle_debug():
+    set_debug(not is_debug())
+    logging.getLogger(ROOT_LOGGER_NAME).warning(
+        "Đã %s log DEBUG.", "bật" if is_debug() else "tắt"
+    )
+
+
+def install_debug_toggle_signal():
+    """Gửi SIGUSR1 cho tiến trình để bật/tắt log DEBUG (không có trên Windows)."""
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: toggle_debug())
@@ -4,11 +4,16 @@ import os
 import uuid
 import shutil
 import datetime
+import threading
+from contextlib import contextmanager
 from decimal import Decimal, ROUND_HALF_UP  # Dùng Decimal cho tiền tệ
 
+from utils.metrics import timed_io
+
 # --- Path Setup ---
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+# CAFE_DATA_DIR cho phép chạy trên bản sao dữ liệu (vd. khi load test)
+DATA_DIR = os.environ.get("CAFE_DATA_DIR") or os.path.join(PROJECT_ROOT, "data")
 IMAGES_DIR = os.path.join(DATA_DIR, "images")
 USERS_FILE = os.path.join(DATA_DIR, "users.json")
 MENU_FILE = os.path.join(DATA_DIR, "menu.json")
@@ -16,6 +21,21 @@ TABLES_FILE = os.path.join(DATA_DIR, "tables.json")
 RECEIPTS_FILE = os.path.join(DATA_DIR, "receipts.json")
 RECEIPTS_PRINT_DIR = os.path.join(DATA_DIR, "printed_receipts")
 ATTENDANCE_FILE = os.path.join(DATA_DIR, "attendance.json")
+ORDER_SPOOL_FILE = os.path.join(DATA_DIR, "order_spool.jsonl")
+PRINT_SPOOL_DIR = os.path.join(DATA_DIR, "print_spool")
+TABLES_LOCK_FILE = os.path.join(DATA_DIR, "tables.lock")
+IMAGE_CACHE_DIR = os.path.join(DATA_DIR, "image_cache")
+MENU_CHANGELOG_FILE = os.path.join(DATA_DIR, "menu_changelog.json")
+MENU_CHANGELOG_LOCK_FILE = os.path.join(DATA_DIR, "menu_changelog.lock")
+
+# Số lượng tối đa của một món trong một đơn (ô số lượng trên desktop và giỏ hàng web)
+MAX_ITEM_QUANTITY = 99
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
 
 # --- Helper Functions ---
@@ -47,13 +67,21 @@ def _load_json(file_path, default_data=None):
 
 
 def _save_json(file_path, data):
-    """Lưu dữ liệu vào file JSON."""
+    """Lưu dữ liệu vào file JSON.
+
+    Ghi ra file tạm rồi os.replace để tiến trình khác đang đọc không bao giờ
+    thấy file ghi dở.
+    """
     _ensure_dir()
+    tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
     try:
-        with open(file_path, "w", encoding="utf-8") as f:
+        with open(tmp_path, "w", encoding="utf-8") as f:
             json.dump(data, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, file_path)
     except IOError as e:
         print(f"Lỗi khi lưu file {file_path}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
 
 
 def hash_password(password):
@@ -146,15 +174,36 @@ def delete_user(username):
 
 
 # --- Menu Management ---
+@timed_io("get_menu")
 def get_menu():
     """Lấy danh sách món trong thực đơn."""
     return _load_json(MENU_FILE, [])
 
 
+def _next_plu(menu):
+    """Mã PLU nhỏ nhất chưa được dùng."""
+    used = {item.get("plu") for item in menu}
+    code = 1
+    while code in used:
+        code += 1
+    return code
+
+
+def _check_plu(menu, item_id, plu):
+    """Báo lỗi nếu mã PLU đã thuộc về món khác."""
+    for item in menu:
+        if item.get("plu") == plu and item.get("id") != item_id:
+            raise ValueError(f"Mã PLU {plu} đã được dùng cho món '{item.get('name')}'.")
+
+
 def add_menu_item(item_data):
-    """Thêm món mới."""
+    """Thêm món mới (tự cấp mã PLU nếu để trống)."""
     menu = get_menu()
     item_data.setdefault("id", str(uuid.uuid4()))
+    if item_data.get("plu") is None:
+        item_data["plu"] = _next_plu(menu)
+    else:
+        _check_plu(menu, item_data["id"], item_data["plu"])
     menu.append(item_data)
     _save_json(MENU_FILE, menu)
 
@@ -165,6 +214,10 @@ def update_menu_item(item_id, new_data):
     item_found = False
     for i, item in enumerate(menu):
         if item.get("id") == item_id:
+            if "plu" in new_data:
+                if new_data["plu"] is None:
+                    new_data["plu"] = item.get("plu") or _next_plu(menu)
+                _check_plu(menu, item_id, new_data["plu"])
             menu[i].update(new_data)
             item_found = True
             break
@@ -198,7 +251,31 @@ def migrate_menu_to_include_ids():
         print("Đã cập nhật ID cho các món ăn cũ.")
 
 
+def migrate_menu_to_include_plu():
+    """Cấp mã PLU cho các món chưa có (dữ liệu cũ)."""
+    menu = get_menu()
+    updated = False
+    for item in menu:
+        if not item.get("plu"):
+            item["plu"] = _next_plu(menu)
+            updated = True
+    if updated:
+        _save_json(MENU_FILE, menu)
+        print("Đã cấp mã PLU cho các món ăn cũ.")
+
+
+def get_menu_changelog():
+    """Lấy nhật ký thay đổi thực đơn (phiên bản, hash từng món, các thay đổi)."""
+    return _load_json(MENU_CHANGELOG_FILE, {})
+
+
+def save_menu_changelog(changelog):
+    """Lưu nhật ký thay đổi thực đơn."""
+    _save_json(MENU_CHANGELOG_FILE, changelog)
+
+
 # --- Table Management ---
+@timed_io("get_tables")
 def get_tables():
     """Lấy trạng thái các bàn, đảm bảo có mục 'takeaway'."""
     default_tables_base = [
@@ -224,11 +301,135 @@ def get_tables():
     return tables_data
 
 
+@timed_io("save_tables")
 def save_tables(tables_data):
     """Lưu trạng thái các bàn."""
     _save_json(TABLES_FILE, tables_data)
 
 
+_file_thread_locks = {}
+_file_thread_locks_guard = threading.Lock()
+
+
+@contextmanager
+def _exclusive_file_lock(lock_path):
+    """Khóa độc quyền theo một file .lock, giữa các luồng lẫn giữa các tiến trình."""
+    _ensure_dir()
+    with _file_thread_locks_guard:
+        thread_lock = _file_thread_locks.setdefault(lock_path, threading.Lock())
+    with thread_lock:
+        with open(lock_path, "a+") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def tables_lock():
+    """Khóa độc quyền cho chuỗi đọc-sửa-ghi tables.json.
+
+    Khóa cả giữa các luồng (threading.Lock) lẫn giữa các tiến trình (khóa
+    file tables.lock), nên nhiều worker web_api có thể cùng cấp khe 'Mang về'
+    mà không ghi đè đơn của nhau.
+    """
+    return _exclusive_file_lock(TABLES_LOCK_FILE)
+
+
+def menu_changelog_lock():
+    """Khóa cho việc cập nhật nhật ký thay đổi thực đơn (menu_changelog.json)."""
+    return _exclusive_file_lock(MENU_CHANGELOG_LOCK_FILE)
+
+
+def save_tables_merged(tables_data):
+    """Ghi trạng thái bàn từ ứng dụng desktop mà không đè đơn online chưa thấy.
+
+    Đọc lại tables.json dưới tables_lock(): khe nào trên đĩa đang giữ đơn web
+    (web_order_id) khác với bản của desktop thì giữ bản trên đĩa, khe web mới
+    mà desktop chưa có thì thêm vào. Trả về danh sách bàn đã ghi.
+    """
+    with tables_lock():
+        on_disk = {}  # id -> [bàn trên đĩa], danh sách vì dữ liệu cũ có thể trùng id
+        for table in get_tables():
+            on_disk.setdefault(str(table.get("id")), []).append(table)
+        merged = []
+        for table in tables_data:
+            same_id = on_disk.get(str(table.get("id")))
+            disk_table = same_id.pop(0) if same_id else None
+            if (
+                disk_table is not None
+                and disk_table.get("web_order_id")
+                and disk_table.get("web_order_id") != table.get("web_order_id")
+            ):
+                table = disk_table  # Web đã gán đơn mới vào khe này sau lần đọc cuối của desktop
+            merged.append(table)
+        for remaining in on_disk.values():
+            merged.extend(remaining)  # Khe 'Mang về' do web tạo thêm
+        save_tables(merged)
+    return merged
+
+
+def assign_takeaway_order(tables_data, customer_info, web_cart, order_id=None):
+    """Gán đơn online vào khe 'Mang về' trống (hoặc tạo khe mới), trả về ID khe.
+
+    Chỉ thay đổi tables_data trong bộ nhớ, người gọi tự save_tables().
+    Nếu có order_id và đơn đó đã được gán trước đó thì trả lại khe cũ.
+    """
+    if order_id:
+        for table in tables_data:
+            if table.get("web_order_id") == order_id:
+                return table.get("id")
+
+    customer_name = customer_info.get("name", "Khách Online")
+    customer_phone = customer_info.get("phone", "N/A")
+    customer_address = customer_info.get("address", "N/A")
+    new_order_dict = {}
+    for item_name, details in web_cart.items():
+        new_order_dict[item_name] = {
+            "price": details.get("price", 0),
+            "quantity": details.get("quantity", 1),
+        }
+    employee = f"{customer_name} | {customer_phone} | {customer_address}"
+
+    for table in tables_data:
+        if (
+            str(table.get("id", "")).startswith("takeaway")
+            and table.get("status") == "Sẵn sàng"
+        ):
+            table["order"] = new_order_dict
+            table["employee"] = employee
+            table["status"] = "Chờ xử lý"
+            # Khe dùng lại: bỏ mã đơn cũ để nó không che đơn mới khi desktop gộp bàn
+            if order_id:
+                table["web_order_id"] = order_id
+            else:
+                table.pop("web_order_id", None)
+            return table.get("id")
+
+    takeaway_count = sum(
+        1 for t in tables_data if str(t.get("id", "")).startswith("takeaway")
+    )
+    new_takeaway_entry = {
+        "id": f"takeaway{takeaway_count + 1}",
+        "name": "Mang về",
+        "status": "Chờ xử lý",
+        "order": new_order_dict,
+        "employee": employee,
+    }
+    if order_id:
+        new_takeaway_entry["web_order_id"] = order_id
+    tables_data.append(new_takeaway_entry)
+    return new_takeaway_entry["id"]
+
+
 # --- Receipt Management ---
 def get_receipts():
     """Lấy danh sách hóa đơn đã lưu."""
@@ -310,6 +511,21 @@ def record_check_out(username):
     return record_updated
 
 
+def record_check_in_or_out(username):
+    """Check-out nếu đang trong ca hôm nay, ngược lại check-in.
+
+    Trả về ("check_in" | "check_out", bản ghi).
+    """
+    last_record = get_last_attendance(username)
+    today_str = datetime.date.today().strftime("%Y-%m-%d")
+    is_checked_in_today = last_record and last_record.get("check_in_time", "").startswith(
+        today_str
+    )
+    if is_checked_in_today and not last_record.get("check_out_time"):
+        return "check_out", record_check_out(username)
+    return "check_in", record_check_in(username)
+
+
 # --- Salary Calculation ---
 def calculate_salary(username, start_date, end_date):
     """Tính tổng giờ làm và lương cho user trong khoảng thời gian."""
@@ -0,0 +1,144 @@
+import datetime
+import os
+import socket
+
+from utils.menu_search import strip_accents
+
+# Máy in nhiệt nhận lệnh ESC/POS trực tiếp, không qua PDF/trình xem.
+# CAFE_RECEIPT_PRINTER chọn nơi gửi (để trống thì in PDF như cũ):
+#   tcp://192.168.1.50[:9100]  máy in mạng (cổng raw 9100)
+#   file:/tmp/receipts.bin     ghi nối vào file (để thử)
+#   /dev/usb/lp0               file thiết bị (USB/cổng song song)
+# CAFE_ESCPOS_COLUMNS: số ký tự mỗi dòng (giấy 80mm, font A: 48; một số máy 42)
+RECEIPT_PRINTER = os.environ.get("CAFE_RECEIPT_PRINTER", "").strip()
+COLUMNS = int(os.environ.get("CAFE_ESCPOS_COLUMNS", "48"))
+DEFAULT_TCP_PORT = 9100
+SOCKET_TIMEOUT = 5
+
+ESC = b"\x1b"
+GS = b"\x1d"
+INIT = ESC + b"@"
+ALIGN_LEFT = ESC + b"a\x00"
+ALIGN_CENTER = ESC + b"a\x01"
+BOLD_ON = ESC + b"E\x01"
+BOLD_OFF = ESC + b"E\x00"
+SIZE_NORMAL = GS + b"!\x00"
+SIZE_DOUBLE = GS + b"!\x11"
+FEED_AND_CUT = ESC + b"d\x04" + GS + b"V\x00"
+
+
+class PartialPrintError(OSError):
+    """Lỗi khi đã gửi một phần hóa đơn: máy in có thể đã in dở, không tự thử lại."""
+
+    retryable = False  # PrintSpool đánh dấu lệnh thất bại ngay thay vì in lại cả hóa đơn
+
+
+def _text(text):
+    # Phần lớn máy in nhiệt không có bảng mã tiếng Việt: in không dấu cho chắc chắn
+    return strip_accents(text).encode("ascii", "replace")
+
+
+def _line(text=""):
+    return _text(text) + b"\n"
+
+
+def _columns(left, right, width=None):
+    """Một dòng chữ trái + chữ phải, cắt bớt chữ trái nếu thiếu chỗ."""
+    width = width or COLUMNS
+    room = width - len(right) - 1
+    if len(left) > room:
+        left = left[: max(room - 2, 0)] + ".."
+    return _line(left.ljust(room) + " " + right)
+
+
+def render_receipt_escpos(receipt_data, columns=None):
+    """Dựng hóa đơn thành chuỗi byte ESC/POS từ dict hóa đơn (như save_receipt lưu)."""
+    columns = columns or COLUMNS
+    try:
+        now = datetime.datetime.fromisoformat(receipt_data["timestamp"])
+    except (KeyError, ValueError, TypeError):
+        now = datetime.datetime.now()
+    table_id = receipt_data.get("table_id")
+    table_id_display = f"Bàn {table_id}" if isinstance(table_id, int) else "Mang về"
+    separator = _line("-" * columns)
+    out = [
+        INIT,
+        ALIGN_CENTER,
+        SIZE_DOUBLE,
+        BOLD_ON,
+        _line("TÊN QUÁN CAFE"),
+        SIZE_NORMAL,
+        BOLD_OFF,
+        _line("Địa chỉ quán của bạn..."),
+        _line("=" * min(columns, 28)),
+        BOLD_ON,
+        _line(f"HOÁ ĐƠN ({table_id_display})"),
+        BOLD_OFF,
+        ALIGN_LEFT,
+        _line(f"Mã HĐ: {receipt_data.get('id', 'N/A')[:8]}"),
+        _line(f"Ngày: {now.strftime('%Y-%m-%d %H:%M:%S')}"),
+        _line(f"Thu ngân: {receipt_data.get('employee', 'N/A')}"),
+        separator,
+        _columns("Tên món", f"{'SL':>3} {'Đ.Giá':>9} {'Th.Tiền':>10}", columns),
+        separator,
+    ]
+    for item_name, details in receipt_data.get("items", {}).items():
+        qty = details.get("quantity", 0)
+        price = details.get("price", 0)
+        out.append(
+            _columns(
+                str(item_name),
+                f"{qty:>3} {price:>9,.0f} {qty * price:>10,.0f}",
+                columns,
+            )
+        )
+    out += [
+        separator,
+        BOLD_ON,
+        _columns("TỔNG CỘNG:", f"{receipt_data.get('total', 0):,.0f} VND", columns),
+        BOLD_OFF,
+        b"\n",
+        ALIGN_CENTER,
+        _line("Cảm ơn quý khách!"),
+        _line("Hẹn gặp lại!"),
+        FEED_AND_CUT,
+    ]
+    return b"".join(out)
+
+
+def send_to_printer(data, target=None):
+    """Gửi chuỗi byte tới máy in theo cấu hình (xem RECEIPT_PRINTER ở đầu file).
+
+    Lỗi trước khi gửi byte nào (không kết nối/mở được) thì ném nguyên lỗi để
+    được thử lại; lỗi giữa chừng thì ném PartialPrintError, vì gửi lại cả hóa
+    đơn sẽ in ra một bản dở và một bản đầy đủ.
+    """
+    target = target or RECEIPT_PRINTER
+    if not target:
+        raise ValueError("Chưa cấu hình máy in (CAFE_RECEIPT_PRINTER).")
+    if target.startswith("tcp://"):
+        host, _, port = target[len("tcp://"):].partition(":")
+        sink = socket.create_connection(
+            (host, int(port or DEFAULT_TCP_PORT)), timeout=SOCKET_TIMEOUT
+        )
+        write = sink.sendall
+    elif target.startswith("file:"):
+        sink = open(target[len("file:"):], "ab")
+        write = sink.write
+    else:
+        sink = open(target, "wb")  # File thiết bị, vd. /dev/usb/lp0
+        write = sink.write
+    try:
+        with sink:  # File ghi đệm: lỗi có thể chỉ xuất hiện khi đóng file
+            write(data)
+    except OSError as e:
+        raise PartialPrintError(
+            f"Mất kết nối máy in khi đang gửi hóa đơn, máy có thể đã in dở: {e}"
+        ) from e
+
+
+def print_receipt_escpos(receipt_data, target=None):
+    """Dựng và gửi hóa đơn ra máy in nhiệt; trả về số byte đã gửi."""
+    data = render_receipt_escpos(receipt_data)
+    send_to_printer(data, target)
+    return len(data)
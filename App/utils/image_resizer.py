@@ -0,0 +1,157 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.app_logging import get_logger
+
+logger = get_logger("image_resizer")
+
+try:
+    from PIL import Image, features
+
+    PIL_INSTALLED = True
+    WEBP_SUPPORTED = features.check("webp")
+except ImportError:
+    PIL_INSTALLED = False
+    WEBP_SUPPORTED = False
+    logger.warning("Thư viện 'Pillow' chưa được cài. /api/images sẽ trả ảnh gốc.")
+
+# Chỉ sinh ảnh theo vài độ rộng cố định để cache không bị bùng số biến thể
+ALLOWED_WIDTHS = (160, 320, 480, 640, 960, 1280)
+JPEG_QUALITY = 80
+WEBP_QUALITY = 75
+CONTENT_TYPES = {"jpeg": "image/jpeg", "webp": "image/webp"}
+
+
+def snap_width(width):
+    """Làm tròn lên độ rộng cho phép gần nhất."""
+    for allowed in ALLOWED_WIDTHS:
+        if width <= allowed:
+            return allowed
+    return ALLOWED_WIDTHS[-1]
+
+
+class ImageResizer:
+    """Sinh ảnh thu nhỏ theo yêu cầu, lưu trong cache trên đĩa có giới hạn dung lượng (LRU).
+
+    Lần đầu một biến thể được yêu cầu, get() trả None và việc resize chạy trong
+    pool luồng riêng; các request sau đọc thẳng file trong cache.
+    """
+
+    def __init__(self, cache_dir, max_bytes=64 * 1024 * 1024, workers=2):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # tên file -> kích thước, cũ nhất ở đầu
+        self._total_bytes = 0
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-resize")
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        """Nạp các file đã có trong cache, sắp theo lần dùng gần nhất (mtime)."""
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".tmp"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            files.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self._total_bytes += size
+
+    @staticmethod
+    def cache_key(source_path, width, fmt):
+        """Khóa gồm cả mtime/kích thước ảnh gốc: thay ảnh là tự sinh biến thể mới."""
+        stat = os.stat(source_path)
+        raw = f"{os.path.abspath(source_path)}|{stat.st_mtime_ns}|{stat.st_size}|{width}|{fmt}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, source_path, width, fmt):
+        """Trả về (đường dẫn file đã resize, etag), hoặc (None, None) nếu đang sinh."""
+        key = self.cache_key(source_path, width, fmt)
+        name = f"{key}.{'jpg' if fmt == 'jpeg' else fmt}"
+        path = os.path.join(self.cache_dir, name)
+        try:
+            size = os.stat(path).st_size
+            os.utime(path)  # Giữ đúng thứ tự LRU sau khi khởi động lại
+        except OSError:
+            size = None
+        with self._lock:
+            if size is not None:
+                # File có thể do worker khác (prefork) sinh ra, thêm vào chỉ mục của mình
+                if name not in self._entries:
+                    self._entries[name] = size
+                    self._total_bytes += size
+                self._entries.move_to_end(name)
+                self.hits += 1
+                return path, key
+            old_size = self._entries.pop(name, None)
+            if old_size is not None:  # Worker khác đã xóa khi dọn cache
+                self._total_bytes -= old_size
+            self.misses += 1
+            if name in self._pending:
+                return None, None
+            self._pending.add(name)
+        self._pool.submit(self._render, source_path, width, fmt, name)
+        return None, None
+
+    def _render(self, source_path, width, fmt, name):
+        path = os.path.join(self.cache_dir, name)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with Image.open(source_path) as image:
+                image.draft("RGB", (width, width))  # JPEG: giải mã sẵn ở độ phân giải thấp
+                if image.width > width:
+                    height = max(1, round(image.height * width / image.width))
+                    image = image.resize((width, height), Image.LANCZOS)
+                if image.mode not in ("RGB", "L"):
+                    image = image.convert("RGB")
+                if fmt == "webp":
+                    image.save(tmp_path, "WEBP", quality=WEBP_QUALITY, method=4)
+                else:
+                    image.save(tmp_path, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+            with self._lock:
+                self._total_bytes += size - self._entries.get(name, 0)
+                self._entries[name] = size
+                self._evict()
+            logger.debug("Đã tạo ảnh %s (%d byte) từ %s", name, size, source_path)
+        except Exception:
+            logger.exception("Lỗi khi resize ảnh %s", source_path)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        finally:
+            with self._lock:
+                self._pending.discard(name)
+
+    def _evict(self):
+        """Xóa file ít dùng nhất cho tới khi cache nằm trong giới hạn (gọi khi giữ lock)."""
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            name, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass  # Worker khác đã xóa
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "files": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,257 @@
+import hashlib
+import json
+import os
+import threading
+
+from utils.data_manager import (
+    get_menu,
+    get_menu_changelog,
+    save_menu_changelog,
+    menu_changelog_lock,
+    MENU_FILE,
+    MAX_ITEM_QUANTITY,
+)
+from utils.app_logging import get_logger
+from utils.menu_search import fold
+
+logger = get_logger("menu_index")
+
+# Số thay đổi giữ trong nhật ký; client cũ hơn thế sẽ nhận lại toàn bộ menu
+MAX_CHANGES = 500
+
+
+def _item_hash(item):
+    raw = json.dumps(item, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class StaleCursorError(ValueError):
+    """Cursor phân trang thuộc phiên bản menu cũ."""
+
+
+class CartPricingError(ValueError):
+    """Giỏ hàng có món không còn trong menu hoặc giá client gửi đã cũ."""
+
+    def __init__(self, message, problems):
+        super().__init__(message)
+        self.problems = problems
+
+
+class MenuSnapshot:
+    """Ảnh chụp bất biến của menu cùng các chỉ mục dựng sẵn."""
+
+    def __init__(self, items, version, min_version, changes):
+        self.items = items
+        self.version = version
+        self.min_version = min_version  # Delta chỉ tính được từ phiên bản này trở đi
+        self.changes = changes  # [(version, item_id)], tăng dần theo version
+        self.by_id = {item["id"]: item for item in items if item.get("id")}
+        self.by_name = {item["name"]: item for item in items if item.get("name")}
+        self.by_category = {}
+        for item in items:
+            self.by_category.setdefault(item.get("category") or "Khác", []).append(item)
+        self.categories = list(self.by_category)
+        self.search_keys = [(fold(item.get("name", "")), item) for item in items]
+        self.etag = f'"menu-{version}"'
+        # Body của GET /api/menu (không tham số) mã hóa sẵn một lần cho mỗi phiên bản
+        self.full_body = json.dumps(items, ensure_ascii=False).encode("utf-8")
+
+    def query(self, category=None, q=None, limit=None, cursor=None):
+        """Lọc theo danh mục/tên và phân trang. Ném ValueError nếu tham số sai."""
+        if category is not None:
+            items = self.by_category.get(category, [])
+        else:
+            items = self.items
+        if q:
+            needle = fold(q)  # Không phân biệt dấu: "ca phe" khớp "Cà phê"
+            matched = {id(item) for key, item in self.search_keys if needle in key}
+            items = [item for item in items if id(item) in matched]
+
+        offset = 0
+        if cursor:
+            cursor_version, _, cursor_offset = cursor.partition(".")
+            if not cursor_version.isdigit() or not cursor_offset.isdigit():
+                raise ValueError("Tham số 'cursor' không hợp lệ.")
+            if int(cursor_version) != self.version:
+                raise StaleCursorError("Thực đơn đã thay đổi, vui lòng tải lại từ đầu.")
+            offset = int(cursor_offset)
+
+        total = len(items)
+        if limit is not None:
+            if limit <= 0:
+                raise ValueError("Tham số 'limit' phải lớn hơn 0.")
+            page = items[offset : offset + limit]
+            next_offset = offset + len(page)
+            next_cursor = f"{self.version}.{next_offset}" if next_offset < total else None
+        else:
+            page = items[offset:]
+            next_cursor = None
+        return {
+            "version": self.version,
+            "total": total,
+            "items": page,
+            "next_cursor": next_cursor,
+        }
+
+    def changes_since(self, since_version):
+        """Các món thêm/sửa/xóa kể từ since_version.
+
+        Nếu client quá cũ (nhật ký đã bị cắt) hoặc phiên bản lạ thì trả toàn bộ
+        menu với "full": True.
+        """
+        if since_version < self.min_version or since_version > self.version:
+            return {"version": self.version, "full": True, "items": self.items}
+        changed_ids = []
+        seen = set()
+        for version, item_id in self.changes:
+            if version > since_version and item_id not in seen:
+                seen.add(item_id)
+                changed_ids.append(item_id)
+        return {
+            "version": self.version,
+            "full": False,
+            "changed": [self.by_id[i] for i in changed_ids if i in self.by_id],
+            "removed": [i for i in changed_ids if i not in self.by_id],
+        }
+
+
+    def quote(self, web_cart):
+        """Định giá từng dòng của giỏ hàng theo giá hiện tại trong menu.
+
+        web_cart: {tên món: {"id", "price", "quantity"}} như web gửi lên
+        (đã kiểm tra số lượng). Món tìm theo id, giỏ cũ không có id thì theo tên.
+        """
+        lines = []
+        unknown = []
+        total = 0
+        for key, details in web_cart.items():
+            item_id = details.get("id")
+            item = self.by_id.get(item_id) if item_id else self.by_name.get(key)
+            if item is None:
+                unknown.append(key)
+                continue
+            price = item.get("price", 0)
+            quantity = details.get("quantity", 1)
+            client_price = details.get("price")
+            total += price * quantity
+            lines.append(
+                {
+                    "key": key,
+                    "id": item.get("id"),
+                    "name": item.get("name", key),
+                    "price": price,
+                    "quantity": quantity,
+                    "line_total": price * quantity,
+                    "price_changed": client_price is not None and client_price != price,
+                }
+            )
+        return {"version": self.version, "lines": lines, "unknown": unknown, "total": total}
+
+    def price_cart(self, web_cart):
+        """Trả về giỏ hàng đã định giá lại theo menu, khóa theo tên món trong menu.
+
+        Ném CartPricingError nếu có món không tồn tại hoặc giá client gửi khác giá
+        hiện tại, để đơn bị từ chối trước khi ghi vào bàn.
+        """
+        quote = self.quote(web_cart)
+        problems = [{"item": key, "reason": "unknown"} for key in quote["unknown"]]
+        problems += [
+            {"item": line["key"], "reason": "price_changed", "price": line["price"]}
+            for line in quote["lines"]
+            if line["price_changed"]
+        ]
+        if problems:
+            raise CartPricingError(
+                "Thực đơn đã thay đổi, vui lòng kiểm tra lại giỏ hàng.", problems
+            )
+        priced_cart = {}
+        for line in quote["lines"]:
+            entry = priced_cart.get(line["name"])
+            if entry is None:
+                priced_cart[line["name"]] = {
+                    "id": line["id"],
+                    "price": line["price"],
+                    "quantity": line["quantity"],
+                }
+            else:  # Hai dòng cùng một món (khác tên ở client): gộp số lượng
+                entry["quantity"] += line["quantity"]
+                if entry["quantity"] > MAX_ITEM_QUANTITY:
+                    raise ValueError(
+                        f"Số lượng của món '{line['name']}' vượt quá {MAX_ITEM_QUANTITY}."
+                    )
+        return priced_cart
+
+
+class MenuIndex:
+    """Giữ MenuSnapshot mới nhất, dựng lại khi menu.json thay đổi (theo mtime/kích thước).
+
+    Phiên bản menu và nhật ký thay đổi lưu trong menu_changelog.json, cập nhật
+    dưới khóa file nên mọi worker web_api thấy cùng một số phiên bản.
+    """
+
+    def __init__(self, menu_file=MENU_FILE):
+        self.menu_file = menu_file
+        self._snapshot = None
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.menu_file)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def snapshot(self):
+        stamp = self._file_stamp()
+        snapshot = self._snapshot
+        if snapshot is not None and stamp == self._stamp:
+            return snapshot
+        with self._lock:
+            if self._snapshot is None or stamp != self._stamp:
+                self._snapshot = self._rebuild()
+                self._stamp = stamp
+            return self._snapshot
+
+    def _rebuild(self):
+        items = [item for item in get_menu() if isinstance(item, dict)]
+        hashes = {item["id"]: _item_hash(item) for item in items if item.get("id")}
+        with menu_changelog_lock():
+            log = get_menu_changelog()
+            old_hashes = log.get("hashes")
+            version = log.get("version", 0)
+            min_version = log.get("min_version", 0)
+            changes = [tuple(change) for change in log.get("changes", [])]
+            if old_hashes is None:
+                # Lần đầu: coi menu hiện tại là phiên bản 1, chưa có delta nào
+                version = min_version = 1
+                changes = []
+                self._save_log(version, min_version, hashes, changes)
+            elif old_hashes != hashes or list(old_hashes) != list(hashes):
+                # Đổi thứ tự món cũng tăng phiên bản để ETag của menu đầy đủ đổi theo
+                version += 1
+                changed = [i for i, h in hashes.items() if old_hashes.get(i) != h]
+                removed = [i for i in old_hashes if i not in hashes]
+                changes.extend((version, item_id) for item_id in changed + removed)
+                if len(changes) > MAX_CHANGES:
+                    # Cắt theo nguyên phiên bản để delta không bị thiếu một nửa
+                    min_version = changes[len(changes) - MAX_CHANGES][0]
+                    changes = [c for c in changes if c[0] > min_version]
+                self._save_log(version, min_version, hashes, changes)
+                logger.info(
+                    "Thực đơn đổi sang phiên bản %d (%d món đổi, %d món xóa).",
+                    version,
+                    len(changed),
+                    len(removed),
+                )
+        return MenuSnapshot(items, version, min_version, changes)
+
+    def _save_log(self, version, min_version, hashes, changes):
+        save_menu_changelog(
+            {
+                "version": version,
+                "min_version": min_version,
+                "hashes": hashes,
+                "changes": [list(change) for change in changes],
+            },
+        )
@@ -0,0 +1,109 @@
+import re
+import unicodedata
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def strip_accents(text):
+    """Bỏ dấu tiếng Việt, giữ chữ hoa: "Cà phê Sữa" -> "Ca phe Sua"."""
+    text = unicodedata.normalize("NFD", str(text))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return text.replace("đ", "d").replace("Đ", "D")
+
+
+def fold(text):
+    """Bỏ dấu tiếng Việt và chữ hoa: "Cà phê Sữa" -> "ca phe sua"."""
+    return strip_accents(text).casefold()
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(fold(text))
+
+
+class MenuSearchIndex:
+    """Chỉ mục tìm món theo tên/danh mục, không phân biệt dấu.
+
+    Mỗi tiền tố của mỗi từ trỏ tới tập id món, nên một truy vấn chỉ là vài
+    lần tra dict và giao tập. update() chỉ tách từ lại cho món đã đổi.
+    """
+
+    def __init__(self):
+        self._entries = {}  # id -> (món, khóa nội dung, từ trong tên, từ trong danh mục, tên đã bỏ dấu)
+        self._prefixes = {}  # tiền tố -> {id}
+        self._order = {}  # id -> vị trí trong menu (để xếp kết quả cùng điểm)
+
+    def update(self, menu):
+        """Đồng bộ với menu hiện tại; trả về số món phải dựng lại chỉ mục."""
+        seen = set()
+        rebuilt = 0
+        self._order = {}
+        for position, item in enumerate(menu):
+            if not isinstance(item, dict):
+                continue
+            item_id = item.get("id") or item.get("name")
+            if not item_id or item_id in seen:
+                continue
+            seen.add(item_id)
+            self._order[item_id] = position
+            content = (item.get("name", ""), item.get("category", ""))
+            entry = self._entries.get(item_id)
+            if entry is not None and entry[1] == content:
+                self._entries[item_id] = (item,) + entry[1:]  # Giá/ảnh đổi: không cần tách từ lại
+                continue
+            if entry is not None:
+                self._unindex(item_id, entry)
+            name_tokens = tokenize(content[0])
+            category_tokens = tokenize(content[1])
+            entry = (item, content, name_tokens, category_tokens, " ".join(name_tokens))
+            self._entries[item_id] = entry
+            for token in set(name_tokens + category_tokens):
+                for end in range(1, len(token) + 1):
+                    self._prefixes.setdefault(token[:end], set()).add(item_id)
+            rebuilt += 1
+        for item_id in [i for i in self._entries if i not in seen]:
+            self._unindex(item_id, self._entries.pop(item_id))
+        return rebuilt
+
+    def _unindex(self, item_id, entry):
+        for token in set(entry[2] + entry[3]):
+            for end in range(1, len(token) + 1):
+                ids = self._prefixes.get(token[:end])
+                if ids is not None:
+                    ids.discard(item_id)
+                    if not ids:
+                        del self._prefixes[token[:end]]
+
+    def search(self, query, limit=None):
+        """Trả về các món khớp mọi từ trong query (theo tiền tố), xếp theo độ phù hợp."""
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return []
+        candidates = None
+        # Tra từ dài nhất trước để tập ứng viên nhỏ ngay từ đầu
+        for token in sorted(query_tokens, key=len, reverse=True):
+            ids = self._prefixes.get(token)
+            if not ids:
+                return []
+            candidates = set(ids) if candidates is None else candidates & ids
+            if not candidates:
+                return []
+        folded_query = " ".join(query_tokens)
+        scored = []
+        for item_id in candidates:
+            item, _, name_tokens, _, folded_name = self._entries[item_id]
+            score = 0
+            if folded_name == folded_query:
+                score += 100
+            elif folded_name.startswith(folded_query):
+                score += 50
+            for token in query_tokens:
+                if token in name_tokens:
+                    score += 10
+                elif any(name_token.startswith(token) for name_token in name_tokens):
+                    score += 6
+                else:
+                    score += 2  # Chỉ khớp danh mục
+            scored.append((-score, self._order.get(item_id, 0), item))
+        scored.sort(key=lambda entry: entry[:2])
+        results = [item for _, _, item in scored]
+        return results[:limit] if limit else results
@@ -0,0 +1,292 @@
+import glob
+import json
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from utils.app_logging import get_logger
+from utils.data_manager import (
+    get_tables,
+    save_tables,
+    assign_takeaway_order,
+    tables_lock,
+    ORDER_SPOOL_FILE,
+    TABLES_FILE,
+)
+
+logger = get_logger("order_queue")
+
+# Số bản ghi 'done' giữ lại trong spool khi dọn file, để tra trạng thái đơn cũ
+DONE_HISTORY = 5000
+# Chỉ mục trạng thái đơn (của mọi worker) giữ tối đa chừng này mã
+STATUS_INDEX_MAX = 50000
+ORDER_ID_RE = re.compile(r"[0-9a-f]{32}")
+
+
+def is_valid_order_id(order_id):
+    """Mã đơn hợp lệ là uuid4().hex: 32 ký tự hex thường."""
+    return isinstance(order_id, str) and ORDER_ID_RE.fullmatch(order_id) is not None
+
+
+class OrderQueue:
+    """Hàng đợi đơn online: nhận nhanh trong request, ghi bàn theo lô ở 1 luồng.
+
+    Mỗi đơn được ghi vào file spool (JSON lines) trước khi vào hàng đợi,
+    nên nếu server tắt đột ngột thì các đơn chưa xử lý sẽ được nạp lại
+    khi khởi động.
+    """
+
+    def __init__(
+        self,
+        spool_file=ORDER_SPOOL_FILE,
+        maxsize=500,
+        batch_size=50,
+        batch_wait=0.2,
+        shared_spool_pattern=None,
+    ):
+        self.spool_file = spool_file
+        # Mẫu glob khớp spool của mọi worker (prefork): status() tra cả đơn do worker khác nhận
+        self.shared_spool_pattern = shared_spool_pattern
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._spool_lock = threading.Lock()
+        self._results = OrderedDict()  # order_id -> takeaway_id (giữ tối đa 1000)
+        self._pending_ids = set()  # Đơn tiến trình này đã nhận nhưng chưa ghi vào bàn
+        # Chỉ mục order_id -> (trạng thái, takeaway_id) từ spool của mọi worker và tables.json,
+        # dựng một lần khi start() rồi chỉ đọc phần mới ghi thêm
+        self._status_index = OrderedDict()
+        self._status_lock = threading.Lock()
+        self._spool_offsets = {}  # file spool -> (inode, vị trí đã đọc tới)
+        self._tables_mtime = None
+        self._thread = None
+
+    # --- Spool ---
+    def _append_spool(self, record):
+        with open(self.spool_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _load_pending(self):
+        """Đọc spool, trả về các đơn chưa được đánh dấu 'done'."""
+        if not os.path.exists(self.spool_file):
+            return []
+        pending = OrderedDict()
+        with open(self.spool_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Dòng ghi dở khi bị tắt ngang
+                if record.get("op") == "order":
+                    pending[record["order_id"]] = record
+                elif record.get("op") == "done":
+                    pending.pop(record.get("order_id"), None)
+        return list(pending.values())
+
+    def _read_spool(self, spool_file):
+        """Đọc các bản ghi của một file spool (bỏ qua dòng ghi dở)."""
+        records = []
+        try:
+            with open(spool_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
+        except FileNotFoundError:
+            pass
+        return records
+
+    def _compact_spool(self):
+        """Khi không còn đơn chờ, chỉ giữ lại các bản ghi 'done' gần nhất để file không phình mãi."""
+        with self._spool_lock:
+            if not self._queue.empty() or self._pending_ids:
+                return
+            done = [r for r in self._read_spool(self.spool_file) if r.get("op") == "done"]
+            tmp_path = self.spool_file + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for record in done[-DONE_HISTORY:]:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.spool_file)
+
+    # --- API ---
+    def start(self):
+        """Nạp lại đơn còn trong spool và khởi động luồng xử lý."""
+        pending = self._load_pending()
+        self._refresh_status_index()
+        self._thread = threading.Thread(
+            target=self._consume, name="order-queue", daemon=True
+        )
+        self._thread.start()
+        for record in pending:
+            self._pending_ids.add(record["order_id"])
+            self._queue.put(record)  # Luồng xử lý đã chạy nên put() không kẹt
+        if pending:
+            logger.info("Đã nạp lại %d đơn online chưa xử lý từ spool.", len(pending))
+
+    def submit(self, customer_info, web_cart):
+        """Ghi đơn vào spool và hàng đợi. Ném queue.Full nếu hàng đợi đầy."""
+        record = {
+            "op": "order",
+            "order_id": uuid.uuid4().hex,
+            "received_at": time.time(),
+            "customer": customer_info,
+            "cart": web_cart,
+        }
+        with self._spool_lock:
+            if self._queue.full():
+                raise queue.Full
+            self._append_spool(record)
+            self._pending_ids.add(record["order_id"])
+            self._queue.put_nowait(record)
+        return record["order_id"]
+
+    def _index_record(self, record):
+        order_id = record.get("order_id")
+        if record.get("op") == "done":
+            self._status_index[order_id] = ("done", record.get("takeaway_id"))
+        elif record.get("op") == "order" and order_id not in self._status_index:
+            self._status_index[order_id] = ("queued", None)
+        else:
+            return
+        self._status_index.move_to_end(order_id)
+
+    def _tail_spool(self, spool_file):
+        """Đọc phần mới ghi thêm của một spool; file bị dọn (đổi inode/ngắn lại) thì đọc lại từ đầu."""
+        try:
+            stat = os.stat(spool_file)
+        except FileNotFoundError:
+            self._spool_offsets.pop(spool_file, None)
+            return
+        inode, offset = self._spool_offsets.get(spool_file, (None, 0))
+        if inode != stat.st_ino or stat.st_size < offset:
+            offset = 0
+        if stat.st_size == offset:
+            return
+        with open(spool_file, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1  # Bỏ dòng đang ghi dở, đọc lại ở lần sau
+        for line in data[:end].splitlines():
+            try:
+                self._index_record(json.loads(line))
+            except (json.JSONDecodeError, UnicodeDecodeError, AttributeError):
+                continue
+        self._spool_offsets[spool_file] = (stat.st_ino, offset + end)
+
+    def _index_tables(self):
+        """Ghi nhận các web_order_id trong tables.json (chỉ đọc, không cần tables_lock)."""
+        try:
+            mtime = os.stat(TABLES_FILE).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._tables_mtime:
+            return
+        try:
+            # save_tables ghi file tạm rồi os.replace nên không bao giờ đọc phải file ghi dở
+            with open(TABLES_FILE, "r", encoding="utf-8") as f:
+                tables_data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning("Không đọc được tables.json khi tra trạng thái đơn: %s", e)
+            return
+        self._tables_mtime = mtime
+        for table in tables_data if isinstance(tables_data, list) else []:
+            order_id = isinstance(table, dict) and table.get("web_order_id")
+            if order_id:
+                self._status_index[order_id] = ("done", table.get("id"))
+                self._status_index.move_to_end(order_id)
+
+    def _refresh_status_index(self):
+        """Cập nhật chỉ mục: chỉ stat các file và đọc phần spool mới ghi thêm, không quét lại từ đầu."""
+        with self._status_lock:
+            spool_files = {self.spool_file}
+            if self.shared_spool_pattern:
+                spool_files.update(glob.glob(self.shared_spool_pattern))
+            self._index_tables()
+            for spool_file in sorted(spool_files):
+                self._tail_spool(spool_file)
+            while len(self._status_index) > STATUS_INDEX_MAX:
+                self._status_index.popitem(last=False)
+
+    def status(self, order_id):
+        """Trả về (trạng thái, takeaway_id) của một đơn: "done", "queued" hoặc "unknown".
+
+        Tra bộ nhớ trước; không có (đơn nhận trước khi khởi động lại, đã rơi khỏi
+        _results, hoặc do worker khác nhận) thì tra chỉ mục dựng từ spool của mọi
+        worker và tables.json. Mã sai định dạng trả "unknown" ngay.
+        """
+        if not is_valid_order_id(order_id):
+            return "unknown", None
+        takeaway_id = self._results.get(order_id)
+        if takeaway_id is not None:
+            return "done", takeaway_id
+        if order_id in self._pending_ids:
+            return "queued", None
+        self._refresh_status_index()
+        with self._status_lock:
+            return self._status_index.get(order_id, ("unknown", None))
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    # --- Consumer ---
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _apply_batch(self, batch):
+        assigned = []
+        with tables_lock():
+            tables_data = get_tables()
+            for record in batch:
+                takeaway_id = assign_takeaway_order(
+                    tables_data,
+                    record.get("customer", {}),
+                    record.get("cart", {}),
+                    order_id=record["order_id"],
+                )
+                assigned.append((record["order_id"], takeaway_id))
+            save_tables(tables_data)  # Một lần ghi cho cả lô
+        return assigned
+
+    def _consume(self):
+        while True:
+            batch = self._next_batch()
+            while True:
+                try:
+                    assigned = self._apply_batch(batch)
+                    break
+                except Exception as e:
+                    # Đơn vẫn nằm trong spool, thử ghi lại cả lô sau 1 giây
+                    logger.error("Lỗi khi ghi lô %d đơn online vào bàn: %s", len(batch), e)
+                    time.sleep(1.0)
+
+            with self._spool_lock:
+                for order_id, takeaway_id in assigned:
+                    self._append_spool(
+                        {"op": "done", "order_id": order_id, "takeaway_id": takeaway_id}
+                    )
+                    self._results[order_id] = takeaway_id
+                    self._pending_ids.discard(order_id)
+                    while len(self._results) > 1000:
+                        self._results.popitem(last=False)
+            logger.info("Đã ghi %d đơn online vào bàn.", len(assigned))
+            if self._queue.empty():
+                self._compact_spool()
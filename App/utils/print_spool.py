@@ -0,0 +1,160 @@
+import glob
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+
+from utils.app_logging import get_logger
+from utils.data_manager import PRINT_SPOOL_DIR
+
+logger = get_logger("print_spool")
+
+# Thử lại khi in lỗi: chờ 2s, 4s, 8s... tối đa 60s; quá số lần thử thì bỏ (chờ in lại tay)
+RETRY_BASE_DELAY = 2.0
+RETRY_MAX_DELAY = 60.0
+MAX_ATTEMPTS = int(os.environ.get("CAFE_PRINT_MAX_ATTEMPTS", "6"))
+
+
+class PrintSpool:
+    """Hàng đợi in bền vững: mỗi lệnh in là một file trong thư mục spool.
+
+    File `<tên>.job` được ghi xong (fsync) trước khi vào hàng đợi; in xong thì
+    đổi tên thành `.done`, hết lượt thử thì thành `.failed`. Lệnh còn `.job` khi
+    ứng dụng tắt sẽ được in lại ở lần khởi động sau. Một luồng in lần lượt từng
+    lệnh, nên máy in lỗi thì các lệnh sau chờ theo đúng thứ tự.
+
+    printer(receipt) thực hiện việc in và ném lỗi nếu thất bại; lỗi có thuộc tính
+    retryable = False (vd. máy in đã nhận một phần hóa đơn) thì không thử lại
+    mà đánh dấu thất bại ngay để người dùng in lại tay. listener(sự kiện,
+    lệnh, dữ liệu) được gọi trên luồng in với sự kiện "done", "retry", "failed"
+    hoặc "spool_error" (không ghi được file spool, việc in vẫn tiếp tục).
+    """
+
+    def __init__(self, printer, spool_dir=PRINT_SPOOL_DIR, listener=None):
+        self.printer = printer
+        self.spool_dir = spool_dir
+        self.listener = listener
+        self._queue = queue.Queue()
+        self._thread = None
+
+    # --- Spool ---
+    def _path(self, job, suffix):
+        return os.path.join(self.spool_dir, job["file"] + suffix)
+
+    def _write_job(self, job):
+        path = self._path(job, ".job")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _mark(self, job, suffix):
+        os.replace(self._path(job, ".job"), self._path(job, suffix))
+
+    def _load_pending(self):
+        """Đọc các lệnh chưa in xong và dọn các file `.done` của lần chạy trước."""
+        for path in glob.glob(os.path.join(self.spool_dir, "*.done")):
+            os.remove(path)
+        pending = []
+        for path in sorted(glob.glob(os.path.join(self.spool_dir, "*.job"))):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    pending.append(json.load(f))
+            except (OSError, json.JSONDecodeError) as e:
+                logger.error("Bỏ qua lệnh in hỏng %s: %s", path, e)
+        return pending
+
+    # --- API ---
+    def start(self):
+        """Nạp lại lệnh in còn dở và khởi động luồng in."""
+        if self._thread is not None:
+            return
+        os.makedirs(self.spool_dir, exist_ok=True)
+        pending = self._load_pending()
+        for job in pending:
+            self._queue.put(job)
+        if pending:
+            logger.info("Đã nạp lại %d lệnh in chưa hoàn tất từ spool.", len(pending))
+        self._thread = threading.Thread(
+            target=self._consume, name="print-spool", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, receipt, reprint=False):
+        """Ghi lệnh in vào spool rồi đưa vào hàng đợi; trả về id của lệnh."""
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            # Tên file bắt đầu bằng thời điểm tạo để nạp lại đúng thứ tự
+            "file": f"{time.time_ns()}_{job_id[:8]}",
+            "created_at": time.time(),
+            "attempts": 0,
+            "reprint": reprint,
+            "receipt": receipt,
+        }
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self._write_job(job)
+        self._queue.put(job)
+        return job_id
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    # --- Worker ---
+    def _notify(self, event, job, payload):
+        if self.listener is None:
+            return
+        try:
+            self.listener(event, job, payload)
+        except Exception:
+            logger.exception("Lỗi trong listener của spool in")
+
+    def _bookkeep(self, action, job, *args):
+        """Ghi/đổi tên file spool; lỗi đĩa chỉ được ghi log và báo lên, không làm dừng luồng in."""
+        try:
+            action(job, *args)
+        except OSError as e:
+            logger.exception("Lỗi ghi spool in cho lệnh %s", job["job_id"])
+            self._notify("spool_error", job, e)
+
+    def _consume(self):
+        while True:
+            job = self._queue.get()
+            try:
+                self._process(job)
+            except Exception as e:
+                # Không để một lệnh lỗi bất ngờ làm chết luồng in của cả ứng dụng
+                logger.exception("Lỗi không mong đợi khi xử lý lệnh in %s", job.get("job_id"))
+                self._notify("failed", job, e)
+
+    def _process(self, job):
+        while True:
+            try:
+                result = self.printer(job["receipt"])
+            except Exception as e:
+                job["attempts"] += 1
+                job["last_error"] = str(e)
+                if job["attempts"] >= MAX_ATTEMPTS or not getattr(e, "retryable", True):
+                    logger.error(
+                        "Lệnh in %s thất bại sau %d lần: %s",
+                        job["job_id"], job["attempts"], e,
+                    )
+                    self._bookkeep(self._mark, job, ".failed")
+                    self._notify("failed", job, e)
+                    return
+                delay = min(RETRY_BASE_DELAY * 2 ** (job["attempts"] - 1), RETRY_MAX_DELAY)
+                logger.warning(
+                    "In lỗi (lần %d), thử lại sau %.0fs: %s", job["attempts"], delay, e
+                )
+                # Lưu số lần thử để khởi động lại không bắt đầu từ 0
+                self._bookkeep(self._write_job, job)
+                self._notify("retry", job, (e, delay))
+                time.sleep(delay)
+            else:
+                self._bookkeep(self._mark, job, ".done")
+                self._notify("done", job, result)
+                return
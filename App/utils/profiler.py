@@ -0,0 +1,130 @@
+import atexit
+import contextlib
+import cProfile
+import datetime
+import json
+import os
+import re
+import threading
+import time
+
+# Bật bằng `python main.py --profile` hoặc CAFE_PROFILE=1.
+# CAFE_PROFILE_DIR: thư mục ghi kết quả (mặc định ./profiles)
+# CAFE_PROFILE_CPROFILE=1: ghi thêm file .prof (cProfile) cho từng span ngoài cùng
+PROFILE_ENABLED = False
+PROFILE_DIR = None
+CPROFILE_ENABLED = False
+
+_events = []
+_events_lock = threading.Lock()
+_origin_ns = time.perf_counter_ns()
+_pid = os.getpid()
+_cprofile_active = False  # cProfile chỉ chạy một bộ đo mỗi lúc, trên luồng chính
+_cprofile_count = 0
+
+
+def enable_profiling(output_dir=None, cprofile=None):
+    """Bật ghi span; trace được ghi ra file khi thoát chương trình."""
+    global PROFILE_ENABLED, PROFILE_DIR, CPROFILE_ENABLED
+    if PROFILE_ENABLED:
+        return
+    PROFILE_ENABLED = True
+    PROFILE_DIR = output_dir or os.environ.get("CAFE_PROFILE_DIR") or "profiles"
+    if cprofile is None:
+        cprofile = os.environ.get("CAFE_PROFILE_CPROFILE") == "1"
+    CPROFILE_ENABLED = cprofile
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    atexit.register(write_trace)
+
+
+def _now_us():
+    return (time.perf_counter_ns() - _origin_ns) / 1000
+
+
+def _record(name, start_us, end_us, args, thread=None):
+    thread = thread or threading.current_thread()
+    event = {
+        "name": name,
+        "cat": "cafe",
+        "ph": "X",
+        "ts": start_us,
+        "dur": end_us - start_us,
+        "pid": _pid,
+        "tid": thread.ident,
+        "args": {"thread": thread.name, **args},
+    }
+    with _events_lock:
+        _events.append(event)
+
+
+@contextlib.contextmanager
+def _span(name, args):
+    global _cprofile_active, _cprofile_count
+    profile = None
+    if (
+        CPROFILE_ENABLED
+        and not _cprofile_active
+        and threading.current_thread() is threading.main_thread()
+    ):
+        _cprofile_active = True
+        profile = cProfile.Profile()
+        profile.enable()
+    start = _now_us()
+    try:
+        yield
+    finally:
+        end = _now_us()
+        if profile is not None:
+            profile.disable()
+            _cprofile_active = False
+            _cprofile_count += 1
+            safe_name = re.sub(r"[^\w.-]+", "_", name)
+            profile.dump_stats(
+                os.path.join(PROFILE_DIR, f"{_cprofile_count:03d}-{safe_name}.prof")
+            )
+        _record(name, start, end, args)
+
+
+def span(name, **args):
+    """Đo thời gian một khối lệnh: `with span("MainWindow.__init__"): ...`.
+
+    Khi chưa bật profiling chỉ trả về một context rỗng, gần như không tốn gì.
+    """
+    if not PROFILE_ENABLED:
+        return contextlib.nullcontext()
+    return _span(name, args)
+
+
+def begin(name, **args):
+    """Bắt đầu một span kéo dài qua nhiều callback; kết thúc bằng end(token)."""
+    if not PROFILE_ENABLED:
+        return None
+    return (name, _now_us(), args, threading.current_thread())
+
+
+def end(token, **args):
+    if token is None:
+        return
+    name, start, begin_args, thread = token
+    _record(name, start, _now_us(), {**begin_args, **args}, thread)
+
+
+def write_trace():
+    """Ghi các span đã đo thành file Chrome trace (mở bằng chrome://tracing hoặc Perfetto)."""
+    if not PROFILE_ENABLED:
+        return None
+    with _events_lock:
+        events = list(_events)
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(PROFILE_DIR, f"trace-{stamp}-{_pid}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(
+            {"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False
+        )
+    # print thay vì logger: lúc atexit chạy, luồng ghi log có thể đã dừng
+    print(f"Profiling: đã ghi {len(events)} span vào {path}")
+    return path
+
+
+if os.environ.get("CAFE_PROFILE") == "1":
+    enable_profiling()
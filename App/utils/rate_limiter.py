@@ -0,0 +1,84 @@
+import math
+import threading
+import time
+
+
+class TokenBucket:
+    """Token bucket đơn giản: nạp `rate` token/giây, chứa tối đa `burst` token."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self, now):
+        """Lấy 1 token. Trả về số giây cần chờ (0 nếu lấy được)."""
+        elapsed = now - self.updated
+        self.updated = now
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Giới hạn tần suất theo từng khóa (IP) bằng token bucket."""
+
+    def __init__(self, rate, burst, idle_ttl=300):
+        self.rate = rate
+        self.burst = burst
+        self.idle_ttl = idle_ttl
+        self.limited_count = 0
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def check(self, key):
+        """Trả về (được phép?, số giây Retry-After)."""
+        if self.rate <= 0:
+            return True, 0
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+            wait = bucket.take(now)
+            if now - self._last_sweep > self.idle_ttl:
+                self._sweep(now)
+            if wait > 0:
+                self.limited_count += 1
+                return False, max(1, math.ceil(wait))
+        return True, 0
+
+    def _sweep(self, now):
+        """Bỏ bucket của các IP lâu không gửi request để dict không phình mãi."""
+        self._last_sweep = now
+        stale = [k for k, b in self._buckets.items() if now - b.updated > self.idle_ttl]
+        for key in stale:
+            del self._buckets[key]
+
+
+class ConcurrencyLimiter:
+    """Giới hạn số request đang xử lý cùng lúc; vượt quá thì từ chối ngay (load shedding)."""
+
+    def __init__(self, max_in_flight):
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.shed_count = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        with self._lock:
+            if self.max_in_flight > 0 and self.in_flight >= self.max_in_flight:
+                self.shed_count += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
@@ -0,0 +1,197 @@
+import datetime
+import os
+import platform
+import subprocess
+import threading
+
+from utils.data_manager import PROJECT_ROOT, RECEIPTS_PRINT_DIR
+
+REPORTLAB_INSTALLED = None  # Chưa kiểm tra; reportlab chỉ được import khi in lần đầu
+
+FONT_NAME = "VNF_Arial"
+FONT_PATH = os.path.join(PROJECT_ROOT, "fonts", "Arial.ttf")
+
+# Khổ giấy in nhiệt 80mm (đơn vị mm, đổi sang point khi dựng trang)
+RECEIPT_WIDTH_MM = 80
+RECEIPT_HEIGHT_MM = 200
+MARGIN_MM = 7
+LINE_NORMAL_MM = 5
+LINE_SMALL_MM = 4
+SEPARATOR = "--------------------------------------------------"
+
+_font_lock = threading.Lock()
+_font_state = None  # (tên font dùng được, cảnh báo hoặc None), đăng ký một lần mỗi tiến trình
+_layout_cache = {}  # tên font -> bố cục phần cố định của hóa đơn
+
+
+def _load_reportlab():
+    """Import reportlab ở lần in đầu tiên, trả về True nếu thư viện có sẵn."""
+    global REPORTLAB_INSTALLED, canvas, mm, pdfmetrics, TTFont
+    if REPORTLAB_INSTALLED is None:
+        try:
+            from reportlab.pdfgen import canvas
+            from reportlab.lib.pagesizes import mm
+            from reportlab.pdfbase import pdfmetrics
+            from reportlab.pdfbase.ttfonts import TTFont
+
+            REPORTLAB_INSTALLED = True
+        except ImportError:
+            REPORTLAB_INSTALLED = False
+            print("CẢNH BÁO: Thư viện 'reportlab' chưa được cài. In PDF sẽ không hoạt động.")
+    return REPORTLAB_INSTALLED
+
+
+def register_fonts():
+    """Đăng ký font tiếng Việt đúng một lần; trả về (tên font, cảnh báo hoặc None).
+
+    Việc đọc Arial.ttf tốn vài chục ms nên không lặp lại ở mỗi hóa đơn.
+    """
+    global _font_state
+    with _font_lock:
+        if _font_state is None:
+            try:
+                pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH))
+                _font_state = (FONT_NAME, None)
+            except Exception as e:
+                print(f"Lỗi đăng ký font: {e}")
+                print(
+                    f"HƯỚNG DẪN: Đảm bảo file 'Arial.ttf' có trong thư mục '{os.path.dirname(FONT_PATH)}'"
+                )
+                _font_state = (
+                    "Helvetica",
+                    "Không tìm thấy file font 'Arial.ttf' trong thư mục 'fonts'.\n"
+                    "File PDF sẽ dùng font mặc định và có thể lỗi tiếng Việt.",
+                )
+        return _font_state
+
+
+def _centred(font_name, size, text):
+    """Dòng căn giữa đã tính sẵn tọa độ x: (cỡ chữ, x, chữ)."""
+    width = RECEIPT_WIDTH_MM * mm
+    return (size, (width - pdfmetrics.stringWidth(text, font_name, size)) / 2, text)
+
+
+def _static_layout(font_name):
+    """Phần cố định của hóa đơn (đầu trang, dòng kẻ, lời cảm ơn), tính một lần cho mỗi font."""
+    layout = _layout_cache.get(font_name)
+    if layout is None:
+        layout = {
+            # (cỡ chữ, x, chữ, khoảng cách xuống dòng sau đó)
+            "header": [
+                _centred(font_name, 14, "TÊN QUÁN CAFE") + (LINE_NORMAL_MM * 1.5,),
+                _centred(font_name, 9, "Địa chỉ quán của bạn...") + (LINE_NORMAL_MM,),
+                _centred(font_name, 9, "============================") + (LINE_NORMAL_MM,),
+            ],
+            "separator": _centred(font_name, 9, SEPARATOR),
+            "footer": [
+                _centred(font_name, 10, "Cảm ơn quý khách!") + (LINE_SMALL_MM,),
+                _centred(font_name, 10, "Hẹn gặp lại!") + (0,),
+            ],
+        }
+        _layout_cache[font_name] = layout
+    return layout
+
+
+def receipt_filename(receipt_data):
+    """Tên file PDF của hóa đơn, theo thời điểm thanh toán và mã hóa đơn."""
+    try:
+        now = datetime.datetime.fromisoformat(receipt_data["timestamp"])
+    except (KeyError, ValueError, TypeError):
+        now = datetime.datetime.now()  # Dùng giờ hiện tại nếu timestamp lỗi
+    return f"HD_{now.strftime('%Y%m%d_%H%M%S')}_{receipt_data.get('id','N-A')[:4]}.pdf"
+
+
+def render_receipt_pdf(receipt_data, output_dir=RECEIPTS_PRINT_DIR):
+    """Dựng file PDF cho hóa đơn (an toàn khi chạy ở luồng nền).
+
+    Trả về (đường dẫn file, cảnh báo font hoặc None).
+    """
+    if not _load_reportlab():
+        raise RuntimeError(
+            "Thư viện 'reportlab' chưa được cài đặt.\nKhông thể in PDF. Vui lòng cài đặt: pip install reportlab"
+        )
+    font_name, font_warning = register_fonts()
+    layout = _static_layout(font_name)
+    try:
+        now = datetime.datetime.fromisoformat(receipt_data["timestamp"])
+    except (KeyError, ValueError, TypeError):
+        now = datetime.datetime.now()
+    os.makedirs(output_dir, exist_ok=True)
+    filepath = os.path.join(output_dir, receipt_filename(receipt_data))
+    receipt_width = RECEIPT_WIDTH_MM * mm
+    receipt_height = RECEIPT_HEIGHT_MM * mm
+    margin_left = MARGIN_MM * mm
+    margin_right = receipt_width - margin_left
+    line_height_normal = LINE_NORMAL_MM * mm
+    line_height_small = LINE_SMALL_MM * mm
+    c = canvas.Canvas(filepath, pagesize=(receipt_width, receipt_height))
+    y = receipt_height - (10 * mm)
+
+    def draw_separator():
+        size, x, text = layout["separator"]
+        c.setFont(font_name, size)
+        c.drawString(x, y, text)
+
+    for size, x, text, gap in layout["header"]:
+        c.setFont(font_name, size)
+        c.drawString(x, y, text)
+        y -= gap * mm
+    c.setFont(font_name, 10)
+    table_id = receipt_data.get("table_id")
+    table_id_display = f"Bàn {table_id}" if isinstance(table_id, int) else "Mang về"
+    c.drawCentredString(receipt_width / 2, y, f"HOÁ ĐƠN ({table_id_display})")
+    y -= line_height_normal
+    c.setFont(font_name, 9)
+    c.drawString(margin_left, y, f"Mã HĐ: {receipt_data.get('id','N/A')[:8]}...")
+    y -= line_height_small
+    c.drawString(margin_left, y, f"Ngày: {now.strftime('%Y-%m-%d %H:%M:%S')}")
+    y -= line_height_small
+    c.drawString(margin_left, y, f"Thu ngân: {receipt_data.get('employee','N/A')}")
+    y -= line_height_normal
+    draw_separator()
+    y -= line_height_normal
+    c.setFont(font_name, 9)
+    c.drawString(margin_left, y, "Tên món")
+    c.drawRightString(margin_right, y, "Th.Tiền")
+    c.drawRightString(margin_right - (15 * mm), y, "Đ.Giá")
+    c.drawRightString(margin_right - (30 * mm), y, "SL")
+    y -= line_height_small
+    for item_name, details in receipt_data.get("items", {}).items():
+        y -= line_height_normal
+        qty = details.get("quantity", 0)
+        price = details.get("price", 0)
+        subtotal = qty * price
+        name = (
+            (str(item_name)[:12] + "..")
+            if len(str(item_name)) > 14
+            else str(item_name)
+        )
+        c.drawString(margin_left, y, name)
+        c.drawRightString(margin_right, y, f"{subtotal:,.0f}")
+        c.drawRightString(margin_right - (15 * mm), y, f"{price:,.0f}")
+        c.drawRightString(margin_right - (30 * mm), y, str(qty))
+    y -= line_height_normal
+    draw_separator()
+    y -= line_height_normal
+    c.setFont(font_name, 12)
+    c.drawRightString(
+        margin_right, y, f"TỔNG CỘNG: {receipt_data.get('total', 0):,.0f} VND"
+    )
+    y -= line_height_normal * 2
+    for size, x, text, gap in layout["footer"]:
+        c.setFont(font_name, size)
+        c.drawString(x, y, text)
+        y -= gap * mm
+    c.showPage()
+    c.save()
+    return filepath, font_warning
+
+
+def open_receipt_file(filepath):
+    """Mở file PDF bằng trình xem mặc định, không chờ trình xem khởi động xong."""
+    if platform.system() == "Windows":
+        os.startfile(filepath)
+    elif platform.system() == "Darwin":
+        subprocess.Popen(["open", filepath])
+    else:
+        subprocess.Popen(["xdg-open", filepath])
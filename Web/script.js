@@ -16,6 +16,10 @@ document.addEventListener('DOMContentLoaded', () => {
 
     const menuApiUrl = '/api/menu';
     const orderApiUrl = '/api/order_takeaway';
+    const quoteApiUrl = '/api/quote';
+    const imageApiUrl = '/api/images';
+    const MAX_ITEM_QUANTITY = 99; // Giống giới hạn của server và ứng dụng desktop
+    const cardImageWidth = 320;
     const placeholderImage = 'placeholder.png';
 
     let allMenuItems = [];
@@ -24,12 +28,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
     async function initApp() {
         try {
-            const response = await fetch(menuApiUrl);
-            if (!response.ok) {
-                const errorData = await response.json().catch(() => ({}));
-                throw new Error(errorData.message || `Không thể tải ${menuApiUrl}. Status: ${response.status}. Bạn đã chạy 'python web_api.py' chưa?`);
-            }
-            allMenuItems = await response.json();
+            allMenuItems = await loadMenu();
 
             groupedMenu = groupItemsByCategory(allMenuItems);
             createCategoryTabs(Object.keys(groupedMenu));
@@ -55,6 +54,36 @@ document.addEventListener('DOMContentLoaded', () => {
         checkoutForm.addEventListener('submit', placeOrder);
     }
 
+    async function loadMenu() {
+        // Khách quay lại chỉ tải phần menu thay đổi kể từ phiên bản đã lưu
+        const cached = JSON.parse(localStorage.getItem('cafeMenu') || 'null');
+        const sinceVersion = cached && Array.isArray(cached.items) ? cached.version : 0;
+        const response = await fetch(`${menuApiUrl}?since_version=${sinceVersion}`);
+        if (!response.ok) {
+            const errorData = await response.json().catch(() => ({}));
+            throw new Error(errorData.message || `Không thể tải ${menuApiUrl}. Status: ${response.status}. Bạn đã chạy 'python web_api.py' chưa?`);
+        }
+        const delta = await response.json();
+        let items;
+        if (delta.full) {
+            items = delta.items;
+        } else {
+            const removed = new Set(delta.removed);
+            const changed = new Map(delta.changed.map(item => [item.id, item]));
+            items = cached.items
+                .filter(item => !removed.has(item.id))
+                .map(item => changed.get(item.id) || item);
+            const knownIds = new Set(items.map(item => item.id));
+            delta.changed.forEach(item => { if (!knownIds.has(item.id)) items.push(item); });
+        }
+        try {
+            localStorage.setItem('cafeMenu', JSON.stringify({ version: delta.version, items }));
+        } catch (e) {
+            console.warn('Không lưu được menu vào localStorage:', e);
+        }
+        return items;
+    }
+
     function groupItemsByCategory(items) {
         if (!Array.isArray(items)) return {};
         return items.reduce((acc, item) => {
@@ -117,8 +146,11 @@ document.addEventListener('DOMContentLoaded', () => {
         const menuItemDiv = document.createElement('div');
         menuItemDiv.classList.add('menu-item');
         let imagePath = placeholderImage;
-        if (item.image && typeof item.image === 'string') {
-            imagePath = `/App/${item.image.replace(/\\/g, '/')}`;
+        let imageSrcset = '';
+        if (item.image && typeof item.image === 'string' && item.id) {
+            // Ảnh thu nhỏ theo kích thước thẻ món (server resize + cache)
+            imagePath = `${imageApiUrl}/${encodeURIComponent(item.id)}?w=${cardImageWidth}`;
+            imageSrcset = `${imagePath} 1x, ${imageApiUrl}/${encodeURIComponent(item.id)}?w=${cardImageWidth * 2} 2x`;
         }
         const name = item.name || 'Chưa đặt tên';
         const price = item.price || 0;
@@ -126,7 +158,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
         menuItemDiv.innerHTML = `
             <div class="menu-item-image-wrapper">
-                <img src="${imagePath}" alt="${name}" class="menu-item-image" onerror="this.onerror=null; this.src='${placeholderImage}';">
+                <img src="${imagePath}" ${imageSrcset ? `srcset="${imageSrcset}"` : ''} alt="${name}" class="menu-item-image" loading="lazy" onerror="this.onerror=null; this.srcset=''; this.src='${placeholderImage}';">
             </div>
             <div class="menu-item-details">
                 <h3>${name}</h3>
@@ -145,7 +177,7 @@ document.addEventListener('DOMContentLoaded', () => {
         const itemName = item.name;
         if (!itemName || !item.id) return;
         if (cart[itemName]) {
-            cart[itemName].quantity += 1;
+            cart[itemName].quantity = Math.min(cart[itemName].quantity + 1, MAX_ITEM_QUANTITY);
         } else {
             cart[itemName] = {
                 id: item.id,
@@ -209,15 +241,40 @@ document.addEventListener('DOMContentLoaded', () => {
 
     function changeQuantity(itemName, change) {
         if (cart[itemName]) {
-            cart[itemName].quantity += change;
+            cart[itemName].quantity = Math.min(cart[itemName].quantity + change, MAX_ITEM_QUANTITY);
             if (cart[itemName].quantity <= 0) { delete cart[itemName]; }
             saveCart();
             updateCartDisplay();
         }
     }
 
+    async function syncCartWithServer() {
+        // Lấy giá hiện tại từ server; bỏ món không còn bán. Trả về true nếu giỏ bị đổi.
+        const response = await fetch(quoteApiUrl, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ cart: cart })
+        });
+        if (!response.ok) return false;
+        const quote = await response.json();
+        let changed = quote.unknown.length > 0;
+        quote.unknown.forEach(itemName => { delete cart[itemName]; });
+        quote.lines.forEach(line => {
+            if (line.price_changed && cart[line.key]) {
+                cart[line.key].price = line.price;
+                changed = true;
+            }
+        });
+        if (changed) {
+            saveCart();
+            updateCartDisplay();
+        }
+        return changed;
+    }
+
     function openCheckoutModal() {
         if (Object.keys(cart).length === 0) return;
+        syncCartWithServer().catch(error => console.warn('Không kiểm tra được giá giỏ hàng:', error));
         modal.style.display = 'flex';
         setTimeout(() => modal.classList.add('visible'), 10);
         customerNameInput.value = localStorage.getItem('cafeCustomerName') || '';
@@ -263,11 +320,22 @@ document.addEventListener('DOMContentLoaded', () => {
 
             const responseData = await response.json();
 
+            if (response.status === 409) {
+                // Giá hoặc món đã đổi: cập nhật giỏ theo server để khách xác nhận lại
+                await syncCartWithServer();
+                alert(responseData.message || 'Thực đơn đã thay đổi, vui lòng kiểm tra lại giỏ hàng.');
+                return;
+            }
+
             if (!response.ok) {
                 throw new Error(responseData.message || `Lỗi khi đặt hàng: ${response.statusText}`);
             }
 
-            alert(`Đặt hàng thành công! Đơn của bạn đã được ghi vào mục ${responseData.takeaway_id}.`);
+            if (response.status === 202) {
+                alert(`Đặt hàng thành công! Mã đơn của bạn: ${responseData.order_id.slice(0, 8)}.`);
+            } else {
+                alert(`Đặt hàng thành công! Đơn của bạn đã được ghi vào mục ${responseData.takeaway_id}.`);
+            }
             cart = {};
             saveCart();
             updateCartDisplay();
@@ -0,0 +1,367 @@
+"""Load test cho web_api.py, chạy offline trên localhost.
+
+Mô phỏng lưu lượng thật: tải menu, tải file tĩnh (HTML/CSS/JS/ảnh) và gửi
+đơn 'Mang về' với số món/số lượng lấy theo phân bố trong receipts.json.
+In ra throughput và độ trễ p50/p95/p99 theo từng loại request.
+
+Ví dụ:
+    # Tự chạy server trên bản sao dữ liệu tạm (không đụng tới App/data)
+    python loadtest.py --spawn-server --duration 20 --concurrency 16
+
+    # Lưu baseline, lần sau so sánh và báo lỗi (exit 1) nếu tụt quá 20%
+    python loadtest.py --spawn-server --save-baseline loadtest_baseline.json
+    python loadtest.py --spawn-server --check-baseline loadtest_baseline.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+APP_DIR = os.path.join(BASE_DIR, "App")
+DATA_DIR = os.path.join(APP_DIR, "data")
+
+STATIC_PATHS = ["/Web/index.html", "/Web/style.css", "/Web/script.js"]
+# Tỉ lệ mặc định: đa số khách xem menu + tải file tĩnh, một phần nhỏ đặt hàng
+DEFAULT_MIX = {"menu": 0.35, "static": 0.5, "order": 0.15}
+
+
+# --- Dữ liệu mô phỏng ---
+def load_cart_distribution(receipts_file):
+    """Lấy phân bố (số dòng món, số lượng mỗi dòng) từ các hóa đơn thật."""
+    line_counts, quantities = [], []
+    try:
+        with open(receipts_file, "r", encoding="utf-8") as f:
+            receipts = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        receipts = []
+    for receipt in receipts:
+        items = receipt.get("items", {})
+        if not isinstance(items, dict) or not items:
+            continue
+        line_counts.append(len(items))
+        for details in items.values():
+            quantity = details.get("quantity", 1)
+            if isinstance(quantity, int) and quantity > 0:
+                quantities.append(quantity)
+    return line_counts or [1], quantities or [1]
+
+
+def build_cart(rng, menu, line_counts, quantities):
+    lines = min(rng.choice(line_counts), len(menu))
+    cart = {}
+    for item in rng.sample(menu, lines):
+        cart[item["name"]] = {
+            "id": item.get("id"),
+            "price": item.get("price", 0),
+            "quantity": rng.choice(quantities),
+        }
+    return cart
+
+
+# --- Thống kê ---
+def percentile(sorted_values, pct):
+    """Percentile kiểu nearest-rank trên list đã sắp xếp."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}  # kind -> [giây]
+        self.statuses = {}  # kind -> {status: count}
+
+    def record(self, kind, status, latency):
+        with self._lock:
+            self.latencies.setdefault(kind, []).append(latency)
+            kind_statuses = self.statuses.setdefault(kind, {})
+            kind_statuses[status] = kind_statuses.get(status, 0) + 1
+
+    def summary(self, elapsed):
+        result = {}
+        all_latencies = []
+        for kind, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            all_latencies.extend(values)
+            result[kind] = _summarize(values, elapsed, self.statuses.get(kind, {}))
+        all_statuses = {}
+        for kind_statuses in self.statuses.values():
+            for status, count in kind_statuses.items():
+                all_statuses[status] = all_statuses.get(status, 0) + count
+        result["all"] = _summarize(sorted(all_latencies), elapsed, all_statuses)
+        return result
+
+
+def _summarize(values, elapsed, statuses):
+    errors = sum(c for s, c in statuses.items() if not (200 <= s < 300))
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "statuses": {str(s): c for s, c in sorted(statuses.items())},
+    }
+
+
+# --- Gửi request ---
+def send(host, port, method, path, body=None, timeout=10.0):
+    """Gửi 1 request, trả về (status, latency). status = 0 nếu lỗi kết nối."""
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+    start = time.perf_counter()
+    conn = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        conn.request(method, path, body=body, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        status = response.status
+    except (OSError, http.client.HTTPException):
+        status = 0
+    finally:
+        conn.close()
+    return status, time.perf_counter() - start
+
+
+def worker(args, host, port, menu, static_paths, dist, recorder, deadline, seed):
+    rng = random.Random(seed)
+    kinds = list(args.mix)
+    weights = [args.mix[k] for k in kinds]
+    line_counts, quantities = dist
+    while time.monotonic() < deadline:
+        kind = rng.choices(kinds, weights)[0]
+        if kind == "menu":
+            status, latency = send(host, port, "GET", "/api/menu")
+        elif kind == "static":
+            status, latency = send(host, port, "GET", rng.choice(static_paths))
+        else:
+            order = {
+                "customer": {
+                    "name": f"Load test {rng.randint(1, 9999)}",
+                    "phone": "0900000000",
+                    "address": "localhost",
+                },
+                "cart": build_cart(rng, menu, line_counts, quantities),
+            }
+            body = json.dumps(order, ensure_ascii=False).encode("utf-8")
+            status, latency = send(host, port, "POST", "/api/order_takeaway", body)
+        recorder.record(kind, status, latency)
+
+
+# --- Server tạm ---
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn_server(extra_env):
+    """Chạy web_api.py trên bản sao App/data để đơn thử không ghi vào dữ liệu thật."""
+    temp_dir = tempfile.mkdtemp(prefix="cafe_loadtest_")
+    data_copy = os.path.join(temp_dir, "data")
+    shutil.copytree(
+        DATA_DIR,
+        data_copy,
+        ignore=shutil.ignore_patterns(
+            "printed_receipts", "print_spool", "order_spool*", "*.lock"
+        ),
+    )
+    port = _free_port()
+    env = dict(os.environ)
+    env.update(
+        {
+            "CAFE_DATA_DIR": data_copy,
+            "CAFE_PORT": str(port),
+            "CAFE_POST_RATE": "0",  # Mọi request đến từ 1 IP, tắt giới hạn theo IP
+        }
+    )
+    env.update(extra_env)
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(BASE_DIR, "web_api.py")],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        if send("127.0.0.1", port, "GET", "/api/menu", timeout=1.0)[0] == 200:
+            return process, port, temp_dir
+        time.sleep(0.1)
+    process.terminate()
+    shutil.rmtree(temp_dir, ignore_errors=True)
+    raise RuntimeError("Không khởi động được web_api.py để load test.")
+
+
+# --- Baseline ---
+def compare_with_baseline(summary, baseline, tolerance):
+    """Trả về danh sách thông báo hồi quy (rỗng nếu đạt)."""
+    problems = []
+    for kind, base in baseline.items():
+        current = summary.get(kind)
+        if current is None:
+            continue
+        # Trả lỗi nhanh (500/429...) không được tính là "nhanh hơn": tỉ lệ lỗi
+        # cao hơn baseline là hồi quy; baseline sạch thì một lỗi cũng không đạt
+        error_rate = current["errors"] / current["requests"] if current["requests"] else 0.0
+        base_rate = base.get("errors", 0) / base["requests"] if base.get("requests") else 0.0
+        if error_rate > base_rate:
+            problems.append(
+                f"{kind}: {current['errors']}/{current['requests']} request lỗi "
+                f"({error_rate:.2%} > {base_rate:.2%}), mã trạng thái {current['statuses']}"
+            )
+        min_rps = base["throughput_rps"] * (1 - tolerance)
+        if current["throughput_rps"] < min_rps:
+            problems.append(
+                f"{kind}: throughput {current['throughput_rps']} < {min_rps:.2f} rps"
+            )
+        for key in ("p95_ms", "p99_ms"):
+            max_ms = base[key] * (1 + tolerance)
+            if current[key] > max_ms:
+                problems.append(f"{kind}: {key} {current[key]} > {max_ms:.2f} ms")
+    return problems
+
+
+def print_report(summary, elapsed, concurrency):
+    print(f"\nThời gian chạy: {elapsed:.1f}s, {concurrency} luồng đồng thời")
+    header = f"{'Loại':<8}{'Số req':>9}{'Lỗi':>7}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for kind, stats in summary.items():
+        print(
+            f"{kind:<8}{stats['requests']:>9}{stats['errors']:>7}{stats['throughput_rps']:>10}"
+            f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}"
+        )
+    print(f"Mã trạng thái: {summary['all']['statuses']}")
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        if kind not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Loại request không hợp lệ: {kind}")
+        mix[kind] = float(weight)
+    return mix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test cho web_api.py")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Server đang chạy")
+    parser.add_argument(
+        "--spawn-server",
+        action="store_true",
+        help="Tự chạy web_api.py trên bản sao dữ liệu tạm (bỏ qua --url)",
+    )
+    parser.add_argument(
+        "--server-env",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="Biến môi trường thêm cho server tự chạy, vd. CAFE_ORDER_MODE=async",
+    )
+    parser.add_argument("--duration", type=float, default=15.0, help="Số giây chạy")
+    parser.add_argument("--concurrency", type=int, default=8, help="Số luồng gửi request")
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=DEFAULT_MIX,
+        help="Tỉ lệ request, vd. menu=0.3,static=0.5,order=0.2",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", metavar="FILE", help="Ghi kết quả ra file JSON")
+    parser.add_argument("--save-baseline", metavar="FILE")
+    parser.add_argument("--check-baseline", metavar="FILE")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Mức tụt cho phép so với baseline (0.2 = 20%%)",
+    )
+    args = parser.parse_args(argv)
+
+    process = temp_dir = None
+    if args.spawn_server:
+        extra_env = dict(item.split("=", 1) for item in args.server_env)
+        process, port, temp_dir = spawn_server(extra_env)
+        host = "127.0.0.1"
+    else:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+
+    try:
+        conn = http.client.HTTPConnection(host, port, timeout=10)
+        conn.request("GET", "/api/menu")
+        menu = json.loads(conn.getresponse().read().decode("utf-8"))
+        conn.close()
+        menu = [m for m in menu if isinstance(m, dict) and m.get("name")]
+        if not menu:
+            print("Menu trống, không thể tạo đơn thử.")
+            return 2
+        # Chỉ lấy ảnh có thật, tránh đếm 404 do dữ liệu thiếu ảnh là lỗi server
+        static_paths = STATIC_PATHS + [
+            "/App/" + m["image"].replace("\\", "/")
+            for m in menu
+            if m.get("image") and os.path.exists(os.path.join(APP_DIR, m["image"]))
+        ]
+        dist = load_cart_distribution(os.path.join(DATA_DIR, "receipts.json"))
+
+        recorder = Recorder()
+        start = time.monotonic()
+        deadline = start + args.duration
+        threads = [
+            threading.Thread(
+                target=worker,
+                args=(args, host, port, menu, static_paths, dist, recorder, deadline, args.seed + i),
+                daemon=True,
+            )
+            for i in range(args.concurrency)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.monotonic() - start
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    summary = recorder.summary(elapsed)
+    print_report(summary, elapsed, args.concurrency)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=4, ensure_ascii=False)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=4, ensure_ascii=False)
+        print(f"Đã lưu baseline vào {args.save_baseline}")
+    if args.check_baseline:
+        with open(args.check_baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        problems = compare_with_baseline(summary, baseline, args.tolerance)
+        if problems:
+            print("\nHỒI QUY so với baseline:")
+            for problem in problems:
+                print(f"  - {problem}")
+            return 1
+        print("\nĐạt baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,8 +4,13 @@ import json
 import os
 import io
 import datetime
-import traceback
 import sys
+import queue
+import signal
+import socket
+import time
+import uuid
+from urllib.parse import urlsplit, parse_qs, unquote
 
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 APP_DIR = os.path.join(BASE_DIR, "App")
@@ -13,11 +18,36 @@ sys.path.insert(0, APP_DIR)
 
 try:
     from utils.data_manager import (
-        get_menu,
         get_tables,
         save_tables,
+        assign_takeaway_order,
+        tables_lock,
         MENU_FILE,
         TABLES_FILE,
+        USERS_FILE,
+        RECEIPTS_FILE,
+        ATTENDANCE_FILE,
+        ORDER_SPOOL_FILE,
+        IMAGE_CACHE_DIR,
+        PROJECT_ROOT,
+        MAX_ITEM_QUANTITY,
+    )
+    from utils.metrics import Counter, Histogram, CallbackMetric, render_metrics
+    from utils.app_logging import (
+        setup_logging,
+        get_logger,
+        install_debug_toggle_signal,
+        shutdown_logging,
+    )
+    from utils.order_queue import OrderQueue, is_valid_order_id
+    from utils.rate_limiter import RateLimiter, ConcurrencyLimiter
+    from utils.menu_index import MenuIndex, StaleCursorError, CartPricingError
+    from utils.image_resizer import (
+        ImageResizer,
+        snap_width,
+        CONTENT_TYPES,
+        PIL_INSTALLED,
+        WEBP_SUPPORTED,
     )
 except ImportError as e:
     print(f"\nLỖI NGHIÊM TRỌNG: Không thể import từ 'utils.data_manager'.")
@@ -26,7 +56,181 @@ except ImportError as e:
     input("Nhấn Enter để thoát...")
     sys.exit(1)
 
-PORT = 8000
+PORT = int(os.environ.get("CAFE_PORT", "8000"))
+
+setup_logging()
+logger = get_logger("web_api")
+
+# "sync": ghi bàn ngay trong request (mặc định)
+# "async": xếp đơn vào hàng đợi, trả 202 ngay, 1 luồng riêng ghi bàn theo lô
+ORDER_MODE = os.environ.get("CAFE_ORDER_MODE", "sync").lower()
+ORDER_QUEUE = None  # Tạo trong run_server() (mỗi worker một hàng đợi/spool; tra trạng thái đọc spool của mọi worker)
+
+# Số tiến trình worker (prefork, cùng cổng qua SO_REUSEPORT). 1 = một tiến trình.
+# Mọi thao tác ghi tables.json đi qua tables_lock() (khóa file) nên các worker
+# cấp khe 'Mang về' nhất quán. Giới hạn tải và metrics được tính riêng từng worker.
+WORKERS = int(os.environ.get("CAFE_WORKERS", "1"))
+
+# --- Giới hạn tải ---
+# Số request POST/giây cho mỗi IP và số request dồn tối đa (burst); 0 = tắt
+POST_RATE_PER_IP = float(os.environ.get("CAFE_POST_RATE", "2"))
+POST_BURST_PER_IP = int(os.environ.get("CAFE_POST_BURST", "10"))
+# Số request được xử lý đồng thời; vượt quá thì trả 503 + Retry-After
+MAX_IN_FLIGHT = int(os.environ.get("CAFE_MAX_IN_FLIGHT", "32"))
+# Kích thước body tối đa (byte) cho POST
+MAX_BODY_BYTES = int(os.environ.get("CAFE_MAX_BODY", str(64 * 1024)))
+
+# --- Ảnh thu nhỏ (/api/images/<id>?w=...) ---
+IMAGE_CACHE_MAX_BYTES = int(os.environ.get("CAFE_IMAGE_CACHE_MB", "64")) * 1024 * 1024
+IMAGE_RESIZE_WORKERS = int(os.environ.get("CAFE_IMAGE_WORKERS", "2"))
+# Biến thể đã sinh có khóa theo mtime ảnh gốc nên cho trình duyệt cache lâu
+IMAGE_MAX_AGE = 7 * 24 * 3600
+IMAGE_RESIZER = None  # Tạo trong run_server() (pool luồng không sống sót qua fork)
+
+# Chỉ mục menu dựng sẵn (theo danh mục, phiên bản, nhật ký thay đổi)
+MENU_INDEX = MenuIndex()
+
+POST_LIMITER = RateLimiter(POST_RATE_PER_IP, POST_BURST_PER_IP)
+IN_FLIGHT = ConcurrencyLimiter(MAX_IN_FLIGHT)
+
+# --- Metrics (/metrics) ---
+API_ROUTES = ("/api/menu", "/api/quote", "/api/order_takeaway", "/api/order_status", "/api/server_stats", "/metrics")
+IMAGES_PREFIX = "/api/images/"
+HTTP_REQUESTS = Counter(
+    "cafe_http_requests_total",
+    "Số request HTTP theo route, method và mã trạng thái.",
+    labelnames=("route", "method", "status"),
+)
+HTTP_LATENCY = Histogram(
+    "cafe_http_request_duration_seconds",
+    "Thời gian xử lý request HTTP theo route và method.",
+    labelnames=("route", "method"),
+)
+DATA_FILES = {
+    "menu.json": MENU_FILE,
+    "tables.json": TABLES_FILE,
+    "users.json": USERS_FILE,
+    "receipts.json": RECEIPTS_FILE,
+    "attendance.json": ATTENDANCE_FILE,
+    "order_spool.jsonl": ORDER_SPOOL_FILE,
+}
+
+
+def _data_file_sizes():
+    sizes = []
+    for name, path in DATA_FILES.items():
+        try:
+            sizes.append(((name,), os.path.getsize(path)))
+        except OSError:
+            pass  # File chưa được tạo
+    return sizes
+
+
+CallbackMetric(
+    "cafe_data_file_bytes",
+    "Kích thước hiện tại của các file dữ liệu.",
+    _data_file_sizes,
+    labelnames=("file",),
+)
+CallbackMetric(
+    "cafe_http_in_flight_requests",
+    "Số request đang được xử lý.",
+    lambda: [((), IN_FLIGHT.in_flight)],
+)
+CallbackMetric(
+    "cafe_http_shed_total",
+    "Số request bị từ chối (503) do vượt giới hạn xử lý đồng thời.",
+    lambda: [((), IN_FLIGHT.shed_count)],
+    metric_type="counter",
+)
+CallbackMetric(
+    "cafe_http_rate_limited_total",
+    "Số request POST bị từ chối (429) do vượt giới hạn theo IP.",
+    lambda: [((), POST_LIMITER.limited_count)],
+    metric_type="counter",
+)
+OVERSIZED_BODIES = Counter(
+    "cafe_http_oversized_body_total",
+    "Số request POST bị từ chối (413) do body quá lớn.",
+)
+CallbackMetric(
+    "cafe_image_cache_requests_total",
+    "Số lần tra cache ảnh thu nhỏ theo kết quả (hit/miss).",
+    lambda: _image_cache_samples(),
+    labelnames=("result",),
+    metric_type="counter",
+)
+CallbackMetric(
+    "cafe_order_queue_size",
+    "Số đơn online đang chờ trong hàng đợi.",
+    lambda: [((), ORDER_QUEUE.qsize() if ORDER_QUEUE else 0)],
+)
+
+
+def _image_cache_samples():
+    if IMAGE_RESIZER is None:
+        return []
+    stats = IMAGE_RESIZER.stats()
+    return [(("hit",), stats["hits"]), (("miss",), stats["misses"])]
+
+
+def route_label(path):
+    """Gom đường dẫn về một nhãn route cố định để metric không bị bùng nhãn."""
+    path = urlsplit(path).path
+    if path in API_ROUTES:
+        return path
+    if path.startswith(IMAGES_PREFIX):
+        return "/api/images"
+    if path.startswith("/api/"):
+        return "/api/other"
+    return "static"
+
+
+def _int_param(query, name):
+    """Đọc tham số query kiểu số nguyên, ném ValueError nếu sai."""
+    try:
+        return int(query[name][0])
+    except ValueError:
+        raise ValueError(f"Tham số '{name}' phải là số nguyên.")
+
+
+def parse_takeaway_order(post_body):
+    """Kiểm tra đơn gửi lên, trả về (customer_info, web_cart). Ném ValueError nếu sai."""
+    order_data = json.loads(post_body.decode("utf-8"))
+    if not isinstance(order_data, dict):
+        raise ValueError("Đơn hàng phải là một object JSON.")
+    customer_info = order_data.get("customer", {})
+    web_cart = order_data.get("cart", {})
+    if not isinstance(customer_info, dict):
+        raise ValueError("Thông tin khách hàng không hợp lệ.")
+    return customer_info, parse_cart(web_cart)
+
+
+def parse_cart(web_cart):
+    """Kiểm tra giỏ hàng {tên món: {"id", "price", "quantity"}}. Ném ValueError nếu sai."""
+    if not isinstance(web_cart, dict) or not web_cart:
+        raise ValueError("Giỏ hàng trống hoặc không hợp lệ.")
+    for item_name, details in web_cart.items():
+        if not isinstance(details, dict):
+            raise ValueError(f"Món '{item_name}' không hợp lệ.")
+        for key in ("id", "name"):
+            if details.get(key) is not None and not isinstance(details[key], str):
+                raise ValueError(f"Trường '{key}' của món '{item_name}' không hợp lệ.")
+        price = details.get("price")
+        if price is not None and (
+            not isinstance(price, (int, float)) or isinstance(price, bool)
+        ):
+            raise ValueError(f"Giá của món '{item_name}' không hợp lệ.")
+        quantity = details.get("quantity", 1)
+        if (
+            not isinstance(quantity, int)
+            or isinstance(quantity, bool)
+            or not 1 <= quantity <= MAX_ITEM_QUANTITY
+        ):
+            raise ValueError(
+                f"Số lượng của món '{item_name}' phải từ 1 đến {MAX_ITEM_QUANTITY}."
+            )
+    return web_cart
 
 
 class CustomHandler(http.server.SimpleHTTPRequestHandler):
@@ -38,15 +242,18 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
         self.end_headers()
         self.wfile.write(json.dumps(data, ensure_ascii=False).encode("utf-8"))
 
-    def _send_error_json(self, status_code, message):
-        print(f"Sending error {status_code}: {message}")
+    def _send_error_json(self, status_code, message, retry_after=None, extra=None):
+        logger.info("Trả lỗi %s: %s", status_code, message)
         self.send_response(status_code)
         self.send_header("Content-type", "application/json; charset=utf-8")
         self.send_header("Access-Control-Allow-Origin", "*")
+        if retry_after is not None:
+            self.send_header("Retry-After", str(retry_after))
         self.end_headers()
-        self.wfile.write(
-            json.dumps({"status": "error", "message": message}).encode("utf-8")
-        )
+        body = {"status": "error", "message": message}
+        if extra:
+            body.update(extra)
+        self.wfile.write(json.dumps(body).encode("utf-8"))
 
     def translate_path(self, path):
         path = http.server.SimpleHTTPRequestHandler.translate_path(self, path)
@@ -54,107 +261,327 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
         full_path = os.path.join(BASE_DIR, rel_path)
         return full_path
 
+    def send_response(self, code, message=None):
+        self._status_code = code
+        super().send_response(code, message)
+
+    def log_message(self, format, *args):
+        # Access log đi qua logger (format và ghi ở luồng riêng)
+        logger.info(format, *args, extra={"fields": {"client": self.address_string()}})
+
+    def _observe_request(self, method, start):
+        route = route_label(self.path)
+        status = str(getattr(self, "_status_code", 0))
+        HTTP_REQUESTS.inc(route, method, status)
+        HTTP_LATENCY.observe(time.perf_counter() - start, route, method)
+
+    def _read_body(self):
+        """Đọc body POST theo Content-Length, từ chối trước khi đọc nếu quá lớn.
+
+        Trả về bytes, hoặc None nếu đã gửi lỗi cho client.
+        """
+        try:
+            content_length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            self.close_connection = True
+            self._send_error_json(411, "Thiếu hoặc sai header Content-Length.")
+            return None
+        if content_length < 0 or content_length > MAX_BODY_BYTES:
+            OVERSIZED_BODIES.inc()
+            self.close_connection = True  # Body chưa đọc, không dùng lại kết nối
+            self._send_error_json(
+                413, f"Dữ liệu gửi lên quá lớn (tối đa {MAX_BODY_BYTES} byte)."
+            )
+            return None
+        return self.rfile.read(content_length)
+
     def do_GET(self):
-        if self.path == "/api/menu":
+        start = time.perf_counter()
+        self._status_code = 0
+        try:
+            if not IN_FLIGHT.try_acquire():
+                self._send_error_json(
+                    503, "Server đang quá tải, vui lòng thử lại sau.", 1
+                )
+                return
             try:
-                print(f"Đang đọc file menu từ: {MENU_FILE}")
-                menu_data = get_menu()
-                self._send_json_response(200, menu_data)
+                self._handle_get()
+            finally:
+                IN_FLIGHT.release()
+        finally:
+            self._observe_request("GET", start)
+
+    def do_POST(self):
+        start = time.perf_counter()
+        self._status_code = 0
+        try:
+            if not IN_FLIGHT.try_acquire():
+                self.close_connection = True
+                self._send_error_json(
+                    503, "Server đang quá tải, vui lòng thử lại sau.", 1
+                )
+                return
+            try:
+                allowed, retry_after = POST_LIMITER.check(self.client_address[0])
+                if not allowed:
+                    self.close_connection = True
+                    self._send_error_json(
+                        429,
+                        "Bạn gửi yêu cầu quá nhanh, vui lòng thử lại sau.",
+                        retry_after,
+                    )
+                    return
+                self._handle_post()
+            finally:
+                IN_FLIGHT.release()
+        finally:
+            self._observe_request("POST", start)
+
+    def _handle_get(self):
+        if self.path == "/metrics":
+            body = render_metrics().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        if self.path == "/api/server_stats":
+            self._send_json_response(
+                200,
+                {
+                    "in_flight": IN_FLIGHT.in_flight,
+                    "max_in_flight": IN_FLIGHT.max_in_flight,
+                    "shed_total": IN_FLIGHT.shed_count,
+                    "rate_limited_total": POST_LIMITER.limited_count,
+                    "oversized_body_total": OVERSIZED_BODIES.value(),
+                    "order_queue_size": ORDER_QUEUE.qsize() if ORDER_QUEUE else 0,
+                    "image_cache": IMAGE_RESIZER.stats() if IMAGE_RESIZER else None,
+                },
+            )
+            return
+
+        if self.path.startswith("/api/order_status"):
+            query = parse_qs(urlsplit(self.path).query)
+            order_id = query.get("id", [""])[0]
+            if ORDER_QUEUE is None:
+                self._send_error_json(404, "Server không chạy ở chế độ hàng đợi đơn.")
+                return
+            if not order_id:
+                self._send_error_json(400, "Thiếu tham số 'id'.")
+                return
+            if not is_valid_order_id(order_id):
+                self._send_error_json(400, "Mã đơn hàng không hợp lệ.")
+                return
+            status, takeaway_id = ORDER_QUEUE.status(order_id)
+            if status == "unknown":
+                self._send_error_json(
+                    404,
+                    "Không tìm thấy đơn hàng.",
+                    extra={"order_id": order_id, "status": "unknown"},
+                )
+                return
+            self._send_json_response(
+                200,
+                {"order_id": order_id, "status": status, "takeaway_id": takeaway_id},
+            )
+            return
+
+        if self.path.startswith(IMAGES_PREFIX):
+            self._handle_image()
+            return
+
+        if urlsplit(self.path).path == "/api/menu":
+            try:
+                self._handle_menu()
             except Exception as e:
-                print(f"Lỗi 500 khi đọc file menu: {e}")
+                logger.exception("Lỗi 500 khi đọc file menu")
                 self._send_error_json(500, f"Lỗi server khi đọc file: {e}")
             return
 
         return http.server.SimpleHTTPRequestHandler.do_GET(self)
 
-    def do_POST(self):
-        if self.path == "/api/order_takeaway":
+    def _handle_menu(self):
+        """GET /api/menu.
+
+        Không tham số: trả mảng món như cũ (kèm ETag). Có tham số:
+        ?category=&q=&limit=&cursor= lọc/phân trang, ?since_version= trả delta.
+        """
+        snapshot = MENU_INDEX.snapshot()
+        query = parse_qs(urlsplit(self.path).query)
+        if not query:
+            if self.headers.get("If-None-Match") == snapshot.etag:
+                self.send_response(304)
+                self.send_header("ETag", snapshot.etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(snapshot.full_body)))
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.send_header("ETag", snapshot.etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self.wfile.write(snapshot.full_body)
+            return
+
+        try:
+            if "since_version" in query:
+                since_version = _int_param(query, "since_version")
+                self._send_json_response(200, snapshot.changes_since(since_version))
+                return
+            limit = _int_param(query, "limit") if "limit" in query else None
+            result = snapshot.query(
+                category=query.get("category", [None])[0],
+                q=query.get("q", [""])[0].strip(),
+                limit=limit,
+                cursor=query.get("cursor", [""])[0],
+            )
+        except StaleCursorError as e:
+            self._send_error_json(409, str(e))
+            return
+        except ValueError as e:
+            self._send_error_json(400, str(e))
+            return
+        result["categories"] = snapshot.categories
+        self._send_json_response(200, result)
+
+    def _handle_image(self):
+        """Trả ảnh món theo id; có ?w= thì trả bản thu nhỏ JPEG/WebP từ cache."""
+        parts = urlsplit(self.path)
+        menu_id = unquote(parts.path[len(IMAGES_PREFIX):])
+        query = parse_qs(parts.query)
+        try:
+            width = int(query.get("w", ["0"])[0])
+        except ValueError:
+            self._send_error_json(400, "Tham số 'w' phải là số nguyên.")
+            return
+
+        item = MENU_INDEX.snapshot().by_id.get(menu_id)
+        if item is None or not item.get("image"):
+            self._send_error_json(404, "Không tìm thấy ảnh của món này.")
+            return
+        source_path = os.path.abspath(os.path.join(PROJECT_ROOT, item["image"]))
+        if not source_path.startswith(PROJECT_ROOT + os.sep) or not os.path.isfile(source_path):
+            self._send_error_json(404, "Không tìm thấy ảnh của món này.")
+            return
+
+        if IMAGE_RESIZER is not None and width > 0:
+            accept = self.headers.get("Accept", "")
+            fmt = "webp" if WEBP_SUPPORTED and "image/webp" in accept else "jpeg"
+            variant_path, key = IMAGE_RESIZER.get(source_path, snap_width(width), fmt)
+            if variant_path is not None:
+                etag = f'"{key}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self._send_file(
+                    variant_path,
+                    CONTENT_TYPES[fmt],
+                    {
+                        "Cache-Control": f"public, max-age={IMAGE_MAX_AGE}",
+                        "ETag": etag,
+                        "Vary": "Accept",
+                    },
+                )
+                return
+        # Chưa có bản thu nhỏ (đang sinh nền) hoặc không có Pillow: trả ảnh gốc,
+        # cache ngắn để lần sau trình duyệt lấy được bản nhỏ
+        self._send_file(
+            source_path, self.guess_type(source_path), {"Cache-Control": "public, max-age=60"}
+        )
+
+    def _send_file(self, path, content_type, headers):
+        try:
+            f = open(path, "rb")
+        except OSError:
+            self._send_error_json(404, "Không tìm thấy file.")
+            return
+        with f:
+            self.send_response(200)
+            self.send_header("Content-type", content_type)
+            self.send_header("Content-Length", str(os.fstat(f.fileno()).st_size))
+            self.send_header("Access-Control-Allow-Origin", "*")
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.copyfile(f, self.wfile)
+
+    def _handle_post(self):
+        if self.path == "/api/quote":
+            try:
+                post_body = self._read_body()
+                if post_body is None:
+                    return
+                request_data = json.loads(post_body.decode("utf-8"))
+                if not isinstance(request_data, dict):
+                    raise ValueError("Yêu cầu phải là một object JSON.")
+                web_cart = parse_cart(request_data.get("cart"))
+                self._send_json_response(200, MENU_INDEX.snapshot().quote(web_cart))
+            except json.JSONDecodeError:
+                self._send_error_json(400, "Lỗi: Dữ liệu gửi lên không phải JSON.")
+            except ValueError as e:
+                self._send_error_json(400, f"Lỗi: {e}")
+            except Exception as e:
+                logger.exception("Lỗi 500 khi xử lý POST /api/quote")
+                self._send_error_json(500, f"Lỗi server khi tính giá: {e}")
+        elif self.path == "/api/order_takeaway":
             try:
-                print("\n--- Nhận được yêu cầu POST /api/order_takeaway ---")
-
-                content_length = int(self.headers["Content-Length"])
-                post_body = self.rfile.read(content_length)
-                order_data = json.loads(post_body.decode("utf-8"))
-                print(f"Dữ liệu nhận được: {order_data}")
-
-                customer_info = order_data.get("customer", {})
-                web_cart = order_data.get("cart", {})
-
-                customer_name = customer_info.get("name", "Khách Online")
-                customer_phone = customer_info.get("phone", "N/A")
-                customer_address = customer_info.get("address", "N/A")
-
-                print(f"Đang đọc file tables từ: {TABLES_FILE}")
-                tables_data = get_tables()
-
-                found_slot = False
-                new_takeaway_id = ""
-
-                for i, table in enumerate(tables_data):
-                    table_id = table.get("id", "")
-                    if (
-                        str(table_id).startswith("takeaway")
-                        and table.get("status") == "Sẵn sàng"
-                    ):
-                        print(f"Tìm thấy khe 'Mang về' trống: {table_id}")
-                        new_order_dict = {}
-                        for item_name, details in web_cart.items():
-                            new_order_dict[item_name] = {
-                                "price": details.get("price", 0),
-                                "quantity": details.get("quantity", 1),
-                            }
-                        tables_data[i]["order"] = new_order_dict
-                        tables_data[i][
-                            "employee"
-                        ] = f"{customer_name} | {customer_phone} | {customer_address}"
-                        tables_data[i]["status"] = "Chờ xử lý"
-                        found_slot = True
-                        new_takeaway_id = table_id
-                        break
-
-                if not found_slot:
-                    print("Không tìm thấy khe trống, tạo 'Mang về' mới...")
-                    takeaway_count = sum(
-                        1
-                        for t in tables_data
-                        if str(t.get("id", "")).startswith("takeaway")
+                post_body = self._read_body()
+                if post_body is None:
+                    return
+                customer_info, web_cart = parse_takeaway_order(post_body)
+                # Giá lấy từ menu phía server, không tin giá client gửi
+                web_cart = MENU_INDEX.snapshot().price_cart(web_cart)
+
+                if ORDER_QUEUE is not None:
+                    order_id = ORDER_QUEUE.submit(customer_info, web_cart)
+                    logger.debug("Đã xếp đơn %s vào hàng đợi.", order_id)
+                    self._send_json_response(
+                        202,
+                        {
+                            "status": "accepted",
+                            "message": "Đã nhận đơn hàng, đang xử lý.",
+                            "order_id": order_id,
+                        },
+                    )
+                    return
+
+                logger.debug("Dữ liệu nhận được: %s | %s", customer_info, web_cart)
+                # Luôn gắn mã đơn để save_tables_merged() của desktop nhận ra khe vừa gán
+                order_id = uuid.uuid4().hex
+                with tables_lock():
+                    tables_data = get_tables()
+                    new_takeaway_id = assign_takeaway_order(
+                        tables_data, customer_info, web_cart, order_id
                     )
-                    new_takeaway_id = f"takeaway{takeaway_count + 1}"
-                    new_order_dict = {}
-                    for item_name, details in web_cart.items():
-                        new_order_dict[item_name] = {
-                            "price": details.get("price", 0),
-                            "quantity": details.get("quantity", 1),
-                        }
-                    new_takeaway_entry = {
-                        "id": new_takeaway_id,
-                        "name": "Mang về",
-                        "status": "Chờ xử lý",
-                        "order": new_order_dict,
-                        "employee": f"{customer_name} | {customer_phone} | {customer_address}",
-                    }
-                    tables_data.append(new_takeaway_entry)
-                    print(f"Đã tạo mục mới: {new_takeaway_id}")
-
-                save_tables(tables_data)
-
-                print(f"Đã cập nhật đơn hàng thành công vào {TABLES_FILE}")
+                    save_tables(tables_data)
+
+                logger.info("Đã ghi đơn web %s vào '%s'.", order_id, new_takeaway_id)
 
                 self._send_json_response(
                     200,
                     {
                         "status": "success",
                         "message": "Đã nhận đơn hàng.",
+                        "order_id": order_id,
                         "takeaway_id": new_takeaway_id,
                     },
                 )
 
             except json.JSONDecodeError:
                 self._send_error_json(400, "Lỗi: Dữ liệu gửi lên không phải JSON.")
+            except CartPricingError as e:
+                self._send_error_json(409, str(e), extra={"problems": e.problems})
+            except ValueError as e:
+                self._send_error_json(400, f"Lỗi: {e}")
+            except queue.Full:
+                self._send_error_json(503, "Hệ thống đang quá tải đơn, vui lòng thử lại sau.")
             except Exception as e:
-                print("\n--- LỖI 500 KHI XỬ LÝ POST ---")
-                traceback.print_exc()
-                print("---------------------------------")
+                logger.exception("Lỗi 500 khi xử lý POST /api/order_takeaway")
                 self._send_error_json(500, f"Lỗi server khi xử lý đơn hàng: {e}")
         else:
             self._send_error_json(404, "Đường dẫn POST không hợp lệ.")
@@ -169,15 +596,134 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
         self.end_headers()
 
 
-Handler = CustomHandler
-try:
-    with socketserver.TCPServer(("", PORT), Handler) as httpd:
-        print(f"--- Server Python Đơn giản đang chạy tại cổng {PORT} ---")
-        print(f"Mở trình duyệt và truy cập: http://localhost:{PORT}/Web/index.html")
-        print(f"API Menu: http://localhost:{PORT}/api/menu")
-        print("Nhấn Ctrl+C để tắt server.")
-        httpd.serve_forever()
-except OSError as e:
-    print(f"\nLỖI: Không thể khởi động server trên cổng {PORT}.")
-    print(f"Chi tiết: {e}")
-    print("Có thể cổng này đang được sử dụng bởi một chương trình khác?")
+class ThreadingServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """Mỗi kết nối một luồng; số request xử lý cùng lúc do IN_FLIGHT giới hạn."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+    reuse_port = False
+
+    def server_bind(self):
+        if self.reuse_port:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+
+class ReusePortServer(ThreadingServer):
+    """Server của từng worker prefork: nhiều tiến trình bind cùng một cổng."""
+
+    reuse_port = True
+
+
+def spool_file_for(worker_index):
+    """Mỗi worker có spool riêng, worker khởi động lại sẽ nạp lại đúng spool của nó."""
+    if worker_index is None:
+        return ORDER_SPOOL_FILE
+    base, ext = os.path.splitext(ORDER_SPOOL_FILE)
+    return f"{base}.w{worker_index}{ext}"
+
+
+def shared_spool_pattern():
+    """Mẫu glob khớp spool của mọi worker, để tra trạng thái đơn do worker khác nhận."""
+    base, ext = os.path.splitext(ORDER_SPOOL_FILE)
+    return f"{base}*{ext}"
+
+
+def run_server(worker_index=None):
+    """Chạy server HTTP trong tiến trình hiện tại. Trả về mã thoát."""
+    global ORDER_QUEUE, IMAGE_RESIZER
+    if ORDER_MODE == "async":
+        ORDER_QUEUE = OrderQueue(
+            spool_file=spool_file_for(worker_index),
+            shared_spool_pattern=shared_spool_pattern(),
+        )
+        ORDER_QUEUE.start()
+    if PIL_INSTALLED:
+        IMAGE_RESIZER = ImageResizer(
+            IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_BYTES, IMAGE_RESIZE_WORKERS
+        )
+    install_debug_toggle_signal()
+    server_class = ThreadingServer if worker_index is None else ReusePortServer
+    try:
+        with server_class(("", PORT), CustomHandler) as httpd:
+            if worker_index is not None:
+                logger.info("Worker %d (pid %d) đang phục vụ.", worker_index, os.getpid())
+            httpd.serve_forever()
+    except KeyboardInterrupt:
+        return 0
+    except OSError as e:
+        print(f"\nLỖI: Không thể khởi động server trên cổng {PORT}.")
+        print(f"Chi tiết: {e}")
+        print("Có thể cổng này đang được sử dụng bởi một chương trình khác?")
+        return 1
+    return 0
+
+
+def run_prefork(workers):
+    """Tiến trình giám sát: fork `workers` worker và khởi động lại worker bị chết."""
+    children = {}  # pid -> worker_index
+    last_spawn = {}  # worker_index -> thời điểm fork gần nhất
+    stopping = False
+
+    def spawn(worker_index):
+        # Worker chết ngay sau khi khởi động (vd. lỗi cấu hình): chờ để không fork liên tục
+        if time.monotonic() - last_spawn.get(worker_index, 0) < 1.0:
+            time.sleep(1.0)
+        last_spawn[worker_index] = time.monotonic()
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            exit_code = 1
+            try:
+                exit_code = run_server(worker_index)
+            finally:
+                shutdown_logging()
+                os._exit(exit_code)
+        children[pid] = worker_index
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for worker_index in range(workers):
+        spawn(worker_index)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        worker_index = children.pop(pid, None)
+        if worker_index is None or stopping:
+            continue
+        logger.warning(
+            "Worker %d (pid %d) đã dừng (mã %s), đang khởi động lại.",
+            worker_index,
+            pid,
+            os.waitstatus_to_exitcode(status),
+        )
+        spawn(worker_index)
+    return 0
+
+
+if __name__ == "__main__":
+    print(f"--- Server Python Đơn giản đang chạy tại cổng {PORT} ---")
+    print(f"Mở trình duyệt và truy cập: http://localhost:{PORT}/Web/index.html")
+    print(f"API Menu: http://localhost:{PORT}/api/menu")
+    if ORDER_MODE == "async":
+        print("Chế độ hàng đợi đơn online: BẬT (trả 202, ghi bàn theo lô).")
+    print("Nhấn Ctrl+C để tắt server.")
+    if WORKERS > 1 and hasattr(os, "fork") and hasattr(socket, "SO_REUSEPORT"):
+        print(f"Chế độ prefork: {WORKERS} worker.")
+        sys.exit(run_prefork(WORKERS))
+    if WORKERS > 1:
+        print("CẢNH BÁO: Hệ điều hành không hỗ trợ fork/SO_REUSEPORT, chạy 1 tiến trình.")
+    sys.exit(run_server())